@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of CLIP reaction counting (planning.count_clips), the stage of
+generate_clips_df scaling with the number of constructs.
+
+Synthetic constructs are drawn from a fixed pool of linkers and parts so that
+the number of unique CLIP reactions stays below MAX_CLIPS whatever the number
+of constructs. Designs above one run do not fit the magbead plate, so the
+purified wells of generate_clips_df are not allocated. Run from the
+repository root:
+
+    python benchmarks/bench_clips_df.py
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'dnabot'))
+import constructs  # noqa: E402
+import planning  # noqa: E402
+
+SIZES = [96, 384, 1000, 3000, 10000]
+REPEATS = 3
+
+
+def synthetic_constructs_list(construct_number, seed=0):
+    """Builds a constructs_list as generate_constructs_list would, for
+    construct_number random four-part constructs.
+
+    """
+    rng = random.Random(seed)
+    constructs_list = constructs.ConstructLibrary()
+    for index in range(construct_number):
+        rbs_1 = f'U1-RBS{rng.randint(1, 3)}'
+        rbs_2 = f'U2-RBS{rng.randint(1, 3)}'
+        constructs_list.add(f'construct_{index}', zip(
+            ['LMS-P', 'LMP-P', rbs_1 + '-P', rbs_2 + '-P'],
+            ['BASIC_SEVA_37_CmR-p15A.1',
+             rng.choice(['PJ23101_BASIC', 'PJ23104_BASIC']),
+             f'CDS_A{rng.randint(1, 3)}',
+             f'CDS_B{rng.randint(1, 3)}'],
+            ['LMP-S', 'U1-S', 'U2-S', 'LMS-S']))
+    return constructs_list
+
+
+def time_clips_df(constructs_list):
+    """Returns the best wall time of REPEATS calls to count_clips."""
+    best = math.inf
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        planning.count_clips(constructs_list)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    timings = []
+    print(f"{'constructs':>10} {'time (s)':>10} {'us/construct':>13}")
+    for size in SIZES:
+        elapsed = time_clips_df(synthetic_constructs_list(size))
+        timings.append(elapsed)
+        print(f'{size:>10} {elapsed:>10.4f} {1e6 * elapsed / size:>13.1f}')
+    # Slope of log(time) against log(size): ~1 for linear scaling
+    slope = (math.log(timings[-1]) - math.log(timings[0])) / \
+        (math.log(SIZES[-1]) - math.log(SIZES[0]))
+    print(f'Scaling exponent {SIZES[0]}->{SIZES[-1]}: {slope:.2f}')
+
+
+if __name__ == '__main__':
+    main()
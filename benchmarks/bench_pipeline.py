@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the planning pipeline, stage by stage.
+
+Synthetic designs are written as construct and source csv files, using the
+linker naming scheme of the real linker plate (LMS, LMP, U1-RBS1...): each
+construct is a backbone, a promoter and three genes, gene k being preceded by
+a Uk-RBS linker. The gene pool is sized so that every design fits in a single
+run (at most MAX_CLIPS unique CLIP reactions). Run from the repository root:
+
+    python benchmarks/bench_pipeline.py                  # compare to baseline
+    python benchmarks/bench_pipeline.py --save_baseline  # update baseline
+
+Timings are the best of REPEATS calls. Script rendering starts from an empty
+template cache, as a command line run does.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'dnabot'))
+import dnabot_app  # noqa: E402
+import mplates  # noqa: E402
+import planning  # noqa: E402
+import slots  # noqa: E402
+import templates  # noqa: E402
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+LINKERS_PATH = os.path.join(REPO_DIR, 'tests', 'inputs',
+                            'linker_parts_coords.csv')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'baseline_pipeline.json')
+
+SIZES = [12, 24, 48, 96]
+REPEATS = 5
+# Genes drawn from at each position, keeping the purified CLIP samples of
+#   every size within the magbead plate
+GENES_PER_POSITION = 4
+STAGES = ['constructs_list', 'clips_df', 'sources_dict', 'clips_dict',
+          'final_assembly_dict', 'spotting_tuples', 'rendering', 'slots']
+# Regressions are reported above both thresholds
+TOLERANCE = 1.5
+MIN_DELTA = 0.001
+
+
+def write_design(directory, construct_number, seed=0):
+    """Writes a synthetic constructs csv file of construct_number random
+    constructs and the user parts csv file providing their parts into
+    directory. Returns (constructs path, user parts path).
+
+    """
+    rng = random.Random(seed)
+    backbone = 'BASIC_SEVA_37_CmR-p15A.1'
+    promoters = ['PJ23101_BASIC', 'PJ23104_BASIC']
+    genes = [[f'GENE_{position}_{index}'
+              for index in range(1, GENES_PER_POSITION + 1)]
+             for position in range(1, 4)]
+
+    constructs_path = os.path.join(directory, f'constructs_{construct_number}.csv')
+    with open(constructs_path, 'w', newline='') as csvfile:
+        csvwriter = csv.writer(csvfile)
+        header = ['Well']
+        for index in range(1, 11):
+            header += [f'Linker {index}', f'Part {index}']
+        csvwriter.writerow(header)
+        for construct_index in range(construct_number):
+            row = [mplates.final_well(construct_index + 1),
+                   'LMS', backbone, 'LMP', rng.choice(promoters)]
+            for position in range(1, 4):
+                row += [f'U{position}-RBS{rng.randint(1, 3)}',
+                        rng.choice(genes[position - 1])]
+            csvwriter.writerow(row + [''] * (len(header) - len(row)))
+
+    parts_path = os.path.join(directory, 'user_parts_coords.csv')
+    parts = [backbone] + promoters + [gene for pool in genes for gene in pool]
+    with open(parts_path, 'w', newline='') as csvfile:
+        csvwriter = csv.writer(csvfile)
+        csvwriter.writerow(['Part/linker', 'Well',
+                            'Part concentration (ng/uL)'])
+        for index, part in enumerate(parts):
+            concentration = '' if index % 4 == 0 else rng.randint(20, 400)
+            csvwriter.writerow(
+                [part, mplates.final_well(index + 1),
+                 concentration])
+    return constructs_path, parts_path
+
+
+def best_time(function, *args):
+    """Returns (best wall time of REPEATS calls to function, its result)."""
+    best = math.inf
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def time_stages(constructs_path, sources_paths, output_dir):
+    """Returns {stage: best wall time} for one design, running the stages of
+    planning.plan and write_plan one at a time.
+
+    """
+    template_dir = os.path.join(REPO_DIR, 'dnabot', planning.TEMPLATE_DIR_NAME)
+    scripts = [script for script in planning.OT2_SCRIPTS
+               if os.path.exists(os.path.join(template_dir, script[1]))]
+    with open(dnabot_app.DEFAULT_SETTINGS_FILE) as ifh:
+        settings = yaml.safe_load(ifh)
+    timings = {}
+
+    timings['constructs_list'], constructs_list = best_time(
+        planning.generate_constructs_list, constructs_path)
+    timings['clips_df'], clips_df = best_time(
+        planning.generate_clips_df, constructs_list)
+    timings['sources_dict'], sources_index = best_time(
+        planning.generate_sources_index, sources_paths)
+    timings['clips_dict'], clips_dict = best_time(
+        planning.generate_clips_dict, clips_df, sources_index)
+    timings['final_assembly_dict'], final_assembly_dict = best_time(
+        planning.generate_final_assembly_dict, constructs_list, clips_df)
+
+    def spotting():
+        return (planning.generate_spotting_tuples(
+                    constructs_list, planning.SPOTTING_VOLS_DICT),
+                planning.generate_spotting_tuples_12(
+                    constructs_list, planning.SPOTTING_VOLS_DICT_12))
+    timings['spotting_tuples'], (spotting_tuples, spotting_tuples_12) = \
+        best_time(spotting)
+
+    run_plan = {
+        'clips_dict': clips_dict,
+        'magbead_sample_number': clips_df['number'].sum(),
+        'final_assembly_dict': final_assembly_dict,
+        'final_assembly_tipracks':
+            planning.calculate_final_assembly_tipracks(final_assembly_dict),
+        'spotting_tuples': spotting_tuples,
+        'spotting_tuples_12': spotting_tuples_12,
+        'etoh_well': 'A11',
+        'soc_well': 'A1',
+        'labwares': settings['labwares'],
+        'parameters': settings['parameters'],
+    }
+
+    def rendering():
+        templates.clear_cache()
+        literals = {
+            key: templates.format_value(run_plan[key])
+            for _, _, variables in scripts for key in variables.values()}
+        return planning.render_scripts(literals, template_dir, scripts)
+    timings['rendering'], rendered = best_time(rendering)
+
+    for fname, script in rendered.items():
+        with open(os.path.join(output_dir, fname), 'w') as ofh:
+            ofh.write(script)
+
+    def deck_positions():
+        slots.clear_cache()
+        decks = planning.plan_decks(template_dir, scripts, rendered,
+                                    run_plan)
+        return [get_positions(decks[fname])
+                for get_positions, _, fnames in planning.DECK_SCRIPTS
+                for fname in fnames if fname in rendered]
+    timings['slots'], _ = best_time(deck_positions)
+    return timings
+
+
+def run_benchmark(sizes=SIZES):
+    """Returns the benchmark results: machine description and, for each
+    design size, the stage timings.
+
+    """
+    results = {
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor()
+        },
+        'repeats': REPEATS,
+        'sizes': {}
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            constructs_path, parts_path = write_design(directory, size)
+            output_dir = os.path.join(directory, f'out_{size}')
+            os.makedirs(output_dir)
+            results['sizes'][str(size)] = time_stages(
+                constructs_path, [LINKERS_PATH, parts_path], output_dir)
+    return results
+
+
+def compare(results, baseline):
+    """Returns the (size, stage, baseline time, time) regressions of results
+    against baseline.
+
+    """
+    regressions = []
+    for size, timings in results['sizes'].items():
+        for stage, elapsed in timings.items():
+            reference = baseline['sizes'].get(size, {}).get(stage)
+            if reference is None:
+                continue
+            if elapsed > reference * TOLERANCE and \
+                    elapsed - reference > MIN_DELTA:
+                regressions.append((size, stage, reference, elapsed))
+    return regressions
+
+
+def print_results(results, baseline=None):
+    print(f"{'stage':>20}" + ''.join(f'{size:>12}' for size in results['sizes']))
+    for stage in STAGES:
+        line = f'{stage:>20}'
+        for size, timings in results['sizes'].items():
+            cell = f'{1000 * timings[stage]:.2f}'
+            if baseline is not None and stage in baseline['sizes'].get(size, {}):
+                ratio = timings[stage] / baseline['sizes'][size][stage]
+                cell += f' x{ratio:.1f}'
+            line += f'{cell:>12}'
+        print(line)
+    print('Times in ms' + (', ratios to baseline' if baseline else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help='Baseline json file. Default: %(default)s.')
+    parser.add_argument('--save_baseline', action='store_true',
+                        help='Write the results to the baseline file.')
+    parser.add_argument('--output', default=None,
+                        help='Optional, json file to write the results to.')
+    args = parser.parse_args()
+
+    results = run_benchmark()
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as ifh:
+            baseline = json.load(ifh)
+    print_results(results, baseline)
+
+    if args.output is not None:
+        with open(args.output, 'w') as ofh:
+            json.dump(results, ofh, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as ofh:
+            json.dump(results, ofh, indent=1)
+        print(f'Baseline written to {args.baseline}')
+    elif baseline is not None:
+        if baseline['machine'] != results['machine']:
+            print('Warning: baseline recorded on another machine.')
+        regressions = compare(results, baseline)
+        for size, stage, reference, elapsed in regressions:
+            print(f'Regression: {stage} on {size} constructs, '
+                  f'{1000 * reference:.2f} -> {1000 * elapsed:.2f} ms')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Partitioning of construct libraries larger than one deck into robot runs.
+"""
+from collections import Counter
+
+
+class BatchRun:
+    """Constructs assigned to one robot run, with the running totals needed
+    to check per-run limits.
+
+    Args:
+        assemblies_per_clip (int): final assemblies served by one CLIP
+            reaction replicate.
+
+    """
+
+    def __init__(self, assemblies_per_clip):
+        self.assemblies_per_clip = assemblies_per_clip
+        self.construct_indexes = []
+        self.clip_counts = Counter()
+        self.construct_lens = Counter()
+        self.clip_reactions = 0
+        self.final_assembly_tips = 0
+
+    def replicates(self, clip_count):
+        """Number of CLIP reaction replicates for clip_count final
+        assemblies, as in planning.clip_replicates.
+
+        """
+        return -(-clip_count // self.assemblies_per_clip)
+
+    def clip_reactions_delta(self, clips):
+        """Additional CLIP reactions needed if a construct made of clips was
+        added to the run.
+
+        """
+        delta = 0
+        for clip, count in Counter(clips).items():
+            current = self.clip_counts[clip]
+            delta += self.replicates(current + count) - self.replicates(current)
+        return delta
+
+    def new_clips(self, clips):
+        """Number of unique CLIP reactions a construct would add to the run.
+
+        """
+        return len(set(clips) - self.clip_counts.keys())
+
+    def final_assembly_tips_delta(self, clips):
+        """Additional final assembly tips (one per part plus one master mix
+        tip per distinct construct length) needed for a construct.
+
+        """
+        return len(clips) + (0 if self.construct_lens[len(clips)] else 1)
+
+    def fits(self, clips, limits):
+        """Checks that adding a construct made of clips keeps the run within
+        limits.
+
+        """
+        return (len(self.construct_indexes) + 1 <= limits['constructs']
+                and len(self.clip_counts) + self.new_clips(clips)
+                <= limits['clips']
+                and self.clip_reactions + self.clip_reactions_delta(clips)
+                <= limits['clip_reactions']
+                and self.final_assembly_tips
+                + self.final_assembly_tips_delta(clips)
+                <= limits['final_assembly_tips'])
+
+    def add(self, construct_index, clips):
+        """Adds a construct made of clips to the run."""
+        self.clip_reactions += self.clip_reactions_delta(clips)
+        self.final_assembly_tips += self.final_assembly_tips_delta(clips)
+        self.construct_indexes.append(construct_index)
+        self.clip_counts.update(clips)
+        self.construct_lens[len(clips)] += 1
+
+
+def partition_constructs(constructs_clips, limits, assemblies_per_clip):
+    """Partitions constructs into robot runs respecting per-run limits.
+
+    Runs are filled greedily: each run is seeded with the first unassigned
+    construct, then grows with the construct needing the fewest additional
+    CLIP reactions (ties broken on csv order), so constructs sharing CLIP
+    reactions end up in the same run. Under-filled runs are then repacked
+    (see repack_runs).
+
+    Args:
+        constructs_clips (list): for each construct, the list of its
+            (prefix, part, suffix) CLIP reaction tuples.
+        limits (dict): per-run maxima for 'constructs', 'clips' (unique CLIP
+            reactions), 'clip_reactions' (CLIP reactions including
+            replicates) and 'final_assembly_tips'.
+        assemblies_per_clip (int): final assemblies served by one CLIP
+            reaction replicate.
+
+    Returns:
+        list: one list of construct indexes per run, in csv order.
+
+    """
+    remaining = list(range(len(constructs_clips)))
+    runs = []
+    while remaining:
+        run = BatchRun(assemblies_per_clip)
+        seed = remaining.pop(0)
+        if not run.fits(constructs_clips[seed], limits):
+            raise ValueError(
+                f'Construct {seed + 1} exceeds the limits of a single run.')
+        run.add(seed, constructs_clips[seed])
+        while remaining:
+            best = None
+            best_delta = None
+            for position, construct_index in enumerate(remaining):
+                clips = constructs_clips[construct_index]
+                if not run.fits(clips, limits):
+                    continue
+                delta = run.clip_reactions_delta(clips)
+                if best_delta is None or delta < best_delta:
+                    best, best_delta = position, delta
+                    if delta == 0:
+                        break
+            if best is None:
+                break
+            construct_index = remaining.pop(best)
+            run.add(construct_index, constructs_clips[construct_index])
+        runs.append(run.construct_indexes)
+    runs = repack_runs(runs, constructs_clips, limits, assemblies_per_clip)
+    return [sorted(run) for run in runs]
+
+
+def _batch_run(construct_indexes, constructs_clips, assemblies_per_clip):
+    run = BatchRun(assemblies_per_clip)
+    for construct_index in construct_indexes:
+        run.add(construct_index, constructs_clips[construct_index])
+    return run
+
+
+def repack_runs(runs, constructs_clips, limits, assemblies_per_clip):
+    """Removes runs whose constructs all fit in the other runs.
+
+    Runs are tried from the one with the fewest constructs. The constructs of
+    a run are moved, in decreasing number of CLIP reactions, each to the run
+    it adds the fewest CLIP reactions to (ties broken on run order). The run
+    is kept if one of its constructs fits nowhere else. Repeated until no run
+    can be removed.
+
+    Args:
+        runs (list): one list of construct indexes per run.
+        constructs_clips (list): for each construct, the list of its CLIP
+            reaction tuples.
+        limits (dict): per-run maxima (see partition_constructs).
+        assemblies_per_clip (int): final assemblies served by one CLIP
+            reaction replicate.
+
+    Returns:
+        list: one list of construct indexes per run, in the order of runs.
+
+    """
+    runs = [list(run) for run in runs]
+    removed = True
+    while removed and len(runs) > 1:
+        removed = False
+        for candidate in sorted(range(len(runs)),
+                                key=lambda index: len(runs[index])):
+            others = [_batch_run(run, constructs_clips, assemblies_per_clip)
+                      for index, run in enumerate(runs) if index != candidate]
+            moved = sorted(
+                runs[candidate],
+                key=lambda construct_index: -len(set(
+                    constructs_clips[construct_index])))
+            for construct_index in moved:
+                clips = constructs_clips[construct_index]
+                fitting = [run for run in others if run.fits(clips, limits)]
+                if not fitting:
+                    break
+                min(fitting, key=lambda run: run.clip_reactions_delta(
+                    clips)).add(construct_index, clips)
+            else:
+                runs = [run.construct_indexes for run in others]
+                removed = True
+                break
+    return runs
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Compact in-memory model of a construct library.
+
+Linker and part names are interned into a symbol table, and each unique CLIP
+reaction (prefix linker, part, suffix linker) into an integer code. A library
+stores, for all of its constructs, the concatenated CLIP codes in a single
+integer array, so that memory per construct stays small and flat however
+large the library is.
+"""
+from array import array
+
+
+class Construct:
+    """A construct: its name and the (prefix, part, suffix) tuple of each of
+    its CLIP reactions, in assembly order.
+
+    """
+    __slots__ = ('name', 'clips')
+
+    def __init__(self, name, clips):
+        self.name = name
+        self.clips = clips
+
+    def __len__(self):
+        return len(self.clips)
+
+    def __repr__(self):
+        return f'Construct({self.name!r}, {self.clips!r})'
+
+
+class ConstructLibrary:
+    """Sequence of constructs, integer-coded.
+
+    Attributes:
+        names (list): construct names.
+        clips (list): unique (prefix, part, suffix) tuples indexed by CLIP
+            code, codes being given in order of first occurrence.
+        clip_codes (array): CLIP codes of all constructs, concatenated.
+        offsets (array): start of each construct in clip_codes, followed by
+            the total number of CLIP codes.
+
+    """
+
+    def __init__(self):
+        self.names = []
+        self.clips = []
+        self.clip_codes = array('l')
+        self.offsets = array('l', [0])
+        # Symbol table of linker and part names, and index of CLIP codes
+        self._symbols = {}
+        self._codes = {}
+
+    def _intern(self, symbol):
+        return self._symbols.setdefault(symbol, symbol)
+
+    def clip_code(self, clip):
+        """Returns the code of a (prefix, part, suffix) tuple, adding it to the
+        library if new.
+
+        """
+        code = self._codes.get(clip)
+        if code is None:
+            code = len(self.clips)
+            clip = tuple(self._intern(symbol) for symbol in clip)
+            self._codes[clip] = code
+            self.clips.append(clip)
+        return code
+
+    def add(self, name, clips):
+        """Appends a construct made of clips, an iterable of (prefix, part,
+        suffix) tuples.
+
+        """
+        self.names.append(name)
+        self.clip_codes.extend(self.clip_code(clip) for clip in clips)
+        self.offsets.append(len(self.clip_codes))
+
+    def codes(self, index):
+        """Returns the CLIP codes of the construct at index."""
+        return self.clip_codes[self.offsets[index]:self.offsets[index + 1]]
+
+    def lengths(self):
+        """Returns the number of CLIP reactions of each construct."""
+        offsets = self.offsets
+        return [offsets[index + 1] - offsets[index]
+                for index in range(len(self.names))]
+
+    def clip_counts(self):
+        """Returns the number of uses of each CLIP reaction, indexed by CLIP
+        code.
+
+        """
+        counts = [0] * len(self.clips)
+        for code in self.clip_codes:
+            counts[code] += 1
+        return counts
+
+    def take(self, indexes):
+        """Returns a new library of the constructs at indexes, in that order.
+
+        """
+        library = ConstructLibrary()
+        for index in indexes:
+            library.names.append(self.names[index])
+            library.clip_codes.extend(library.clip_code(self.clips[code])
+                                      for code in self.codes(index))
+            library.offsets.append(len(library.clip_codes))
+        return library
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.names)
+        if not 0 <= index < len(self.names):
+            raise IndexError('construct index out of range')
+        clips = self.clips
+        return Construct(self.names[index],
+                         tuple(clips[code] for code in self.codes(index)))
+
+    def __iter__(self):
+        for index in range(len(self.names)):
+            yield self[index]
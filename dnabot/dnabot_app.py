@@ -6,95 +6,77 @@ Created on Thu Apr 11 14:26:07 2019
 """
 from __future__ import annotations  # Enable the "hint" feature for objects
 
+import time
+_IMPORT_START = time.perf_counter()
+
 import os
 import sys
 
 import csv
+import importlib
+import io
 import argparse
-import pandas as pd
-import numpy as np
 import json
-import tkinter as tk
-import yaml
 from pathlib import Path
 
 #add dnabot module to syspath
 abs_path = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, abs_path)
 
-import dnabot_gui as gui
+# pandas, numpy, yaml, tabulate and the GUI (tkinter) are imported by the
+#   functions using them, so that command line runs not needing them, such
+#   as up-to-date runs, start fast (see --startup_time)
+import batches
+import constructs
+import instrument
+import ledger
+import manifest
 import mplates
+import ordering
+import placement
+import planning
+import runinfo
 import slots
+import sources
+import templates
+
+IMPORT_TIME = time.perf_counter() - _IMPORT_START
 
 # Constant str
-TEMPLATE_DIR_NAME = 'template_ot2_scripts'
-CLIP_TEMP_FNAME_1 = 'clip_template_APIv1.py'
-CLIP_TEMP_FNAME_2 = 'clip_template_APIv2.8.py'
-CLIP_TEMP_FNAME_3 = 'clip_template_Thermocycler_module_APIv2.8.py'
-
-MAGBEAD_TEMP_FNAME_1 = 'purification_template_APIv1.py'
-MAGBEAD_TEMP_FNAME_2 = 'purification_template_APIv2.8.py'
-
-F_ASSEMBLY_TEMP_FNAME_1 = 'assembly_template_APIv1.py'
-F_ASSEMBLY_TEMP_FNAME_2 = 'assembly_template_APIv2.8.py'
-F_ASSEMBLY_TEMP_FNAME_3 = 'assembly_template_Thermocycler_module_APIv2.8.py'
-
-TRANS_SPOT_TEMP_FNAME_1 = 'transformation_template_APIv1.py'
-TRANS_SPOT_TEMP_FNAME_2 = 'transformation_template_APIv2.8.py'
-TRANS_SPOT_TEMP_FNAME_3 = 'transformation_template_Thermocycler_module_APIv2.8.py'
-TRANS_SPOT_TEMP_FNAME_4 = 'transformation_template_Thermocycler_module_12wellplate_APIv2.8.py'
-
-CLIP_FNAME_1 = '1_clip_ot2_APIv1.py'
-CLIP_FNAME_2 = '1_clip_ot2_APIv2.8.py'
-CLIP_FNAME_3 = '1_clip_ot2_Thermocycler_APIv2.8.py'
-
-MAGBEAD_FNAME_1 = '2_purification_ot2_APIv1.py'
-MAGBEAD_FNAME_2 = '2_purification_ot2_APIv2.8.py'
-
-F_ASSEMBLY_FNAME_1 = '3_assembly_ot2_APIv1.py'
-F_ASSEMBLY_FNAME_2 = '3_assembly_ot2_APIv2.8.py'
-F_ASSEMBLY_FNAME_3 = '3_assembly_ot2_Thermocycler_APIv2.8.py'
-
-TRANS_SPOT_FNAME_1 = '4_transformation_ot2_APIv1.py'
-TRANS_SPOT_FNAME_2 = '4_transformation_ot2_APIv2.8.py'
-TRANS_SPOT_FNAME_3 = '4_transformation_ot2_Thermocycler_APIv2.8.py'
-TRANS_SPOT_FNAME_4 = '4_transformation_ot2_Thermocycler_12wellplate_APIv2.8.py'
-
-CLIPS_INFO_FNAME = 'clip_run_info.csv'
-FINAL_ASSEMBLIES_INFO_FNAME = 'final_assembly_run_info.csv'
-WELL_OUTPUT_FNAME = 'wells.txt'
-DECK_OUTPUT_FNAME = "deck.md"
-
-# Constant floats/ints
-CLIP_DEAD_VOL = 60
-CLIP_VOL = 30
-T4_BUFF_VOL = 3
-BSAI_VOL = 1
-T4_LIG_VOL = 0.5
-CLIP_MAST_WATER = 15.5
-PART_PER_CLIP = 200
-MIN_VOL = 1
-MAX_CONSTRUCTS = 96
-MAX_CLIPS = 48
-FINAL_ASSEMBLIES_PER_CLIP = 15
-DEFAULT_PART_VOL = 1
-MAX_SOURCE_PLATES = 6
-MAX_FINAL_ASSEMBLY_TIPRACKS = 7
-
-# Constant dicts for 96 and 12 well plate formats
-SPOTTING_VOLS_DICT = {2: 5, 3: 5, 4: 5, 5: 5, 6: 5, 7: 5}
-SPOTTING_VOLS_DICT_12 = {2: 40, 3: 40, 4: 40, 5: 40, 6: 40, 7: 40}
-
-# Constant lists
-SOURCE_DECK_POS = ['2', '5', '8', '7', '10', '11']
+BATCH_PLAN_FNAME = 'batch_plan.csv'
+PROFILE_FNAME = 'profile.json'
+BATCH_RUN_DIR_NAME = 'run_{:02d}'
+
+# Targets: one script variant per step, selected with --targets
+TARGETS = {
+    'APIv1': (planning.CLIP_FNAME_1, planning.MAGBEAD_FNAME_1,
+              planning.F_ASSEMBLY_FNAME_1, planning.TRANS_SPOT_FNAME_1),
+    'APIv2.8': (planning.CLIP_FNAME_2, planning.MAGBEAD_FNAME_2,
+                planning.F_ASSEMBLY_FNAME_2, planning.TRANS_SPOT_FNAME_2),
+    'Thermocycler': (planning.CLIP_FNAME_3, planning.MAGBEAD_FNAME_2,
+                     planning.F_ASSEMBLY_FNAME_3, planning.TRANS_SPOT_FNAME_3),
+    'Thermocycler_12wellplate': (
+        planning.CLIP_FNAME_3, planning.MAGBEAD_FNAME_2,
+        planning.F_ASSEMBLY_FNAME_3, planning.TRANS_SPOT_FNAME_4),
+    'APIv2.8_384': (planning.CLIP_FNAME_2, planning.MAGBEAD_FNAME_2,
+                    planning.F_ASSEMBLY_FNAME_4, planning.TRANS_SPOT_FNAME_5),
+}
+
+# Modules imported on demand, timed by --startup_time
+DEFERRED_MODULES = ['yaml', 'numpy', 'pandas', 'tabulate', 'tkinter']
 
 # Settings
 DEFAULT_SETTINGS_FILE = Path(__file__).resolve().parent / 'default_settings.yaml'
 
 
-def __cli():
+def __cli(targets=TARGETS, tip_policies=True):
     """Command line interface.
 
+    :param targets: available targets
+    :type targets: dict
+    :param tip_policies: whether CLIP templates support tip policies
+        (--clip_tip_policy option)
+    :type tip_policies: bool
     :returns: CLI arguments
     :rtype: <argparse.Namespace>
     """
@@ -104,6 +86,10 @@ def __cli():
                         help='Optional, file providing labware IDs and parameter to be used. '
                              'Default: ' + str(DEFAULT_SETTINGS_FILE) +'.',
                         default= DEFAULT_SETTINGS_FILE)
+    parser.add_argument('--startup_time',
+                        help='Optional, print the import times (ms) of the generator '
+                             'and of its deferred dependencies as JSON, then exit.',
+                        action='store_true')
     # Specific options for collecting settings from command line
     subparsers = parser.add_subparsers(help='Optional, switch to define settings from the terminal '
                                             'instead of the graphical interface. '
@@ -131,24 +117,97 @@ def __cli():
                               help="Template directory. Default: 'template_ot2_scripts' "
                                    "located next to the present script.",
                               default=None, type=str or None)
+    parser_nogui.add_argument('--batch',
+                              help="Split constructs exceeding the limits of one run "
+                                   "into several runs, each written to its own "
+                                   "'run_XX' subdirectory of the output directory.",
+                              action='store_true')
+    parser_nogui.add_argument('--template_cache_dir',
+                              help="Optional, directory caching compiled templates "
+                                   "between invocations.",
+                              default=None, type=str or None)
+    parser_nogui.add_argument('--force',
+                              help="Optional, plan the run again even if its inputs "
+                                   "are unchanged since the last run.",
+                              action='store_true')
+    parser_nogui.add_argument('--profile',
+                              help="Optional, record time and memory used by each stage "
+                                   f"and written file into '<constructs>_{PROFILE_FNAME}'.",
+                              action='store_true')
+    parser_nogui.add_argument('--assembly_plate_wells',
+                              help="Optional, number of wells of the final assembly "
+                                   "plate. With 384, up to 384 constructs are assembled, "
+                                   "quadrant by quadrant. Default: 96.",
+                              default=96, type=int, choices=list(planning.ASSEMBLY_PLATE_SCRIPTS))
+    parser_nogui.add_argument('--order_constructs',
+                              help="Optional, reorder constructs before assigning final "
+                                   "assembly wells, grouping constructs by number of parts "
+                                   "into whole columns and constructs sharing CLIP "
+                                   "reactions into neighbouring wells. The well mapping is "
+                                   f"written to '<constructs>_{planning.CONSTRUCT_ORDER_FNAME}'.",
+                              action='store_true')
+    parser_nogui.add_argument('--assign_slots',
+                              help="Optional, place the source plates, tip racks and tube "
+                                   "rack of the CLIP scripts on the deck slots minimising the "
+                                   "expected pipette travel, instead of the template slots.",
+                              action='store_true')
+    if tip_policies:
+        parser_nogui.add_argument('--clip_tip_policy',
+                                  help="Optional, tip policy of the CLIP water and linker "
+                                       "transfers. 'always': a new tip per transfer; "
+                                       "'aspiration': transfers grouped by source well, one "
+                                       "aspiration multi-dispensed into several wells with a "
+                                       "new tip each; 'source': one tip per source well. The "
+                                       "tips and time saved are reported. Only the APIv2.8 "
+                                       "CLIP script supports it, the Thermocycler script "
+                                       "takes a new tip per transfer. Default: always.",
+                                  default='always', choices=placement.TIP_POLICIES)
+    parser_nogui.add_argument('--run_table_format',
+                              help="Optional, format of the transfer table written next "
+                                   f"to the run record, '<constructs>_{planning.RUN_TABLE_FNAME}"
+                                   ".<format>'. Parquet requires pyarrow. Default: csv.",
+                              default='csv', choices=runinfo.TABLE_FORMATS)
+    parser_nogui.add_argument('--select_sources',
+                              help="Optional, consider the source files (or directories "
+                                   "of source files) as a registry of plates, and only "
+                                   "place on the deck the fewest plates providing the "
+                                   "parts and linkers of the constructs.",
+                              action='store_true')
+    parser_nogui.add_argument('--targets',
+                              help="Optional, only write the scripts of these targets. "
+                                   "Default: all scripts.",
+                              nargs='+', choices=list(targets), default=None)
+    # Render scripts from a plan written by a previous run
+    parser_render = subparsers.add_parser('render')
+    parser_render.add_argument('--plan_file',
+                               help=f"'{planning.PLAN_FNAME}' file from the metainformation "
+                                    "directory of a previous run.",
+                               required=True)
+    parser_render.add_argument('--targets',
+                               help="Targets to render. Default: all scripts.",
+                               nargs='+', choices=list(targets), default=None)
     # Makes life easier to decide if we should switch to GUI or not
-    parser.set_defaults(nogui=False)
-    parser_nogui.set_defaults(nogui=True)
+    parser.set_defaults(nogui=False, render=False)
+    parser_nogui.set_defaults(nogui=True, clip_tip_policy='always')
+    parser_render.set_defaults(render=True)
     return parser.parse_args()
 
 
 def __get_settings_from_file(file_path: str) -> None:
+    import yaml
     with open(file_path) as ifh:
         return yaml.safe_load(ifh)
 
 
-def __info_from_gui(user_settings: dict) -> dict:
+def __info_from_gui(user_settings: dict, gui_module='dnabot_gui') -> dict:
     """Pop GUI to collect user inputs
 
     Parameters
     ----------
     settings : dict
         default labware and parameter settings
+    gui_module : module or str
+        module, or name of the module, providing the GUI class
 
     Returns
     -------
@@ -166,9 +225,12 @@ def __info_from_gui(user_settings: dict) -> dict:
 
     # Obtain user input
     print("Requesting user input, if not visible checked minimized windows.")
+    import tkinter as tk
+    if isinstance(gui_module, str):
+        gui_module = importlib.import_module(gui_module)
     # Collect info
     root = tk.Tk() 
-    gui_inst = gui.GUI(root, user_settings)
+    gui_inst = gui_module.GUI(root, user_settings)
     root.destroy()
     # User asked to quit?
     if gui_inst.quit_status:
@@ -179,10 +241,43 @@ def __info_from_gui(user_settings: dict) -> dict:
     return user_settings
 
 
-def main():
-    
+def main(gui_module='dnabot_gui', scripts=None, deck_scripts=None, targets=None,
+         tip_policies=True):
+    """Collects settings from the command line or the GUI, then generates
+    the run(s).
+
+    Args:
+        gui_module (module or str): module, or name of the module, providing
+            the GUI class.
+        scripts (list): OT-2 scripts to render, default
+            planning.OT2_SCRIPTS.
+        deck_scripts (list): deck reports to write, default
+            planning.DECK_SCRIPTS.
+        targets (dict): targets selectable from the command line, default
+            TARGETS.
+        tip_policies (bool): whether CLIP templates of scripts support tip
+            policies, offering the --clip_tip_policy option.
+
+    """
+    if targets is None:
+        targets = TARGETS
+
     # Parse args if any
-    args = __cli()
+    args = __cli(targets, tip_policies)
+
+    if args.startup_time:
+        print(json.dumps({name: round(seconds * 1000, 3)
+                          if seconds is not None else None
+                          for name, seconds in measure_startup_time().items()},
+                         indent=1))
+        return
+
+    if args.render:
+        planning.render_plan(args.plan_file,
+                             selected=select_targets(targets, args.targets),
+                             scripts=scripts, deck_scripts=deck_scripts)
+        print('BOT-2 generator successfully completed!')
+        return
 
     # Settings on labwares
     user_settings = __get_settings_from_file(args.default_settings_file)
@@ -190,21 +285,36 @@ def main():
     if args.nogui:
         etoh_well = args.etoh_well
         soc_column = args.soc_column
-        labware_settings = user_settings['labwares']
-        parameter_settings = user_settings['parameters']
+        settings = {
+            'labwares': user_settings['labwares'],
+            'parameters': user_settings['parameters']
+        }
         construct_path = os.path.abspath(args.construct_path)
-        sources_paths = [os.path.abspath(path) for path in args.source_paths]
+        sources_paths = planning.expand_sources_paths(args.source_paths)
         template_dir = os.path.abspath(args.template_dir) if args.template_dir else None
         if args.output_dir is not None:
             output_dir = args.output_dir
         else:
             output_dir = os.path.dirname(construct_path)
+        batch = args.batch
+        template_cache_dir = args.template_cache_dir
+        selected = select_targets(targets, args.targets)
+        force = args.force
+        profile = args.profile
+        select_sources = args.select_sources
+        assembly_plate_wells = args.assembly_plate_wells
+        order_constructs = args.order_constructs
+        assign_slots = args.assign_slots
+        clip_tip_policy = args.clip_tip_policy
+        run_table_format = args.run_table_format
     else:
-        user_inputs = __info_from_gui(user_settings)
+        user_inputs = __info_from_gui(user_settings, gui_module)
         etoh_well = user_inputs['etoh_well']
         soc_column = user_inputs['soc_column']
-        labware_settings = user_inputs['labwares']  # update labwares IDs
-        parameter_settings = user_inputs['parameters']  # update parameters
+        settings = {
+            'labwares': user_inputs['labwares'],  # update labwares IDs
+            'parameters': user_inputs['parameters']  # update parameters
+        }
         construct_path = user_inputs['construct_path']
         if construct_path is None:
             print('No file provided for constructs. Exit.')
@@ -215,575 +325,306 @@ def main():
             sys.exit()
         output_dir = os.path.dirname(construct_path)
         template_dir = None
-
-    # Args checking
-    if len(sources_paths) > len(SOURCE_DECK_POS):
-        raise ValueError('Number of source plates exceeds deck positions.')
-
-    # Path to template directory
-    if template_dir is not None:
-        # Just to comment this case: only way to fall here is that the variable
-        # has been set throught the command line arguments, nothing to do.
-        template_dir_path = template_dir
-        pass
-    elif __name__ == '__main__':
-        # Alternatively, try to automatically deduce the path relatively to the main script path
-        script_path = os.path.abspath(__file__)
-        template_dir_path = os.path.abspath(os.path.join(script_path, '..', TEMPLATE_DIR_NAME))
-    else:
-        # Fallback
-        generator_dir = os.getcwd()
-        template_dir_path = os.path.abspath(os.path.join(generator_dir, TEMPLATE_DIR_NAME))
-
-    # Dealing with output dir
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    os.chdir(output_dir)
-
-    # Prefix name
-    construct_base = os.path.basename(construct_path)
-    construct_base = os.path.splitext(construct_base)[0]
+        batch = False
+        template_cache_dir = None
+        selected = None
+        force = False
+        profile = False
+        select_sources = False
+        assembly_plate_wells = 96
+        order_constructs = False
+        assign_slots = False
+        clip_tip_policy = 'always'
+        run_table_format = 'csv'
     print('User input successfully collected.')
 
-    # Process input csv files
-    print('Processing input csv files...')
-    constructs_list = generate_constructs_list(construct_path)
-    clips_df = generate_clips_df(constructs_list)
-    sources_dict = generate_sources_dict(sources_paths)
-
-    # Calculate OT2 script variables
-    print('Calculating OT-2 variables...')
-    clips_dict = generate_clips_dict(
-        clips_df,
-        sources_dict
-        )
-    magbead_sample_number = clips_df['number'].sum()
-    final_assembly_dict = generate_final_assembly_dict(
-        constructs_list,
-        clips_df
-        )
-    final_assembly_tipracks = calculate_final_assembly_tipracks(
-        final_assembly_dict
-        )
-    spotting_tuples = generate_spotting_tuples(
-        constructs_list,
-        SPOTTING_VOLS_DICT
-        )
-    spotting_tuples_12 = generate_spotting_tuples_12(
-        constructs_list,
-        SPOTTING_VOLS_DICT_12
-        )
-
-    print('Writing files...')
-    # Write OT2 scripts
-    generate_ot2_script(
-        CLIP_FNAME_1,
-        os.path.join(template_dir_path, CLIP_TEMP_FNAME_1),
-        clips_dict=clips_dict)
-    generate_ot2_script(
-        CLIP_FNAME_2,
-        os.path.join(template_dir_path, CLIP_TEMP_FNAME_2),
-        clips_dict=clips_dict,
-        __LABWARES=labware_settings)
-    generate_ot2_script(
-        CLIP_FNAME_3,
-        os.path.join(template_dir_path, CLIP_TEMP_FNAME_3),
-        clips_dict=clips_dict,
-        __LABWARES=labware_settings,
-        __PARAMETERS=parameter_settings)
-       
-    generate_ot2_script(
-        MAGBEAD_FNAME_1,
-        os.path.join(template_dir_path, MAGBEAD_TEMP_FNAME_1),
-        sample_number=magbead_sample_number,
-        ethanol_well=etoh_well)
-    generate_ot2_script(
-        MAGBEAD_FNAME_2,
-        os.path.join(template_dir_path, MAGBEAD_TEMP_FNAME_2),
-        sample_number=magbead_sample_number,
-        ethanol_well=etoh_well,
-        __LABWARES=labware_settings,
-        __PARAMETERS=parameter_settings)
-    
-    generate_ot2_script(
-        F_ASSEMBLY_FNAME_1,
-        os.path.join(template_dir_path, F_ASSEMBLY_TEMP_FNAME_1),
-        final_assembly_dict=final_assembly_dict,
-        tiprack_num=final_assembly_tipracks)
-    generate_ot2_script(
-        F_ASSEMBLY_FNAME_2,
-        os.path.join(template_dir_path, F_ASSEMBLY_TEMP_FNAME_2),
-        final_assembly_dict=final_assembly_dict,
-        tiprack_num=final_assembly_tipracks,
-        __LABWARES=labware_settings)
-    generate_ot2_script(
-        F_ASSEMBLY_FNAME_3,
-        os.path.join(template_dir_path, F_ASSEMBLY_TEMP_FNAME_3),
-        final_assembly_dict=final_assembly_dict,
-        tiprack_num=final_assembly_tipracks,
-        __LABWARES=labware_settings)
-    
-    generate_ot2_script(
-        TRANS_SPOT_FNAME_1,
-        os.path.join(template_dir_path, TRANS_SPOT_TEMP_FNAME_1),
-        spotting_tuples=spotting_tuples,
-        soc_well=f"A{soc_column}")
-    generate_ot2_script(
-        TRANS_SPOT_FNAME_2,
-        os.path.join(template_dir_path, TRANS_SPOT_TEMP_FNAME_2),
-        spotting_tuples=spotting_tuples,
-        soc_well=f"A{soc_column}",
-        __LABWARES=labware_settings,
-        __PARAMETERS=parameter_settings)
-    generate_ot2_script(
-        TRANS_SPOT_FNAME_3,
-        os.path.join(template_dir_path, TRANS_SPOT_TEMP_FNAME_3),
-        spotting_tuples=spotting_tuples,
-        soc_well=f"A{soc_column}",
-        __LABWARES=labware_settings,
-        __PARAMETERS=parameter_settings)
-    generate_ot2_script(
-        TRANS_SPOT_FNAME_4,
-        os.path.join(template_dir_path, TRANS_SPOT_TEMP_FNAME_4),
-        spotting_tuples=spotting_tuples_12,
-        soc_well=f"A{soc_column}",
-        __LABWARES=labware_settings,
-        __PARAMETERS=parameter_settings)
-
-    # Write non-OT2 scripts
-    metainfo_dir = Path().resolve() / "metainformation"
-    metainfo_dir.mkdir(exist_ok=True)
-    master_mix_df = generate_master_mix_df(clips_df['number'].sum())
-    sources_paths_df = generate_sources_paths_df(sources_paths, SOURCE_DECK_POS)
-    dfs_to_csv(
-        metainfo_dir / f"{construct_base}_{CLIPS_INFO_FNAME}",
-        index=False,
-        MASTER_MIX=master_mix_df,
-        SOURCE_PLATES=sources_paths_df,
-        CLIP_REACTIONS=clips_df
-        )
-    with open(metainfo_dir / f"{construct_base}_{FINAL_ASSEMBLIES_INFO_FNAME}", "w", newline='') as csvfile:
-        csvwriter = csv.writer(csvfile)
-        for final_assembly_well, construct_clips in final_assembly_dict.items():
-            csvwriter.writerow([final_assembly_well, construct_clips])
-    with open(metainfo_dir / f"{construct_base}_{WELL_OUTPUT_FNAME}", "w") as f:
-        f.write('Magbead ethanol well: {}'.format(etoh_well))
-        f.write('\n')
-        f.write('SOC column: {}'.format(soc_column))
-
-    # Write deck position info
-    with open(metainfo_dir / f"{construct_base}_{DECK_OUTPUT_FNAME}", "w") as ofh:
-        for fname in (CLIP_FNAME_2, CLIP_FNAME_3):
-            deck = slots.get_positions_from_clip(fname)
-            s = slots.format_deck_info(deck, section = f"Clip reaction script: {fname}")
-            ofh.write(s)
-        for fname in (MAGBEAD_FNAME_2,):
-            deck = slots.get_positions_from_purif(fname)
-            s = slots.format_deck_info(deck, section = f"Purification script: {fname}")
-            ofh.write(s)
-        for fname in (F_ASSEMBLY_FNAME_2, F_ASSEMBLY_FNAME_3):
-            deck = slots.get_positions_from_assembly(fname)
-            s = slots.format_deck_info(deck, section = f"Assembly script: {fname}")
-            ofh.write(s)
-        for fname in (TRANS_SPOT_FNAME_2, TRANS_SPOT_FNAME_3, TRANS_SPOT_FNAME_4):
-            deck = slots.get_positions_from_transfo(fname)
-            s = slots.format_deck_info(deck, section = f"Transformation script: {fname}")
-            ofh.write(s)
+    generate = generate_batch if batch else generate_run
+    generate(construct_path, sources_paths, output_dir, settings,
+             etoh_well=etoh_well, soc_column=soc_column,
+             template_dir=template_dir, scripts=scripts,
+             deck_scripts=deck_scripts, template_cache_dir=template_cache_dir,
+             selected=selected, force=force, profile=profile,
+             select_sources=select_sources,
+             assembly_plate_wells=assembly_plate_wells,
+             order_constructs=order_constructs, assign_slots=assign_slots,
+             clip_tip_policy=clip_tip_policy, run_table_format=run_table_format)
     print('BOT-2 generator successfully completed!')
 
 
-def generate_constructs_list(path):
-    """Generates a list of dataframes corresponding to each construct. Each
-    dataframe lists components of the CLIP reactions required.
-
-    """
-
-    def process_construct(construct):
-        """Processes an individual construct into a dataframe of CLIP reactions
-        outlining prefix linkers, parts and suffix linkers.
-
-        """
-
-        def interogate_linker(linker):
-            """Interrogates linker to determine if the suffix linker is a UTR
-            linker.
-
-            """
-            if linker.startswith('U'):
-                return linker.split('-')[0] + '-S'
-            else:
-                return linker + "-S"
-
-        clips_info = {
-            'prefixes': [],
-            'parts': [],
-            'suffixes': []
-            }
-        for i, sequence in enumerate(construct):
-            if i % 2 != 0:
-                clips_info['parts'].append(sequence)
-                clips_info['prefixes'].append(
-                    construct[i - 1] + '-P')
-                if i == len(construct) - 1:
-                    suffix_linker = interogate_linker(construct[0])
-                    clips_info['suffixes'].append(suffix_linker)
-                else:
-                    suffix_linker = interogate_linker(construct[i + 1])
-                    clips_info['suffixes'].append(suffix_linker)
-        return pd.DataFrame.from_dict(clips_info)
-
-    constructs_list = []
-    with open(path, 'r') as csvfile:
-        csv_reader = csv.reader(csvfile)
-        for index, construct in enumerate(csv_reader):
-            if index != 0:  # Checks if row is header.
-                construct = list(filter(None, construct))
-                if not construct[1:]:
-                    break
-                else:
-                    constructs_list.append(process_construct(construct[1:]))
-
-    # Errors
-    if len(constructs_list) > MAX_CONSTRUCTS:
-        raise ValueError(
-            'Number of constructs exceeds maximum. Reduce construct number in construct.csv.')
-    else:
-        return constructs_list
-
-
-def generate_clips_df(constructs_list):
-    """Generates a dataframe containing information about all the unique CLIP
-    reactions required to synthesise the constructs in constructs_list.
+def measure_startup_time(modules=None):
+    """Returns import times in seconds, first of dnabot_app itself, then of
+    each deferred module (default DEFERRED_MODULES) in turn, None for missing
+    modules. Times are incremental: a module already imported by a previous
+    one, or earlier in the process, costs nothing.
 
     """
-    merged_construct_dfs = pd.concat(constructs_list, ignore_index=True)
-    unique_clips_df = merged_construct_dfs.drop_duplicates()
-    unique_clips_df = unique_clips_df.reset_index(drop=True)
-    clips_df = unique_clips_df.copy()
-
-    # Error
-    if len(unique_clips_df.index) > MAX_CLIPS:
-        raise ValueError(
-            'Number of CLIP reactions exceeds 48. Reduce number of constructs in construct.csv.')
-
-    # Count number of each CLIP reaction
-    clip_count = np.zeros(len(clips_df.index))
-    for i, unique_clip in unique_clips_df.iterrows():
-        for _, clip in merged_construct_dfs.iterrows():
-            if unique_clip.equals(clip):
-                clip_count[i] = clip_count[i] + 1
-    clip_count = clip_count // FINAL_ASSEMBLIES_PER_CLIP + 1
-    clips_df['number'] = [int(i) for i in clip_count.tolist()]
-
-    # Associate well/s for each CLIP reaction
-    clips_df['mag_well'] = pd.Series(['0'] * len(clips_df.index),
-                                     index=clips_df.index)
-    for index, number in clips_df['number'].items():
-        if index == 0:
-            mag_wells = []
-            for x in range(number):
-                mag_wells.append(mplates.final_well(x + 1 + 48))
-            clips_df.at[index, 'mag_well'] = tuple(mag_wells)
+    if modules is None:
+        modules = DEFERRED_MODULES
+    times = {'dnabot_app': IMPORT_TIME}
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            times[name] = None
         else:
-            mag_wells = []
-            for x in range(number):
-                well_count = clips_df.loc[
-                    :index - 1, 'number'].sum() + x + 1 + 48
-                mag_wells.append(mplates.final_well(well_count))
-            clips_df.at[index, 'mag_well'] = tuple(mag_wells)
-    return clips_df
-
+            times[name] = time.perf_counter() - start
+    return times
 
-def generate_sources_dict(paths):
-    """Imports csvs files containing a series of parts/linkers with
-    corresponding information into a dictionary where the key corresponds with
-    part/linker and the value contains a tuple of corresponding information.
 
-    Args:
-        paths (list): list of strings each corresponding to a path for a
-                      sources csv file.
+def select_targets(targets, names):
+    """Returns the script file names of the targets listed in names, or None
+    (all scripts) if names is None.
 
     """
-    sources_dict = {}
-    for deck_index, path in enumerate(paths):
-        with open(path, 'r') as csvfile:
-            csv_reader = csv.reader(csvfile)
-            for index, source in enumerate(csv_reader):
-                if index != 0:
-                    csv_values = source[1:]
-                    csv_values.append(SOURCE_DECK_POS[deck_index])
-                    sources_dict[str(source[0])] = tuple(csv_values)
-    return sources_dict
-
-
-def generate_clips_dict(clips_df, sources_dict):
-    """Using clips_df and sources_dict, returns a clips_dict which acts as the
-    sole variable for the opentrons script "clip.ot2.py".
-
-    """
-    max_part_vol = CLIP_VOL - (T4_BUFF_VOL + BSAI_VOL + T4_LIG_VOL
-                               + CLIP_MAST_WATER + 2)
-    clips_dict = {'prefixes_wells': [], 'prefixes_plates': [],
-                  'suffixes_wells': [], 'suffixes_plates': [],
-                  'parts_wells': [], 'parts_plates': [], 'parts_vols': [],
-                  'water_vols': []}
-
-    # Generate clips_dict from args
-    try:
-        for _, clip_info in clips_df.iterrows():
-            prefix_linker = clip_info['prefixes']
-            clips_dict['prefixes_wells'].append([sources_dict[prefix_linker][0]]
-                                                * clip_info['number'])
-            clips_dict['prefixes_plates'].append(
-                [handle_2_columns(sources_dict[prefix_linker])[2]] * clip_info['number'])
-            suffix_linker = clip_info['suffixes']
-            clips_dict['suffixes_wells'].append([sources_dict[suffix_linker][0]]
-                                                * clip_info['number'])
-            clips_dict['suffixes_plates'].append(
-                [handle_2_columns(sources_dict[suffix_linker])[2]] * clip_info['number'])
-            part = clip_info['parts']
-            clips_dict['parts_wells'].append([sources_dict[part][0]]
-                                             * clip_info['number'])
-            clips_dict['parts_plates'].append([handle_2_columns(sources_dict[part])[2]]
-                                              * clip_info['number'])
-            if not sources_dict[part][1]:
-                clips_dict['parts_vols'].append([DEFAULT_PART_VOL] *
-                                                clip_info['number'])
-                clips_dict['water_vols'].append([max_part_vol - DEFAULT_PART_VOL]
-                                                * clip_info['number'])
-            else:
-                part_vol = round(
-                    PART_PER_CLIP / float(sources_dict[part][1]), 1)
-                if part_vol < MIN_VOL:
-                    part_vol = MIN_VOL
-                elif part_vol > max_part_vol:
-                    part_vol = max_part_vol
-                water_vol = max_part_vol - part_vol
-                clips_dict['parts_vols'].append(
-                    [part_vol] * clip_info['number'])
-                clips_dict['water_vols'].append(
-                    [water_vol] * clip_info['number'])
-    except KeyError:
-        sys.exit('likely part/linker not listed in sources.csv')
-    for key, value in clips_dict.items():
-        clips_dict[key] = [item for sublist in value for item in sublist]
-    return clips_dict
-
-
-def generate_final_assembly_dict(constructs_list, clips_df):
-    """Using constructs_list and clips_df, returns a dictionary of final
-    assemblies with keys defining destination plate well positions and values
-    indicating which clip reaction wells are used.
-
-    """
-    final_assembly_dict = {}
-    clips_count = np.zeros(len(clips_df.index))
-    for construct_index, construct_df in enumerate(constructs_list):
-        construct_well_list = []
-        for _, clip in construct_df.iterrows():
-            clip_info = clips_df[(clips_df['prefixes'] == clip['prefixes']) &
-                                 (clips_df['parts'] == clip['parts']) &
-                                 (clips_df['suffixes'] == clip['suffixes'])]
-            clip_wells = clip_info.at[clip_info.index[0], 'mag_well']
-            clip_num = int(clip_info.index[0])
-            clip_well = clip_wells[int(clips_count[clip_num] //
-                                       FINAL_ASSEMBLIES_PER_CLIP)]
-            clips_count[clip_num] = clips_count[clip_num] + 1
-            construct_well_list.append(clip_well)
-        final_assembly_dict[mplates.final_well(
-            construct_index + 1)] = construct_well_list
-    return final_assembly_dict
-
-
-def calculate_final_assembly_tipracks(final_assembly_dict):
-    """Calculates the number of final assembly tipracks required ensuring
-    no more than MAX_FINAL_ASSEMBLY_TIPRACKS are used.
-
-    """
-    final_assembly_lens = []
-    for values in final_assembly_dict.values():
-        final_assembly_lens.append(len(values))
-    master_mix_tips = len(list(set(final_assembly_lens)))
-    total_tips = master_mix_tips + sum(final_assembly_lens)
-    final_assembly_tipracks = total_tips // 96 + (
-        1 if total_tips % 96 > 0 else 0)
-    if final_assembly_tipracks > MAX_FINAL_ASSEMBLY_TIPRACKS:
-        raise ValueError(
-            'Final assembly tiprack number exceeds number of slots. Reduce number of constructs in constructs.csv')
-    else:
-        return final_assembly_tipracks
-
-
-def generate_spotting_tuples(constructs_list, spotting_vols_dict):
-    """Using constructs_list, generates a spotting tuple
-    (Refer to 'transformation_spotting_template.py') for every column of
-    constructs, assuming the 1st construct is located in well A1 and wells
-    increase linearly. Target wells locations are equivalent to construct well
-    locations and spotting volumes are defined by spotting_vols_dict.
+    if names is None:
+        return None
+    selected = []
+    for name in names:
+        for fname in targets[name]:
+            if fname not in selected:
+                selected.append(fname)
+    return selected
+
+
+def generate_batch(construct_path, sources_paths, output_dir, settings,
+                   **kwargs):
+    """Partitions the constructs of construct_path into the fewest robot
+    runs respecting per-run limits (see batches.partition_constructs), then
+    generates each run into its own subdirectory of output_dir. A summary of
+    the runs is written to output_dir.
 
     Args:
-        spotting_vols_dict (dict): Part number defined by keys, spottting
-            volumes defined by corresponding value.
+        kwargs: passed to generate_run.
 
     """
-    # Calculate wells and volumes
-    wells = [mplates.final_well(x + 1) for x in range(len(constructs_list))]
-    vols = [SPOTTING_VOLS_DICT[len(construct_df.index)]
-            for construct_df in constructs_list]
-
-    # Package spotting tuples
-    spotting_tuple_num = len(constructs_list)//8 + (1
-                                                    if len(constructs_list) % 8 > 0 else 0)
-    spotting_tuples = []
-    for x in range(spotting_tuple_num):
-        if x == spotting_tuple_num - 1:
-            tuple_wells = tuple(wells[8*x:])
-            tuple_vols = tuple(vols[8*x:])
-        else:
-            tuple_wells = tuple(wells[8*x:8*x + 8])
-            tuple_vols = tuple(vols[8*x:8*x + 8])
-        spotting_tuples.append((tuple_wells, tuple_wells, tuple_vols))
-    return spotting_tuples
-
-# Introduced 12 well plate format for spotting
-def generate_spotting_tuples_12(constructs_list, spotting_vols_dict):
-    """Using constructs_list, generates a spotting tuple
-    (Refer to 'transformation_spotting_template.py') for every column of
-    constructs, assuming the 1st construct is located in well A1 and wells
-    increase linearly. Target wells locations are equivalent to construct well
-    locations and spotting volumes are defined by spotting_vols_dict.
+    import pandas as pd
+    output_dir = os.path.abspath(output_dir)
+    construct_base = os.path.splitext(os.path.basename(construct_path))[0]
+
+    print('Planning runs...')
+    header, construct_rows = planning.read_constructs_csv(construct_path)
+    # Check the whole library before generating any run
+    library = planning.load_constructs(
+        construct_rows,
+        planning.generate_sources_index(
+            sources_paths, range(len(sources_paths))),
+        max_constructs=None)
+    constructs_clips = [construct.clips for construct in library]
+    limits = {
+        'constructs': planning.MAX_CONSTRUCTS,
+        'clips': planning.MAX_CLIPS,
+        'clip_reactions': planning.MAX_MAGBEAD_SAMPLES,
+        'final_assembly_tips': planning.MAX_FINAL_ASSEMBLY_TIPRACKS * 96
+    }
+    if kwargs.get('assembly_plate_wells', 96) == 384:
+        # Tip racks are refilled during 384 well final assemblies
+        limits.update(constructs=planning.MAX_CONSTRUCTS_384,
+                      final_assembly_tips=float('inf'))
+    runs = batches.partition_constructs(
+        constructs_clips, limits, planning.assemblies_per_clip())
+    print(f'{len(construct_rows)} constructs split into {len(runs)} runs.')
+
+    os.makedirs(output_dir, exist_ok=True)
+    batch_plan = {'Run': [], 'Constructs': [], 'CLIP reactions': [],
+                  'Construct names': []}
+    for run_index, construct_indexes in enumerate(runs, start=1):
+        run_name = BATCH_RUN_DIR_NAME.format(run_index)
+        run_dir = os.path.join(output_dir, run_name)
+        os.makedirs(run_dir, exist_ok=True)
+        run_construct_path = os.path.join(
+            run_dir, f'{construct_base}_{run_name}.csv')
+        run_csv = io.StringIO()
+        csvwriter = csv.writer(run_csv)
+        csvwriter.writerow(header)
+        batch_run = batches.BatchRun(planning.assemblies_per_clip())
+        for construct_index in construct_indexes:
+            csvwriter.writerow(construct_rows[construct_index])
+            batch_run.add(construct_index, constructs_clips[construct_index])
+        planning.write_file(
+            run_construct_path, run_csv.getvalue(), newline='')
+        print(f'Generating {run_name}...')
+        generate_run(run_construct_path, sources_paths, run_dir, settings,
+                     **kwargs)
+        batch_plan['Run'].append(run_name)
+        batch_plan['Constructs'].append(len(construct_indexes))
+        batch_plan['CLIP reactions'].append(batch_run.clip_reactions)
+        batch_plan['Construct names'].append(' '.join(
+            construct_rows[construct_index][0]
+            for construct_index in construct_indexes))
+    planning.write_file(
+        os.path.join(output_dir, f'{construct_base}_{BATCH_PLAN_FNAME}'),
+        pd.DataFrame(batch_plan).to_csv(index=False), newline='')
+
+
+def generate_run(construct_path, sources_paths, output_dir, settings,
+                 etoh_well='A11', soc_column=1, template_dir=None,
+                 scripts=None, template_cache_dir=None, selected=None,
+                 deck_scripts=None, force=False, profile=False,
+                 select_sources=False, assembly_plate_wells=96,
+                 order_constructs=False, assign_slots=False,
+                 clip_tip_policy='always', run_table_format='csv'):
+    """Plans a single robot run and writes its OT-2 scripts and
+    metainformation into output_dir.
+
+    Generation is incremental: fingerprints of the inputs, templates and
+    written files are recorded in a manifest (planning.MANIFEST_FNAME). When
+    the constructs, sources, settings and generator are unchanged, planning is
+    skipped and only the scripts whose template changed, or files deleted or
+    edited since the last run, are written again from the persisted plan.
+    Files whose content is unchanged keep their timestamps.
 
     Args:
-        spotting_vols_dict (dict): Part number defined by keys, spottting
-            volumes defined by corresponding value.
+        deck_scripts (list): deck reports to write, default
+            planning.DECK_SCRIPTS.
+        force (bool): ignore the manifest and plan the run again.
+        profile (bool): record the wall time, CPU time and peak memory of
+            each stage and written file (see instrument) into PROFILE_FNAME,
+            next to the metainformation directory.
+        run_table_format (str): format of the transfer table written next
+            to the run record (runinfo.TABLE_FORMATS).
+        other args: as in planning.plan.
+
+    Returns:
+        dict: the plan, or None if planning was skipped.
 
     """
-    # Calculate wells and volumes
-    wells = [mplates.final_well(x + 1) for x in range(len(constructs_list))]
-    vols = [SPOTTING_VOLS_DICT_12[len(construct_df.index)]
-            for construct_df in constructs_list]
-
-    spot_wells = [mplates.final_12wellplate(x + 1) for x in range(len(constructs_list))]
-
-    # Package spotting tuples
-    spotting_tuple_num = len(constructs_list)//12 + (1
-                                                    if len(constructs_list) % 12 > 0 else 0)
-    spotting_tuples_12 = []
-
-    for x in range(spotting_tuple_num): 
-        if x == spotting_tuple_num - 1:
-            tuple_wells = tuple(wells[12*x:])
-            tuple_vols = tuple(vols[12*x:])
-            tuple_spot_wells = tuple(spot_wells[12*x:])
-        else:
-            tuple_wells = tuple(wells[12*x:12*x + 12])
-            tuple_vols = tuple(vols[12*x:12*x + 12])
-            tuple_spot_wells = tuple(spot_wells[12*x:12*x + 12])
-        spotting_tuples_12.append((tuple_wells, tuple_spot_wells, tuple_vols))
-    return spotting_tuples_12
-
-
-def generate_ot2_script(ot2_script_path, template_path, **kwargs):
-    """Generates an ot2 script named 'ot2_script_path', where kwargs are
-    written as global variables at the top of the script. For each kwarg, the
-    keyword defines the variable name while the value defines the name of the
-    variable. The remainder of template file is subsequently written below.
-
-    """
-    with open(ot2_script_path, 'w') as wf:
-        with open(template_path, 'r') as rf:
-            for index, line in enumerate(rf):
-                if line[:3] == 'def':
-                    function_start = index
-                    break
-                else:
-                    wf.write(line)
-            for key, value in kwargs.items():
-                wf.write('{}='.format(key))
-                if type(value) == dict:
-                    wf.write(json.dumps(value))
-                elif type(value) == str:
-                    wf.write("'{}'".format(value))
-                else:
-                    wf.write(str(value))
-                wf.write('\n')
-            wf.write('\n')
-        with open(template_path, 'r') as rf:
-            for index, line in enumerate(rf):
-                if index >= function_start - 1:
-                    wf.write(line)
-
-
-def generate_master_mix_df(clip_number):
-    """Generates a dataframe detailing the components required in the clip
-    reaction master mix.
-
-    """
-    COMPONENTS = {'Component': ['Promega T4 DNA Ligase buffer, 10X',
-                                'Water', 'NEB BsaI-HFv2',
-                                'Promega T4 DNA Ligase']}
-    VOL_COLUMN = 'Volume (uL)'
-    master_mix_df = pd.DataFrame.from_dict(COMPONENTS)
-    master_mix_df[VOL_COLUMN] = (clip_number + CLIP_DEAD_VOL/CLIP_VOL) * \
-        np.array([T4_BUFF_VOL,
-                  CLIP_MAST_WATER,
-                  BSAI_VOL,
-                  T4_LIG_VOL])
-    return master_mix_df
-
-
-def generate_sources_paths_df(paths, deck_positions):
-    """Generates a dataframe detailing source plate information.
-
-    Args:
-        paths (list): list of strings specifying paths to source plates.
-        deck_positions (list): list of strings specifying candidate deck positions.
+    construct_base = os.path.basename(construct_path)
+    construct_base = os.path.splitext(construct_base)[0]
+    recorder = instrument.enable() if profile else None
+    try:
+        with instrument.stage('run', construct_base=construct_base):
+            return __generate_run(
+                construct_path, sources_paths, output_dir, settings,
+                etoh_well, soc_column, template_dir, scripts,
+                template_cache_dir, selected, deck_scripts, force,
+                select_sources, assembly_plate_wells, order_constructs,
+                assign_slots, clip_tip_policy, run_table_format)
+    finally:
+        if recorder is not None:
+            instrument.disable()
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+            profile_path = Path(output_dir) / f"{construct_base}_{PROFILE_FNAME}"
+            instrument.write_report(profile_path, recorder)
+            print(f'Profile written to {profile_path}')
+
+
+def __generate_run(construct_path, sources_paths, output_dir, settings,
+                   etoh_well, soc_column, template_dir, scripts,
+                   template_cache_dir, selected, deck_scripts, force,
+                   select_sources, assembly_plate_wells, order_constructs,
+                   assign_slots, clip_tip_policy, run_table_format):
+    """See generate_run."""
+    # Fails before planning rather than once scripts are written
+    runinfo.check_table_format(run_table_format)
+    if template_dir is None:
+        template_dir = os.path.join(abs_path, planning.TEMPLATE_DIR_NAME)
+    if scripts is None:
+        scripts = planning.ASSEMBLY_PLATE_SCRIPTS[assembly_plate_wells]
+    if deck_scripts is None:
+        deck_scripts = planning.DECK_SCRIPTS
+    construct_base = os.path.basename(construct_path)
+    construct_base = os.path.splitext(construct_base)[0]
+    output_dir = Path(output_dir)
+    metainfo_dir = output_dir / "metainformation"
+    manifest_path = \
+        metainfo_dir / f"{construct_base}_{planning.MANIFEST_FNAME}"
+
+    with instrument.stage('fingerprints'):
+        fnames = [fname for fname, _, _ in scripts
+                  if selected is None or fname in selected]
+        inputs = {
+            'generator': generator_fingerprint(),
+            'constructs': manifest.fingerprint_file(construct_path),
+            'sources': [[str(path), manifest.fingerprint_file(path)]
+                        for path in sources_paths],
+            'settings': manifest.fingerprint_data(settings),
+            'options': manifest.fingerprint_data({
+                'etoh_well': etoh_well,
+                'soc_column': soc_column,
+                'select_sources': select_sources,
+                'assembly_plate_wells': assembly_plate_wells,
+                'order_constructs': order_constructs,
+                'assign_slots': assign_slots,
+                'clip_tip_policy': clip_tip_policy,
+                'run_table_format': run_table_format,
+                'template_dir': str(template_dir),
+                'scripts': scripts,
+                'deck_scripts': [[section, deck_fnames]
+                                 for _, section, deck_fnames in deck_scripts],
+                'rendered': fnames
+                })
+        }
+        template_fingerprints = {
+            fname: manifest.fingerprint_file(
+                os.path.join(template_dir, template_fname))
+            for fname, template_fname, _ in scripts if fname in fnames}
+
+    previous = None if force else manifest.load(manifest_path)
+    if previous is not None and previous.get('inputs') == inputs:
+        plan_relpath = \
+            f"metainformation/{construct_base}_{planning.PLAN_FNAME}"
+        deck_relpath = \
+            f"metainformation/{construct_base}_{planning.DECK_OUTPUT_FNAME}"
+        stale = manifest.stale_artifacts(output_dir, previous['artifacts'])
+        to_render = [
+            fname for fname in fnames if fname in stale
+            or previous['templates'].get(fname) != template_fingerprints[fname]]
+        if set(stale) <= set(to_render) | {deck_relpath}:
+            if not stale and not to_render:
+                print('Run is up to date.')
+                return None
+            print(f'Inputs unchanged, rendering {len(to_render)} script(s)...')
+            with instrument.stage('render'):
+                planning.render_plan(
+                    output_dir / plan_relpath, selected=to_render,
+                    scripts=scripts, deck_scripts=deck_scripts,
+                    template_cache_dir=template_cache_dir)
+            return None
+
+    print('Processing input csv files and calculating OT-2 variables...')
+    with instrument.stage('plan'):
+        run_plan = planning.plan(
+            construct_path, sources_paths, settings, etoh_well=etoh_well,
+            soc_column=soc_column, template_dir=template_dir,
+            scripts=scripts, template_cache_dir=template_cache_dir,
+            selected=selected, select_sources=select_sources,
+            assembly_plate_wells=assembly_plate_wells,
+            order_constructs=order_constructs, assign_slots=assign_slots,
+            clip_tip_policy=clip_tip_policy)
+    if run_plan['clip_tips'] is not None:
+        print(planning.format_clip_tips(run_plan['clip_tips']).rstrip())
+    over_capacity = ledger.failures(run_plan['volumes'], ('over capacity',))
+    if over_capacity:
+        print('Warning: wells to refill during the run:\n  ' +
+              '\n  '.join(over_capacity))
+    print('Writing files...')
+    with instrument.stage('write'):
+        relpaths = planning.write_plan(run_plan, output_dir,
+                                       construct_base, deck_scripts,
+                                       run_table_format)
+    manifest.dump(manifest_path, {
+        'inputs': inputs,
+        'templates': template_fingerprints,
+        'artifacts': manifest.record_artifacts(
+            output_dir, relpaths,
+            previous['artifacts'] if previous is not None else None)
+    })
+    return run_plan
+
+
+def generator_fingerprint():
+    """Returns a fingerprint of the source code of the generator modules,
+    standing for the generator version in run manifests.
 
     """
-    source_plates_dict = {'Deck position': [], 'Source plate': [], 'Path': []}
-    for index, path in enumerate(paths):
-        source_plates_dict['Deck position'].append(SOURCE_DECK_POS[index])
-        source_plates_dict['Source plate'].append(os.path.basename(path))
-        source_plates_dict['Path'].append(path)
-    return pd.DataFrame(source_plates_dict)
-
+    return manifest.fingerprint_files([
+        os.path.abspath(__file__), batches.__file__, constructs.__file__,
+        ledger.__file__, manifest.__file__, mplates.__file__,
+        ordering.__file__, placement.__file__, planning.__file__,
+        runinfo.__file__, slots.__file__, sources.__file__,
+        templates.__file__])
 
-def dfs_to_csv(path, index=True, **kw_dfs):
-    """Generates a csv file defined by path, where kw_dfs are
-    written one after another with each key acting as a title. If index=True,
-    df indexes are written to the csv file.
-
-    """
-    with open(path, 'w', newline='') as csvfile:
-        csvwriter = csv.writer(csvfile)
-        for key, value in kw_dfs.items():
-            csvwriter.writerow([str(key)])
-            value.to_csv(csvfile, index=index)
-            csvwriter.writerow('')
-
-def handle_2_columns(datalist):
-    """This function has the intent of changing:
-    ('A8', '2') => ('A8', '', '2')
-    ('A8', '', '2') => ('A8', '', '2')
-    [('E2', '5')] => [('E2', '', '5')]
-    [('G1', '', '5')] => [('G1', '', '5')]
-    with the purpose of handling 2 column csv part file inputs,
-    as at times when 2 column csv files are input it creates tuples
-    of length 2 instead of 3
-    """
-    return_list = 0
-    if isinstance(datalist,list):
-        datalist = datalist[0]
-        return_list = 1
-    if len(datalist) == 2:
-        datalist = list(datalist)
-        datalist.insert(1,"")
-        datalist = tuple(datalist)
-    if return_list:
-        mylist = [""]
-        mylist[0] = datalist
-        return mylist
-    return datalist
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation of planning stages and written files.
+
+Once enabled, every stage records its wall time, CPU time and, when memory
+tracing is on, the peak memory traced by tracemalloc while it ran. Subscribers
+are called on stage start and end, whether recording is enabled or not, so
+that external profilers can follow the pipeline.
+"""
+import contextlib
+import json
+import time
+import tracemalloc
+
+# Active recorder, None when instrumentation is disabled
+_RECORDER = None
+# Callbacks called with (event, record), event being 'start' or 'end'
+_SUBSCRIBERS = []
+
+
+class Recorder:
+    """Records of the stages run while instrumentation is enabled.
+
+    Before Python 3.9 (no tracemalloc.reset_peak), peak memory is the peak
+    since tracing started rather than since the stage started.
+
+    Args:
+        trace_memory (bool): trace memory allocations with tracemalloc.
+
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.records = []
+        # Peak traced memory of each running stage, reset_peak being shared
+        self._peaks = []
+        self._started_tracing = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def enter(self, record):
+        record['depth'] = len(self._peaks)
+        self.records.append(record)
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            record['memory_start'] = current
+        self._peaks.append(0)
+
+    def exit(self, record):
+        peak = self._peaks.pop()
+        if self.trace_memory:
+            current, traced_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, traced_peak)
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            record['memory_end'] = current
+            record['peak_memory'] = peak
+
+    def report(self):
+        """Returns the records as a JSON serialisable dict, with stages and
+        written files listed separately in start order.
+
+        """
+        return {
+            'trace_memory': self.trace_memory,
+            'stages': [record for record in self.records
+                       if record['kind'] == 'stage'],
+            'files': [record for record in self.records
+                      if record['kind'] == 'file']
+        }
+
+
+def enable(trace_memory=True):
+    """Starts recording stages. Returns the new active Recorder."""
+    global _RECORDER
+    disable()
+    _RECORDER = Recorder(trace_memory)
+    _RECORDER.start()
+    return _RECORDER
+
+
+def disable():
+    """Stops recording stages. Returns the Recorder that was active, if any.
+    """
+    global _RECORDER
+    recorder = _RECORDER
+    if recorder is not None:
+        recorder.stop()
+    _RECORDER = None
+    return recorder
+
+
+def subscribe(callback):
+    """Calls callback(event, record) on each stage start ('start' event) and
+    end ('end' event). The record holds the stage 'name' and 'kind', and on
+    end its timings.
+
+    """
+    _SUBSCRIBERS.append(callback)
+
+
+def unsubscribe(callback):
+    _SUBSCRIBERS.remove(callback)
+
+
+@contextlib.contextmanager
+def stage(name, kind='stage', **info):
+    """Context manager instrumenting the code it wraps as a stage.
+
+    Args:
+        name (str): stage name.
+        kind (str): 'stage' for planning stages, 'file' for written files.
+        info: other fields of the record.
+
+    Yields:
+        dict: the stage record, to which callers may add fields.
+
+    """
+    record = {'name': name, 'kind': kind, **info}
+    recorder = _RECORDER
+    if recorder is None and not _SUBSCRIBERS:
+        yield record
+        return
+
+    if recorder is not None:
+        recorder.enter(record)
+    for callback in list(_SUBSCRIBERS):
+        callback('start', record)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield record
+    finally:
+        record['wall_time'] = time.perf_counter() - wall_start
+        record['cpu_time'] = time.process_time() - cpu_start
+        if recorder is not None:
+            recorder.exit(record)
+        for callback in list(_SUBSCRIBERS):
+            callback('end', record)
+
+
+def write_report(path, recorder):
+    """Writes the report of recorder to path as JSON."""
+    with open(path, 'w') as ofh:
+        json.dump(recorder.report(), ofh, indent=1, default=str)
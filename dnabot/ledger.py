@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Volume ledger of the wells of a run, across the four steps.
+
+Each step aspirates from and dispenses into wells: source plate wells and
+reagent tubes, the CLIP plate, purified CLIP products, final assemblies,
+the ethanol trough, the SOC column. A VolumeLedger records every planned
+transfer as an event, and balances all wells at once with numpy: volume
+drawn and dispensed, and the minimum volume each well must hold at the
+start so that no aspiration leaves less than the dead volume of the well.
+Wells whose start volume is known and lower, or whose labware cannot hold
+the volume needed, would empty partway through a run and are reported
+before the run instead.
+"""
+from array import array
+from collections import namedtuple
+
+# Well of the ledger. start_volume is None when the volume loaded by the
+#   user is not known (reagents), capacity None when not limited
+Well = namedtuple('Well', [
+    'labware', 'well', 'content', 'start_volume', 'dead_volume', 'capacity'])
+
+# Balance of a well. steps lists the steps using it, min_fill is the
+#   minimum start volume (uL), status one of STATUSES
+WellBalance = namedtuple('WellBalance', [
+    'labware', 'well', 'content', 'steps', 'start_volume', 'drawn',
+    'dispensed', 'min_fill', 'status'])
+
+# 'ok': start volume known and sufficient, or nothing drawn; 'fill': start
+#   volume to load, at least min_fill; 'short': start volume lower than
+#   min_fill; 'over capacity': min_fill larger than the well holds
+STATUSES = ('ok', 'fill', 'short', 'over capacity')
+FAILURES = ('short', 'over capacity')
+
+
+class VolumeLedger:
+    """Planned transfers of a run, between wells registered with well()."""
+
+    def __init__(self):
+        self.wells = []
+        self.steps = []
+        self._index = {}
+        # Events: well index, signed volume (uL) and step index
+        self._event_wells = array('l')
+        self._event_volumes = array('d')
+        self._well_steps = []
+
+    def well(self, labware, well, content=None, start_volume=None,
+             dead_volume=0, capacity=None):
+        """Returns the index of a well, registering it the first time.
+
+        Args:
+            labware (str): labware holding the well, e.g. its settings key
+                or a plate slot.
+            start_volume (float): volume of the well before the run, None
+                when loaded by the user, 0 for wells filled by the run.
+            dead_volume (float): volume that cannot be aspirated.
+            capacity (float): largest volume of the well.
+
+        """
+        key = (labware, well)
+        if key not in self._index:
+            self._index[key] = len(self.wells)
+            self.wells.append(Well(labware, well, content, start_volume,
+                                   dead_volume, capacity))
+            self._well_steps.append([])
+        return self._index[key]
+
+    def transfer(self, step, source, destination, volume):
+        """Records volume moved from the source well to the destination
+        well, indexes as returned by well(). Either may be None for volumes
+        coming from or going to outside the ledger.
+
+        """
+        for index, signed_volume in ((source, -volume),
+                                     (destination, volume)):
+            if index is None:
+                continue
+            self._event_wells.append(index)
+            self._event_volumes.append(signed_volume)
+            if step not in self._well_steps[index]:
+                self._well_steps[index].append(step)
+        if step not in self.steps:
+            self.steps.append(step)
+
+    def balances(self):
+        """Returns the WellBalance of every well, in registration order.
+
+        The minimum fill of a well is the volume it must hold at the start
+        so that, after each of its aspirations, in the order they were
+        recorded, it still holds its dead volume.
+
+        """
+        import numpy as np
+        number = len(self.wells)
+        wells = np.frombuffer(self._event_wells, dtype=np.int_) \
+            if self._event_wells else np.zeros(0, dtype=np.int_)
+        volumes = np.frombuffer(self._event_volumes, dtype=float) \
+            if self._event_volumes else np.zeros(0)
+        aspirations = volumes < 0
+        drawn = np.bincount(wells[aspirations], -volumes[aspirations],
+                            minlength=number)
+        dispensed = np.bincount(wells[~aspirations], volumes[~aspirations],
+                                minlength=number)
+
+        # Running balance of each well, events grouped by well in order
+        order = np.argsort(wells, kind='stable')
+        grouped_wells = wells[order]
+        running = np.cumsum(volumes[order])
+        starts = np.searchsorted(grouped_wells, np.arange(number))
+        offsets = np.concatenate(([0.], running))[starts]
+        running -= offsets[grouped_wells]
+        lowest = np.full(number, np.inf)
+        grouped_aspirations = aspirations[order]
+        np.minimum.at(lowest, grouped_wells[grouped_aspirations],
+                      running[grouped_aspirations])
+        dead_volumes = np.array([well.dead_volume for well in self.wells],
+                                dtype=float)
+        min_fills = np.where(np.isfinite(lowest),
+                             np.maximum(dead_volumes - lowest, 0), 0)
+
+        balances = []
+        for index, well in enumerate(self.wells):
+            min_fill = round(float(min_fills[index]), 6)
+            if well.capacity is not None and min_fill > well.capacity:
+                status = 'over capacity'
+            elif well.start_volume is None:
+                status = 'fill' if min_fill > 0 else 'ok'
+            elif well.start_volume < min_fill:
+                status = 'short'
+            else:
+                status = 'ok'
+            balances.append(WellBalance(
+                well.labware, well.well, well.content,
+                list(self._well_steps[index]), well.start_volume,
+                round(float(drawn[index]), 6),
+                round(float(dispensed[index]), 6), min_fill, status))
+        return balances
+
+
+def failures(balances, statuses=FAILURES):
+    """Returns the messages describing the wells of balances with one of
+    statuses, by default the wells that would run dry during the run.
+
+    """
+    messages = []
+    for balance in balances:
+        if balance.status not in statuses:
+            continue
+        content = f' ({balance.content})' if balance.content else ''
+        well = f'{balance.labware} {balance.well}{content}'
+        if balance.status == 'short':
+            messages.append(
+                f'{well} needs {balance.min_fill:g} uL, '
+                f'holds {balance.start_volume:g} uL')
+        elif balance.status == 'over capacity':
+            messages.append(
+                f'{well} needs {balance.min_fill:g} uL, more than it holds')
+        else:
+            messages.append(f'{well} needs {balance.min_fill:g} uL')
+    return messages
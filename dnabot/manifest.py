@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Fingerprints of run inputs and outputs, for incremental regeneration.
+
+A manifest records, for one run folder, the fingerprint of the inputs that
+determine the plan, the fingerprint of each template, and the content hash
+and stat stamp of each written artifact. Artifacts are only rewritten when
+their content changes, so untouched files keep their timestamps.
+"""
+import hashlib
+import json
+import os
+
+
+def fingerprint_bytes(data):
+    """Returns the hex SHA-256 digest of data."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def fingerprint_file(path):
+    """Returns the hex SHA-256 digest of the content of path."""
+    with open(path, 'rb') as ifh:
+        return fingerprint_bytes(ifh.read())
+
+
+def fingerprint_files(paths):
+    """Returns a single digest of the contents of paths, in order."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as ifh:
+            digest.update(hashlib.sha256(ifh.read()).digest())
+    return digest.hexdigest()
+
+
+def fingerprint_data(data):
+    """Returns the digest of a JSON serialisable object, independent of dict
+    ordering.
+
+    """
+    return fingerprint_bytes(
+        json.dumps(data, sort_keys=True, default=str).encode('utf-8'))
+
+
+def stamp(path):
+    """Returns the [modification time in ns, size] of path, or None if it
+    does not exist.
+
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def load(path):
+    """Returns the manifest stored at path, or None if it is missing or
+    unreadable.
+
+    """
+    try:
+        with open(path) as ifh:
+            return json.load(ifh)
+    except (OSError, ValueError):
+        return None
+
+
+def dump(path, manifest):
+    """Writes manifest to path."""
+    with open(path, 'w') as ofh:
+        json.dump(manifest, ofh, indent=1, sort_keys=True)
+
+
+def write_if_changed(path, text, newline=None):
+    """Writes text to path unless the file already holds it, in which case
+    the file and its timestamp are left untouched. Returns True if the file
+    was written.
+
+    Args:
+        newline (str): as in open(), '' for csv files.
+
+    """
+    raw = text if newline == '' else text.replace('\n', os.linesep)
+    try:
+        with open(path, newline='') as ifh:
+            if ifh.read() == raw:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    with open(path, 'w', newline=newline) as ofh:
+        ofh.write(text)
+    return True
+
+
+def record_artifacts(output_dir, relpaths, previous=None):
+    """Returns {relative path: {'sha256', 'stamp'}} for the artifacts of
+    output_dir listed in relpaths. Digests of previously recorded artifacts
+    whose stamp is unchanged are reused rather than computed again.
+
+    """
+    if previous is None:
+        previous = {}
+    artifacts = {}
+    for relpath in relpaths:
+        path = os.path.join(output_dir, relpath)
+        artifact_stamp = stamp(path)
+        recorded = previous.get(relpath)
+        if recorded is not None and recorded['stamp'] == artifact_stamp:
+            artifacts[relpath] = recorded
+        else:
+            artifacts[relpath] = {
+                'sha256': fingerprint_file(path),
+                'stamp': artifact_stamp
+            }
+    return artifacts
+
+
+def stale_artifacts(output_dir, artifacts):
+    """Returns the relative paths of recorded artifacts that were deleted or
+    modified since they were recorded. Only file stamps are checked, so that
+    no file content is read.
+
+    """
+    return [relpath for relpath, artifact in artifacts.items()
+            if stamp(os.path.join(output_dir, relpath)) != artifact['stamp']]
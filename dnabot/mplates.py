@@ -3,26 +3,199 @@
 Created on Thu May 30 17:05:37 2019
 
 @authors: mh2210, gizembuldum, tduigou
+
+Geometry of well plates: 6, 12, 24, 96 and 384 well formats.
+
+Wells are numbered from 1, column by column (A1, B1, ... H1, A2 on a 96 well
+plate) or row by row. Well names of each format and ordering are precomputed, both ways, so that
+conversions are table lookups, and conversions of arrays of sample numbers are
+vectorised with numpy.
 """
+import string
+
+# (rows, columns) of each supported format, by number of wells
+FORMATS = {
+    6: (2, 3),
+    12: (3, 4),
+    24: (4, 6),
+    96: (8, 12),
+    384: (16, 24)
+}
+
+
+class PlateFormat:
+    """Well layout of a plate format.
+
+    Args:
+        rows (int): number of rows, named from 'A'.
+        columns (int): number of columns, numbered from 1.
+        column_major (bool): number wells column by column, otherwise row by
+            row.
+
+    Attributes:
+        row_names (list): row letters.
+        names (list): well names, in numbering order.
+        numbers (dict): well name to well number.
+
+    """
+
+    def __init__(self, rows, columns, column_major=True):
+        self.rows = rows
+        self.columns = columns
+        self.column_major = column_major
+        self.size = rows * columns
+        self.row_names = list(string.ascii_uppercase[:rows])
+        if column_major:
+            self.names = [f'{row}{column}'
+                          for column in range(1, columns + 1)
+                          for row in self.row_names]
+        else:
+            self.names = [f'{row}{column}' for row in self.row_names
+                          for column in range(1, columns + 1)]
+        self.numbers = {name: number
+                        for number, name in enumerate(self.names, start=1)}
+        self._names_array = None
+
+    def well(self, sample_number):
+        """Returns the name of the well of a sample number. Numbers beyond
+        the last well of a column major plate continue on extra columns
+        (A13, B13... on a 96 well plate).
+
+        """
+        if 0 < sample_number <= self.size:
+            return self.names[sample_number - 1]
+        return self.wells([sample_number])[0]
+
+    def wells(self, sample_numbers):
+        """Returns the list of the well names of an array of sample numbers,
+        as well does for a single sample number.
+
+        """
+        import numpy as np
+        if self._names_array is None:
+            self._names_array = np.array(self.names, dtype=object)
+        indexes = np.asarray(sample_numbers, dtype=int) - 1
+        if indexes.size == 0 or (indexes.min() >= 0 and
+                                 indexes.max() < self.size):
+            return self._names_array[indexes].tolist()
+        if not self.column_major or indexes.min() < 0:
+            raise ValueError(f'Sample numbers out of the {self.size} wells '
+                             f'of the plate.')
+        columns = (indexes // self.rows + 1).astype(str)
+        return np.char.add(np.array(self.row_names)[indexes % self.rows],
+                           columns).tolist()
+
+    def plate_well(self, sample_number):
+        """Returns the well of a sample number, numbers beyond the last well
+        continuing on the next plate of the same format, as when spotting
+        onto several agar plates.
+
+        """
+        return self.names[(sample_number - 1) % self.size]
+
+    def plate_wells(self, sample_numbers):
+        """Returns the list of the well names of an array of sample numbers,
+        as plate_well does for a single sample number.
+
+        """
+        import numpy as np
+        indexes = (np.asarray(sample_numbers, dtype=int) - 1) % self.size
+        return self.wells(indexes + 1)
+
+    def number(self, well):
+        """Returns the number of a well name.
+
+        Raises:
+            KeyError: well not on this plate format.
+
+        """
+        return self.numbers[well]
+
+    def position(self, well):
+        """Returns the 0-based (row, column) of a well name."""
+        index = self.numbers[well] - 1
+        if self.column_major:
+            return index % self.rows, index // self.rows
+        return index // self.columns, index % self.columns
+
+    def lines(self, values):
+        """Splits values, in numbering order, into the columns (column major)
+        or rows (row major) of the plate they fill.
+
+        """
+        length = self.rows if self.column_major else self.columns
+        return [values[start:start + length]
+                for start in range(0, len(values), length)]
+
+    def __repr__(self):
+        return (f'PlateFormat({self.rows}, {self.columns}, '
+                f'column_major={self.column_major})')
+
+
+_PLATE_FORMATS = {}
+
+
+def plate_format(wells, column_major=True):
+    """Returns the PlateFormat of a number of wells, built once.
+
+    Raises:
+        ValueError: unsupported number of wells.
+
+    """
+    key = (wells, column_major)
+    if key not in _PLATE_FORMATS:
+        if wells not in FORMATS:
+            raise ValueError(
+                f'Unsupported plate format: {wells} wells, supported formats '
+                f'are {", ".join(str(size) for size in FORMATS)} wells.')
+        _PLATE_FORMATS[key] = PlateFormat(*FORMATS[wells], column_major)
+    return _PLATE_FORMATS[key]
+
+
+PLATE_12 = plate_format(12)
+PLATE_96 = plate_format(96)
+PLATE_384 = plate_format(384)
+ROWS_96 = PLATE_96.row_names
+
+
+def quadrant_wells(sample_numbers) -> list:
+    """Determines the 384 well plate wells of an array of sample numbers,
+    filling the plate quadrant by quadrant. Samples 1 to 96 take the wells of
+    odd rows and columns (A1, C1, ... O1, A3...), as 96 well plate samples,
+    then 97 to 192 odd rows and even columns (A2...), 193 to 288 even rows
+    and odd columns (B1...), and 289 to 384 even rows and columns (B2...).
+    A column of 8 samples of a quadrant is thus reached at once by an 8
+    channel pipette.
+
+    """
+    import numpy as np
+    indexes = np.asarray(sample_numbers, dtype=int) - 1
+    if indexes.size and (indexes.min() < 0 or
+                         indexes.max() >= PLATE_384.size):
+        raise ValueError('Sample numbers out of the 384 wells of the plate.')
+    quadrants, positions = np.divmod(indexes, PLATE_96.size)
+    rows = 2 * (positions % PLATE_96.rows) + quadrants // 2
+    columns = 2 * (positions // PLATE_96.rows) + quadrants % 2
+    return PLATE_384.wells(columns * PLATE_384.rows + rows + 1)
+
 
 def final_well(sample_number: int) -> str:
     """Determines well containing the final sample from sample number.
     
     """
-    letter = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H']
-    final_well_column = sample_number // 8 + \
-        (1 if sample_number % 8 > 0 else 0)
-    final_well_row = letter[sample_number - (final_well_column - 1) * 8 - 1]
-    return final_well_row + str(final_well_column)
+    return PLATE_96.well(sample_number)
+
+
+def final_wells(sample_numbers) -> list:
+    """Determines wells containing the final samples from an array of sample
+    numbers, as final_well does for a single sample number.
+
+    """
+    return PLATE_96.wells(sample_numbers)
 
 
 def final_12wellplate(sample_number):
     """Determines well containing the final sample from sample number for 12 well plate spotting
 
     """
-    letter_12wellplate = ['A', 'B', 'C']
-    plate_number = sample_number// 12 + (1 if sample_number % 12 > 0 else 0)
-    final_well_column = sample_number // 3 + \
-        (1 if sample_number % 3 > 0 else 0) - ((plate_number-1) * 4)
-    final_well_row = letter_12wellplate[sample_number - ((plate_number - 1) * 12)-(final_well_column*3) - 1]
-    return final_well_row + str(final_well_column)
+    return PLATE_12.plate_well(sample_number)
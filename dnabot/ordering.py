@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Ordering of the constructs of a run before final assembly well assignment.
+
+Final assembly wells are filled column by column in construct order. By
+default constructs keep the order of the constructs csv file, so constructs
+sharing CLIP reactions, or having the same number of parts, may be scattered
+across the plate. order_constructs permutes them so that constructs with the
+same number of parts fill consecutive wells, whole columns first, and that,
+among them, constructs sharing CLIP reactions are neighbours: master mix
+additions and spotting then run over fewer, fuller columns, and consecutive
+assemblies draw from the same purified CLIP wells.
+"""
+
+
+def order_constructs(library, column_size=8):
+    """Returns the construct indexes of library in assembly order.
+
+    Constructs are grouped by number of parts, groups being ordered by
+    number of parts. The whole columns of every group come first, then the
+    constructs left over, so that constructs of different sizes only share
+    the last columns. Within a group, constructs are chained greedily: the
+    next construct is the one sharing the most CLIP reactions with the
+    previous one, ties going to the first construct of the csv file.
+
+    Args:
+        library (constructs.ConstructLibrary): constructs of the run.
+        column_size (int): number of wells of a plate column.
+
+    """
+    groups = {}
+    for index, length in enumerate(library.lengths()):
+        groups.setdefault(length, []).append(index)
+
+    columns, leftovers = [], []
+    for length in sorted(groups):
+        chain = _chain(library, groups[length])
+        whole = len(chain) - len(chain) % column_size
+        columns.extend(chain[:whole])
+        leftovers.extend(chain[whole:])
+    return columns + leftovers
+
+
+def _chain(library, indexes):
+    """Greedy chain of indexes, each construct followed by the remaining one
+    sharing the most CLIP reactions with it.
+
+    """
+    clip_sets = {index: set(library.codes(index)) for index in indexes}
+    # Constructs using each CLIP reaction, to only score candidates sharing
+    #   at least one CLIP reaction with the previous construct
+    users = {}
+    for index in indexes:
+        for code in clip_sets[index]:
+            users.setdefault(code, []).append(index)
+
+    remaining = dict.fromkeys(indexes)
+    chain = []
+    current = indexes[0]
+    while True:
+        chain.append(current)
+        del remaining[current]
+        if not remaining:
+            return chain
+        shared = {}
+        for code in clip_sets[current]:
+            for index in users[code]:
+                if index in remaining:
+                    shared[index] = shared.get(index, 0) + 1
+        if shared:
+            current = min(shared, key=lambda index: (-shared[index], index))
+        else:
+            current = next(iter(remaining))
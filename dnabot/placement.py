@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+Assignment of deck slots to the movable labware of the CLIP step.
+
+Templates place source plates, tip racks and the tube rack in fixed slots,
+whatever the run. assign_clip_slots counts, from the planned CLIP reactions,
+how often the pipette travels between each pair of labware (tip rack, source
+plate or tube rack, destination plate, trash), and places the movable
+labware on the free slots so that the expected travel is the smallest. Slots
+of the destination plate, of modules and of the trash are left untouched.
+
+The CLIP templates can also multi-dispense water and linkers: transfers are
+grouped by source well and one aspiration fills several destination wells
+(TIP_POLICIES). clip_aspirations follows the same grouping as the templates,
+and estimate_clip_step the tips and run time saved.
+"""
+import itertools
+import math
+from collections import Counter, namedtuple
+
+# Centre of each OT-2 deck slot (mm), slots numbered row by row from the
+#   front left, 132.5 mm apart along x and 90.5 mm along y
+SLOT_PITCH = (132.5, 90.5)
+SLOT_CENTRES = {str(slot): ((slot - 1) % 3 * SLOT_PITCH[0],
+                            (slot - 1) // 3 * SLOT_PITCH[1])
+                for slot in range(1, 13)}
+TRASH_SLOT = '12'
+# Slots taken by modules spanning several slots, the thermocycler being
+#   always loaded on slot 7
+MODULE_SLOTS = {'thermocycler': ('7', '8', '10', '11')}
+TIPS_PER_RACK = 96
+# Tip policies of the CLIP water and linker transfers: 'always' a new tip per
+#   transfer, 'aspiration' a new tip per multi-dispense aspiration, so that
+#   no used tip returns to a source well, 'source' one tip per source well
+#   and step, kept over its aspirations
+TIP_POLICIES = ('always', 'aspiration', 'source')
+# Multi-dispense of the CLIP templates: largest pipette volume and volume
+#   aspirated in excess, dropped with the tip (uL)
+PIPETTE_MAX_VOLUME = 20
+DISPOSAL_VOLUME = 1
+CLIP_LINKER_VOLUME = 1
+# Estimated durations (s) of the OT-2 actions: picking up and dropping a
+#   tip, aspirating or dispensing, a mix cycle, replacing an empty tip rack,
+#   and gantry speed (mm/s)
+TIP_SECONDS = 8
+LIQUID_SECONDS = 2
+MIX_SECONDS = 3
+TIP_RACK_SWAP_SECONDS = 60
+GANTRY_SPEED = 400
+# Mix cycles after the linker and part transfers, as the CLIP templates
+LINKER_MIXES = 1
+PART_MIXES = 4
+# Largest number of arrangements tried by the exact search, above which the
+#   greedy arrangement is improved by pairwise swaps
+EXACT_MAX_ARRANGEMENTS = 20000
+
+# Aspiration of the CLIP step: source labware, whether a new tip is picked up
+#   first, number of destination wells and of mix cycles after dispensing
+Aspiration = namedtuple('Aspiration', ['source', 'new_tip', 'dispenses',
+                                       'mixes'])
+
+# Estimate of the CLIP step with a tip policy: tips used, tip racks loaded,
+#   aspirations, dispenses, travel (m) and duration (s)
+ClipEstimate = namedtuple('ClipEstimate', [
+    'tip_policy', 'tips', 'tip_racks', 'aspirations', 'dispenses', 'travel',
+    'seconds'])
+
+# Slots of the movable labware: source plate slot by original deck position,
+#   tip rack slots in order of use, tube rack slot, and the expected travel
+#   (m) with default and assigned slots
+SlotAssignment = namedtuple('SlotAssignment', [
+    'source_plates', 'tip_racks', 'tube_rack', 'default_travel', 'travel'])
+
+
+def distance(slot_a, slot_b):
+    """Travel (mm) of the gantry between two slot centres, x and y axes
+    moving simultaneously.
+
+    """
+    (xa, ya), (xb, yb) = SLOT_CENTRES[slot_a], SLOT_CENTRES[slot_b]
+    return max(abs(xa - xb), abs(ya - yb))
+
+
+def module_slots(modules):
+    """Slots taken by the multi-slot modules among modules."""
+    taken = set()
+    for module in modules:
+        for name, module_slots in MODULE_SLOTS.items():
+            if name in module.lower():
+                taken.update(module_slots)
+    return taken
+
+
+def tips_used(initial_tip):
+    """Number of tips of the first tip rack used before initial_tip, tips
+    being picked column by column.
+
+    """
+    return (int(initial_tip[1:]) - 1) * 8 + 'ABCDEFGH'.index(initial_tip[0])
+
+
+def dispense_runs(volumes, sources):
+    """Groups transfers by source, sources in order of first use, and splits
+    each group into the aspirations the pipette holds along with the
+    disposal volume, as the CLIP templates do.
+
+    Args:
+        volumes (list): volume of each transfer, transfers of no volume
+            being skipped.
+        sources (list): source of each transfer.
+
+    Returns:
+        list: (source, transfer indexes, whether first of its source) of
+            each aspiration.
+
+    """
+    groups = {}
+    for index, (volume, source) in enumerate(zip(volumes, sources)):
+        if volume > 0:
+            groups.setdefault(source, []).append(index)
+    runs = []
+    for source, indexes in groups.items():
+        run, total, first = [], 0, True
+        for index in indexes:
+            if run and total + volumes[index] > \
+                    PIPETTE_MAX_VOLUME - DISPOSAL_VOLUME:
+                runs.append((source, run, first))
+                run, total, first = [], 0, False
+            run.append(index)
+            total += volumes[index]
+        runs.append((source, run, first))
+    return runs
+
+
+def clip_aspirations(clips_dict, tip_policy='always'):
+    """Returns the Aspirations of the CLIP step, following the order of the
+    CLIP templates: master mix with a single tip, then water, and prefix,
+    suffix and part of each reaction with a new tip each ('always'). Other
+    policies multi-dispense water, then prefixes and suffixes, from each
+    source well (see TIP_POLICIES), parts following with a new tip each.
+    Sources are 'tube_rack' and ('source', deck position).
+
+    """
+    if tip_policy not in TIP_POLICIES:
+        raise ValueError(f'Unknown tip policy {tip_policy!r}, expected one '
+                         f'of {", ".join(TIP_POLICIES)}.')
+    reactions = len(clips_dict['parts_wells'])
+    aspirations = []
+    if reactions:
+        aspirations.append(Aspiration('tube_rack', True, reactions, 0))
+    if tip_policy == 'always':
+        aspirations.extend(Aspiration('tube_rack', True, 1, 0)
+                           for _ in range(reactions))
+        for prefix, suffix, part in zip(clips_dict['prefixes_plates'],
+                                        clips_dict['suffixes_plates'],
+                                        clips_dict['parts_plates']):
+            aspirations.extend(
+                Aspiration(('source', plate), True, 1, LINKER_MIXES)
+                for plate in (prefix, suffix))
+            aspirations.append(
+                Aspiration(('source', part), True, 1, PART_MIXES))
+        return aspirations
+
+    transfers = [(clips_dict['water_vols'], ['tube_rack'] * reactions)]
+    for key in ('prefixes', 'suffixes'):
+        transfers.append((
+            [CLIP_LINKER_VOLUME] * reactions,
+            list(zip(clips_dict[f'{key}_plates'],
+                     clips_dict[f'{key}_wells']))))
+    for volumes, sources in transfers:
+        for source, indexes, first in dispense_runs(volumes, sources):
+            aspirations.append(Aspiration(
+                source if source == 'tube_rack' else ('source', source[0]),
+                first or tip_policy == 'aspiration', len(indexes), 0))
+    aspirations.extend(Aspiration(('source', plate), True, 1, PART_MIXES)
+                       for plate in clips_dict['parts_plates'])
+    return aspirations
+
+
+def clip_moves(clips_dict, initial_tip='A1', tip_policy='always'):
+    """Returns the Counter of pipette moves of the CLIP step between labware
+    (see clip_aspirations). Labware are ('tip_rack', index), ('source', deck
+    position), 'tube_rack', 'destination' and 'trash'.
+
+    """
+    moves = Counter()
+    tips = tips_used(initial_tip)
+    # Labware the pipette left last
+    position = 'trash'
+    for aspiration in clip_aspirations(clips_dict, tip_policy):
+        if aspiration.new_tip:
+            if position != 'trash':
+                moves[(position, 'trash')] += 1
+            tip_rack = ('tip_rack', tips // TIPS_PER_RACK)
+            tips += 1
+            moves[('trash', tip_rack)] += 1
+            position = tip_rack
+        moves[(position, aspiration.source)] += 1
+        # Back and forth between the source and the destination
+        moves[(aspiration.source, 'destination')] += \
+            2 * aspiration.dispenses - 1
+        position = 'destination'
+    if position != 'trash':
+        moves[(position, 'trash')] += 1
+    return moves
+
+
+def clip_tips(clips_dict, tip_policy='always'):
+    """Number of tips used by the CLIP step."""
+    return sum(aspiration.new_tip
+               for aspiration in clip_aspirations(clips_dict, tip_policy))
+
+
+def tip_racks_needed(clips_dict, initial_tip='A1', tip_policy='always'):
+    """Number of tip racks used by the CLIP step."""
+    tips = clip_tips(clips_dict, tip_policy) + tips_used(initial_tip)
+    return max(1, -(-tips // TIPS_PER_RACK))
+
+
+def estimate_clip_step(clips_dict, slots, tip_rack_slots, initial_tip='A1',
+                       tip_policy='always'):
+    """Estimates the tips, tip racks and duration of the CLIP step.
+
+    Args:
+        clips_dict (dict): planned CLIP reactions.
+        slots (dict): slot of the labware of clip_moves but tip racks.
+        tip_rack_slots (list): slots of the tip racks, racks beyond them
+            being swapped in by the user.
+
+    Returns:
+        ClipEstimate
+
+    """
+    aspirations = clip_aspirations(clips_dict, tip_policy)
+    tips = sum(aspiration.new_tip for aspiration in aspirations)
+    tip_racks = tip_racks_needed(clips_dict, initial_tip, tip_policy)
+    dispenses = sum(aspiration.dispenses for aspiration in aspirations)
+    mixes = sum(aspiration.mixes for aspiration in aspirations)
+    slots = dict(slots)
+    slots.update({('tip_rack', index):
+                  tip_rack_slots[index % len(tip_rack_slots)]
+                  for index in range(tip_racks)})
+    distance_mm = travel(clip_moves(clips_dict, initial_tip, tip_policy),
+                         slots)
+    seconds = (tips * TIP_SECONDS
+               + (len(aspirations) + dispenses) * LIQUID_SECONDS
+               + mixes * MIX_SECONDS
+               + max(0, tip_racks - len(tip_rack_slots))
+               * TIP_RACK_SWAP_SECONDS
+               + distance_mm / GANTRY_SPEED)
+    return ClipEstimate(tip_policy, tips, tip_racks, len(aspirations),
+                        dispenses, round(distance_mm / 1000, 1),
+                        round(seconds))
+
+
+def travel(moves, slots):
+    """Expected travel (mm) of moves when labware are placed on slots, moves
+    from or to labware missing from slots being ignored.
+
+    """
+    return sum(count * distance(slots[labware_a], slots[labware_b])
+               for (labware_a, labware_b), count in moves.items()
+               if labware_a in slots and labware_b in slots)
+
+
+def _arrange(items, free_slots, fixed, moves):
+    """Returns the slot of each movable item minimising the travel of moves,
+    fixed mapping the other labware to their slots.
+
+    """
+    def cost(slots):
+        return travel(moves, {**fixed, **slots})
+
+    arrangements = math.perm(len(free_slots), len(items))
+    if arrangements <= EXACT_MAX_ARRANGEMENTS:
+        best = None
+        for permutation in itertools.permutations(free_slots, len(items)):
+            slots = dict(zip(items, permutation))
+            slots_cost = cost(slots)
+            if best is None or slots_cost < best[0]:
+                best = (slots_cost, slots)
+        return best[1]
+
+    # Greedy: most visited labware first, each on the free slot closest to
+    #   the labware already placed
+    visits = Counter()
+    for (labware_a, labware_b), count in moves.items():
+        visits[labware_a] += count
+        visits[labware_b] += count
+    slots = {}
+    available = list(free_slots)
+    for item in sorted(items, key=lambda item: -visits[item]):
+        slot = min(available, key=lambda slot: cost({**slots, item: slot}))
+        slots[item] = slot
+        available.remove(slot)
+    # Pairwise swaps, including with free slots, until no swap helps
+    improved = True
+    while improved:
+        improved = False
+        current = cost(slots)
+        for item in items:
+            for other in items + available:
+                swapped = dict(slots)
+                if other in slots:
+                    swapped[item], swapped[other] = slots[other], slots[item]
+                else:
+                    swapped[item] = other
+                swapped_cost = cost(swapped)
+                if swapped_cost < current:
+                    if other not in slots:
+                        available.remove(other)
+                        available.append(slots[item])
+                    slots, current, improved = swapped, swapped_cost, True
+    return slots
+
+
+def assign_clip_slots(clips_dict, source_positions, decks, initial_tip='A1',
+                      tip_policy='always', tip_racks=None):
+    """Assigns slots to the source plates, tip racks and tube rack of the
+    CLIP scripts.
+
+    Args:
+        clips_dict (dict): planned CLIP reactions (see
+            planning.generate_clips_dict).
+        source_positions (list): default deck positions of the source plates.
+        decks (list): deck positions and modules of each CLIP script, as
+            (positions, modules) with positions as returned by
+            slots.get_positions_from_clip. Slots are assigned among the slots
+            free in every script.
+        initial_tip (str): first tip picked from the first tip rack.
+        tip_policy (str): tip policy of the CLIP scripts (TIP_POLICIES).
+        tip_racks (int): number of tip racks to place, default the tip racks
+            needed with tip_policy, e.g. more when scripts run different tip
+            policies.
+
+    Returns:
+        SlotAssignment
+
+    Raises:
+        ValueError: not enough free slots.
+
+    """
+    destinations = set()
+    default = {}
+    taken = {TRASH_SLOT}
+    for positions, modules in decks:
+        for key in ('destination_plate', 'clip_plate'):
+            if key in positions:
+                destinations.add(positions[key])
+        taken |= module_slots(modules)
+        default.setdefault('tube_rack', positions.get('tube_rack'))
+        default.setdefault('tip_racks', positions.get('tip_racks'))
+    taken |= destinations
+    destination = min(destinations) if destinations else '7'
+
+    moves = clip_moves(clips_dict, initial_tip, tip_policy)
+    if tip_racks is None:
+        tip_racks = tip_racks_needed(clips_dict, initial_tip, tip_policy)
+    items = [('source', position) for position in source_positions] + \
+        [('tip_rack', index) for index in range(tip_racks)] + ['tube_rack']
+    free_slots = [slot for slot in SLOT_CENTRES if slot not in taken]
+    if len(items) > len(free_slots):
+        raise ValueError(
+            f'{len(items)} labware for {len(free_slots)} free deck slots '
+            f'({", ".join(free_slots)}). Reduce the number of source plates.')
+    fixed = {'destination': destination, 'trash': TRASH_SLOT}
+    slots = _arrange(items, free_slots, fixed, moves)
+
+    default_slots = dict(fixed, tube_rack=default['tube_rack'] or '4')
+    default_slots.update({('source', position): position
+                          for position in source_positions})
+    default_racks = default['tip_racks'] or []
+    default_travel = None
+    if len(default_racks) >= tip_racks:
+        default_slots.update({('tip_rack', index): default_racks[index]
+                              for index in range(tip_racks)})
+        default_travel = travel(moves, default_slots) / 1000
+    return SlotAssignment(
+        {position: slots[('source', position)] for position in source_positions},
+        [slots[('tip_rack', index)] for index in range(tip_racks)],
+        slots['tube_rack'],
+        default_travel,
+        travel(moves, {**fixed, **slots}) / 1000)
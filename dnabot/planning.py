@@ -0,0 +1,1942 @@
+# -*- coding: utf-8 -*-
+"""
+Planning of a robot run, from the constructs and sources csv files to the
+OT-2 scripts and metainformation files.
+
+plan() reads and checks the inputs, then plans the CLIP reactions, their
+purification, the final assemblies and the transformations, follows the
+volume of every well (see plan_volumes) and renders the OT-2 scripts from
+their templates, all in memory. write_plan() writes the planned run, and
+render_plan() renders other scripts of a written run later on. dnabot_app
+collects the settings from the command line or the GUI and generates runs
+from these functions.
+"""
+import os
+import sys
+
+import csv
+import io
+import json
+from collections import Counter, namedtuple
+from pathlib import Path
+
+#add dnabot module to syspath
+abs_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, abs_path)
+
+# pandas, numpy, yaml and tabulate are imported by the functions using them,
+#   so that command line runs not needing them start fast
+import constructs
+import instrument
+import ledger
+import manifest
+import mplates
+import ordering
+import placement
+import runinfo
+import slots
+import sources
+import templates
+
+# Constant str
+TEMPLATE_DIR_NAME = 'template_ot2_scripts'
+CLIP_TEMP_FNAME_1 = 'clip_template_APIv1.py'
+CLIP_TEMP_FNAME_2 = 'clip_template_APIv2.8.py'
+CLIP_TEMP_FNAME_3 = 'clip_template_Thermocycler_module_APIv2.8.py'
+
+MAGBEAD_TEMP_FNAME_1 = 'purification_template_APIv1.py'
+MAGBEAD_TEMP_FNAME_2 = 'purification_template_APIv2.8.py'
+
+F_ASSEMBLY_TEMP_FNAME_1 = 'assembly_template_APIv1.py'
+F_ASSEMBLY_TEMP_FNAME_2 = 'assembly_template_APIv2.8.py'
+F_ASSEMBLY_TEMP_FNAME_3 = 'assembly_template_Thermocycler_module_APIv2.8.py'
+F_ASSEMBLY_TEMP_FNAME_4 = 'assembly_template_384_APIv2.8.py'
+
+TRANS_SPOT_TEMP_FNAME_1 = 'transformation_template_APIv1.py'
+TRANS_SPOT_TEMP_FNAME_2 = 'transformation_template_APIv2.8.py'
+TRANS_SPOT_TEMP_FNAME_3 = 'transformation_template_Thermocycler_module_APIv2.8.py'
+TRANS_SPOT_TEMP_FNAME_4 = 'transformation_template_Thermocycler_module_12wellplate_APIv2.8.py'
+TRANS_SPOT_TEMP_FNAME_5 = 'transformation_template_384_APIv2.8.py'
+
+CLIP_FNAME_1 = '1_clip_ot2_APIv1.py'
+CLIP_FNAME_2 = '1_clip_ot2_APIv2.8.py'
+CLIP_FNAME_3 = '1_clip_ot2_Thermocycler_APIv2.8.py'
+
+MAGBEAD_FNAME_1 = '2_purification_ot2_APIv1.py'
+MAGBEAD_FNAME_2 = '2_purification_ot2_APIv2.8.py'
+
+F_ASSEMBLY_FNAME_1 = '3_assembly_ot2_APIv1.py'
+F_ASSEMBLY_FNAME_2 = '3_assembly_ot2_APIv2.8.py'
+F_ASSEMBLY_FNAME_3 = '3_assembly_ot2_Thermocycler_APIv2.8.py'
+F_ASSEMBLY_FNAME_4 = '3_assembly_ot2_384_APIv2.8.py'
+
+TRANS_SPOT_FNAME_1 = '4_transformation_ot2_APIv1.py'
+TRANS_SPOT_FNAME_2 = '4_transformation_ot2_APIv2.8.py'
+TRANS_SPOT_FNAME_3 = '4_transformation_ot2_Thermocycler_APIv2.8.py'
+TRANS_SPOT_FNAME_4 = '4_transformation_ot2_Thermocycler_12wellplate_APIv2.8.py'
+TRANS_SPOT_FNAME_5 = '4_transformation_ot2_384_APIv2.8.py'
+
+CLIPS_INFO_FNAME = 'clip_run_info.csv'
+FINAL_ASSEMBLIES_INFO_FNAME = 'final_assembly_run_info.csv'
+WELL_OUTPUT_FNAME = 'wells.txt'
+CONSTRUCT_ORDER_FNAME = 'construct_order.csv'
+VOLUMES_FNAME = 'volumes.csv'
+DECK_OUTPUT_FNAME = "deck.md"
+RUN_INFO_FNAME = 'run.json'
+# Columnar transfer table, extension of its format (runinfo.TABLE_FORMATS)
+RUN_TABLE_FNAME = 'run_wells'
+PLAN_FNAME = 'plan.json'
+MANIFEST_FNAME = 'manifest.json'
+
+# Constant floats/ints
+CLIP_DEAD_VOL = 60
+CLIP_VOL = 30
+T4_BUFF_VOL = 3
+BSAI_VOL = 1
+T4_LIG_VOL = 0.5
+CLIP_MAST_WATER = 15.5
+CLIP_LINKER_VOL = 1
+PART_PER_CLIP = 200
+MIN_VOL = 1
+MAX_CONSTRUCTS = 96
+MAX_CONSTRUCTS_384 = 384
+MAX_CLIPS = 48
+DEFAULT_PART_VOL = 1
+MAX_SOURCE_PLATES = 6
+MAX_FINAL_ASSEMBLY_TIPRACKS = 7
+MAX_MAGBEAD_SAMPLES = 48
+MAG_WELL_OFFSET = 48
+# CLIP product volumes (uL): elution volume and volume left on the beads
+#   (purification templates, elution_buffer_volume and ELUTION_DEAD_VOL),
+#   volume drawn by each final assembly (assembly templates, PART_VOL) and
+#   volume left in a purified CLIP well, out of reach of the pipette
+CLIP_ELUTION_VOL = 40
+CLIP_ELUTION_DEAD_VOL = 2
+ASSEMBLY_PART_VOL = 1.5
+CLIP_PRODUCT_DEAD_VOL = 5
+# Volumes (uL) of the templates followed by the volume ledger (see
+#   plan_volumes): clip master mix and tube rack wells, purification
+#   ethanol per wash and elution buffer well, final assembly volume,
+#   transformation assembly and SOC volumes
+CLIP_MASTER_MIX_VOL = T4_BUFF_VOL + BSAI_VOL + T4_LIG_VOL + CLIP_MAST_WATER
+CLIP_MASTER_MIX_WELL = 'A1'
+CLIP_WATER_WELL = 'A2'
+PURIF_ETHANOL_VOL = 150
+PURIF_ETHANOL_WASHES = 2
+PURIF_ELUTION_BUFFER_WELL = 'A1'
+PURIF_LIQUID_WASTE_WELL = 'A5'
+ASSEMBLY_TOTAL_VOL = 15
+TRANSFO_ASSEMBLY_VOL = 5
+TRANSFO_SOC_VOL = 125
+# Dead volume and capacity (uL) of the wells of each labware (settings key)
+WELL_VOLUMES = {
+    'clip_source_plate': (2, 200),
+    '24_tuberack_1500ul': (40, 1500),
+    '12_reservoir_21000ul': (1500, 21000),
+    '96_deepwellplate_2ml': (100, 2000),
+    'clip_plate': (0, 200),
+    'mix_plate': (CLIP_PRODUCT_DEAD_VOL, 200),
+    'final_assembly_plate': (0, 200),
+    'final_assembly_plate_384': (0, 50),
+    'transfo_plate': (0, 200),
+    'agar_plate': (0, None),
+}
+# Well of a planned transfer (see plan_transfers): volume ledger label,
+#   labware (settings key), deck slot, well, content and start volume (None
+#   when loaded by the user, 0 for wells filled by the run). dead_volume,
+#   when given, replaces that of WELL_VOLUMES; wells not ledgered are the
+#   empty wells of multichannel steps
+TransferWell = namedtuple('TransferWell', [
+    'label', 'labware', 'slot', 'well', 'content', 'start_volume',
+    'dead_volume', 'ledgered'], defaults=(None, None, None, True))
+# Transfer of plan_transfers: step, source and destination TransferWell (None
+#   for volumes coming from or going to outside the deck), volume (uL),
+#   content moved and construct of the final assembly
+Transfer = namedtuple('Transfer', [
+    'step', 'source', 'destination', 'volume', 'content', 'construct'],
+    defaults=(None,))
+
+# Constant dicts for 96 and 12 well plate formats
+SPOTTING_VOLS_DICT = {2: 5, 3: 5, 4: 5, 5: 5, 6: 5, 7: 5}
+SPOTTING_VOLS_DICT_12 = {2: 40, 3: 40, 4: 40, 5: 40, 6: 40, 7: 40}
+
+# Constant lists
+SOURCE_DECK_POS = ['2', '5', '8', '7', '10', '11']
+CLIP_COLUMNS = ['prefixes', 'parts', 'suffixes']
+
+# OT-2 scripts rendered by plan(): (script file name, template file name,
+#   {template variable: plan key})
+OT2_SCRIPTS = [
+    (CLIP_FNAME_1, CLIP_TEMP_FNAME_1,
+     {'clips_dict': 'clips_dict'}),
+    (CLIP_FNAME_2, CLIP_TEMP_FNAME_2,
+     {'clips_dict': 'clips_dict', '__LABWARES': 'labwares'}),
+    (CLIP_FNAME_3, CLIP_TEMP_FNAME_3,
+     {'clips_dict': 'clips_dict', '__LABWARES': 'labwares',
+      '__PARAMETERS': 'parameters'}),
+    (MAGBEAD_FNAME_1, MAGBEAD_TEMP_FNAME_1,
+     {'sample_number': 'magbead_sample_number', 'ethanol_well': 'etoh_well'}),
+    (MAGBEAD_FNAME_2, MAGBEAD_TEMP_FNAME_2,
+     {'sample_number': 'magbead_sample_number', 'ethanol_well': 'etoh_well',
+      '__LABWARES': 'labwares', '__PARAMETERS': 'parameters'}),
+    (F_ASSEMBLY_FNAME_1, F_ASSEMBLY_TEMP_FNAME_1,
+     {'final_assembly_dict': 'final_assembly_dict',
+      'tiprack_num': 'final_assembly_tipracks'}),
+    (F_ASSEMBLY_FNAME_2, F_ASSEMBLY_TEMP_FNAME_2,
+     {'final_assembly_dict': 'final_assembly_dict',
+      'tiprack_num': 'final_assembly_tipracks', '__LABWARES': 'labwares'}),
+    (F_ASSEMBLY_FNAME_3, F_ASSEMBLY_TEMP_FNAME_3,
+     {'final_assembly_dict': 'final_assembly_dict',
+      'tiprack_num': 'final_assembly_tipracks', '__LABWARES': 'labwares'}),
+    (TRANS_SPOT_FNAME_1, TRANS_SPOT_TEMP_FNAME_1,
+     {'spotting_tuples': 'spotting_tuples', 'soc_well': 'soc_well'}),
+    (TRANS_SPOT_FNAME_2, TRANS_SPOT_TEMP_FNAME_2,
+     {'spotting_tuples': 'spotting_tuples', 'soc_well': 'soc_well',
+      '__LABWARES': 'labwares', '__PARAMETERS': 'parameters'}),
+    (TRANS_SPOT_FNAME_3, TRANS_SPOT_TEMP_FNAME_3,
+     {'spotting_tuples': 'spotting_tuples', 'soc_well': 'soc_well',
+      '__LABWARES': 'labwares', '__PARAMETERS': 'parameters'}),
+    (TRANS_SPOT_FNAME_4, TRANS_SPOT_TEMP_FNAME_4,
+     {'spotting_tuples': 'spotting_tuples_12', 'soc_well': 'soc_well',
+      '__LABWARES': 'labwares', '__PARAMETERS': 'parameters'}),
+]
+
+# OT-2 scripts of runs using a 384 well final assembly plate: CLIP and
+#   purification scripts are shared with 96 well runs
+OT2_SCRIPTS_384 = [
+    script for script in OT2_SCRIPTS if script[0] in (
+        CLIP_FNAME_1, CLIP_FNAME_2, CLIP_FNAME_3, MAGBEAD_FNAME_1,
+        MAGBEAD_FNAME_2)] + [
+    (F_ASSEMBLY_FNAME_4, F_ASSEMBLY_TEMP_FNAME_4,
+     {'final_assembly_dict': 'final_assembly_dict',
+      'tiprack_num': 'final_assembly_tipracks', '__LABWARES': 'labwares'}),
+    (TRANS_SPOT_FNAME_5, TRANS_SPOT_TEMP_FNAME_5,
+     {'quadrant_spotting_tuples': 'quadrant_spotting_tuples',
+      'soc_well': 'soc_well', '__LABWARES': 'labwares',
+      '__PARAMETERS': 'parameters'}),
+]
+
+# Default OT-2 scripts by number of wells of the final assembly plate
+ASSEMBLY_PLATE_SCRIPTS = {96: OT2_SCRIPTS, 384: OT2_SCRIPTS_384}
+
+# Deck reports written by write_plan(): (slots parser, section title,
+#   script file names)
+DECK_SCRIPTS = [
+    (slots.get_positions_from_clip, "Clip reaction script",
+     (CLIP_FNAME_2, CLIP_FNAME_3)),
+    (slots.get_positions_from_purif, "Purification script",
+     (MAGBEAD_FNAME_2,)),
+    (slots.get_positions_from_assembly, "Assembly script",
+     (F_ASSEMBLY_FNAME_2, F_ASSEMBLY_FNAME_3, F_ASSEMBLY_FNAME_4)),
+    (slots.get_positions_from_transfo, "Transformation script",
+     (TRANS_SPOT_FNAME_2, TRANS_SPOT_FNAME_3, TRANS_SPOT_FNAME_4,
+      TRANS_SPOT_FNAME_5)),
+]
+
+
+def plan(constructs, sources_paths, settings, etoh_well='A11', soc_column=1,
+         template_dir=None, scripts=None, template_cache_dir=None,
+         selected=None, select_sources=False, assembly_plate_wells=96,
+         order_constructs=False, assign_slots=False, clip_tip_policy='always'):
+    """Plans a robot run in memory: no file is written and the working
+    directory is left untouched, so that many designs can be planned from a
+    single process.
+
+    Args:
+        constructs (str or list): path to a constructs csv file, or list of
+            construct rows as returned by read_constructs_csv.
+        sources_paths (list): paths to the sources csv files, in deck order,
+            or the registry of source plates to select from.
+        settings (dict): 'labwares' and 'parameters' settings, as in
+            default_settings.yaml.
+        etoh_well (str): well of the reagent container providing ethanol.
+        soc_column (int): column of the plate providing SOC media.
+        template_dir (str): template directory, default 'template_ot2_scripts'
+            next to the present script.
+        scripts (list): OT-2 scripts to render, default those of
+            ASSEMBLY_PLATE_SCRIPTS for assembly_plate_wells.
+        template_cache_dir (str): optional directory caching compiled
+            templates on disk (see templates.compile_template).
+        selected (list): file names of the scripts to render, default all
+            scripts. Others can be rendered later from the plan (see
+            render_plan).
+        select_sources (bool): only place on the deck the fewest plates of
+            sources_paths providing the constructs (see
+            select_source_plates).
+        assembly_plate_wells (int): number of wells of the final assembly
+            plate, 96 or 384 (up to MAX_CONSTRUCTS_384 constructs, placed
+            quadrant by quadrant, see mplates.quadrant_wells).
+        order_constructs (bool): reorder constructs before assigning final
+            assembly wells (see ordering.order_constructs), default csv
+            order.
+        assign_slots (bool): place the source plates, tip racks and tube
+            rack of the CLIP scripts on the slots minimising pipette travel
+            (see assign_clip_slots), default template and SOURCE_DECK_POS
+            slots.
+        clip_tip_policy (str): tip policy of the CLIP water and linker
+            transfers (see placement.TIP_POLICIES), other than 'always'
+            multi-dispensing them from each source well in the CLIP scripts
+            supporting it (see plan_clip_tips).
+
+    Returns:
+        dict: planning tables ('clips_df', 'clips_dict',
+            'final_assembly_dict', 'spotting_tuples', ...), 'literals', the
+            formatted template variables of all scripts, and 'scripts',
+            mapping each selected script file name to its rendered text.
+
+    """
+    if template_dir is None:
+        template_dir = os.path.join(abs_path, TEMPLATE_DIR_NAME)
+    if assembly_plate_wells not in ASSEMBLY_PLATE_SCRIPTS:
+        raise ValueError(
+            f'Unsupported final assembly plate: {assembly_plate_wells} wells.')
+    if scripts is None:
+        scripts = ASSEMBLY_PLATE_SCRIPTS[assembly_plate_wells]
+
+    # Args checking
+    if assembly_plate_wells == 384 and \
+            'final_assembly_plate_384' not in settings['labwares']:
+        raise ValueError("Labware 'final_assembly_plate_384' missing from the "
+                         "settings, needed by 384 well final assemblies.")
+    if not select_sources and len(sources_paths) > len(SOURCE_DECK_POS):
+        raise ValueError('Number of source plates exceeds deck positions.')
+
+    # Process inputs, checking constructs against sources before planning
+    with instrument.stage('sources_dict'):
+        if select_sources:
+            sources_index = generate_sources_index(
+                sources_paths, range(len(sources_paths)))
+        else:
+            sources_index = generate_sources_index(sources_paths)
+    with instrument.stage('constructs_list'):
+        constructs_list = load_constructs(
+            constructs, sources_index, max_constructs=MAX_CONSTRUCTS
+            if assembly_plate_wells == 96 else MAX_CONSTRUCTS_384)
+    if select_sources:
+        with instrument.stage('source_plates'):
+            sources_paths, sources_index = select_source_plates(
+                constructs_list, sources_paths, sources_index)
+    if order_constructs:
+        with instrument.stage('construct_order'):
+            construct_order = ordering.order_constructs(constructs_list)
+            constructs_list = constructs_list.take(construct_order)
+    else:
+        construct_order = None
+    with instrument.stage('clips_df'):
+        clips_df = generate_clips_df(constructs_list)
+
+    # Calculate OT2 script variables
+    with instrument.stage('clips_dict'):
+        clips_dict = generate_clips_dict(
+            clips_df,
+            sources_index
+            )
+    source_positions = SOURCE_DECK_POS[:len(sources_paths)]
+    slot_assignment = None
+    script_constants = {}
+    if assign_slots:
+        with instrument.stage('slot_assignment'):
+            slot_assignment, script_constants = assign_clip_slots(
+                clips_dict, source_positions, template_dir, scripts, selected,
+                clip_tip_policy)
+        if slot_assignment is not None:
+            plate_slots = slot_assignment.source_plates
+            for key in ('prefixes_plates', 'suffixes_plates', 'parts_plates'):
+                clips_dict[key] = [plate_slots[plate]
+                                   for plate in clips_dict[key]]
+            sources_index = sources_index.on_plates(plate_slots)
+            source_positions = [plate_slots[position]
+                                for position in source_positions]
+    clip_tips = None
+    if clip_tip_policy != 'always':
+        with instrument.stage('clip_tips'):
+            clip_tips, tip_constants = plan_clip_tips(
+                clips_dict, template_dir, scripts, selected, clip_tip_policy,
+                script_constants)
+        for fname, constants in tip_constants.items():
+            script_constants.setdefault(fname, {}).update(constants)
+    with instrument.stage('final_assembly_dict'):
+        final_assembly_dict = generate_final_assembly_dict(
+            constructs_list,
+            clips_df,
+            assembly_plate_wells
+            )
+        final_assembly_tipracks = calculate_final_assembly_tipracks(
+            final_assembly_dict,
+            MAX_FINAL_ASSEMBLY_TIPRACKS if assembly_plate_wells == 96
+            else None
+            )
+    with instrument.stage('spotting_tuples'):
+        if assembly_plate_wells == 96:
+            spotting_tuples = generate_spotting_tuples(
+                constructs_list,
+                SPOTTING_VOLS_DICT
+                )
+            spotting_tuples_12 = generate_spotting_tuples_12(
+                constructs_list,
+                SPOTTING_VOLS_DICT_12
+                )
+            quadrant_spotting_tuples = None
+        else:
+            spotting_tuples = spotting_tuples_12 = None
+            quadrant_spotting_tuples = generate_quadrant_spotting_tuples(
+                constructs_list,
+                SPOTTING_VOLS_DICT
+                )
+    with instrument.stage('metainformation'):
+        master_mix_df = generate_master_mix_df(clips_df['number'].sum())
+        sources_paths_df = generate_sources_paths_df(
+            sources_paths, source_positions)
+    run_plan = {
+        'template_dir': os.fspath(template_dir),
+        'constructs_list': constructs_list,
+        'construct_order': construct_order,
+        'clips_df': clips_df,
+        'sources_paths': list(sources_paths),
+        'sources_index': sources_index,
+        'clips_dict': clips_dict,
+        'magbead_sample_number': clips_df['number'].sum(),
+        'final_assembly_dict': final_assembly_dict,
+        'final_assembly_tipracks': final_assembly_tipracks,
+        'spotting_tuples': spotting_tuples,
+        'spotting_tuples_12': spotting_tuples_12,
+        'quadrant_spotting_tuples': quadrant_spotting_tuples,
+        'assembly_plate_wells': assembly_plate_wells,
+        'etoh_well': etoh_well,
+        'soc_column': soc_column,
+        'soc_well': f"A{soc_column}",
+        'labwares': settings['labwares'],
+        'parameters': settings['parameters'],
+        'master_mix_df': master_mix_df,
+        'sources_paths_df': sources_paths_df,
+        'slot_assignment': None if slot_assignment is None
+        else slot_assignment._asdict(),
+        'clip_tip_policy': clip_tip_policy,
+        'clip_tips': clip_tips,
+        'script_constants': script_constants
+    }
+    with instrument.stage('volumes'):
+        run_plan['volumes'] = plan_volumes(run_plan)
+    short = ledger.failures(run_plan['volumes'], ('short',))
+    if short:
+        raise ValueError('Wells would run dry during the run:\n  ' +
+                         '\n  '.join(short))
+
+    # Render OT2 scripts
+    with instrument.stage('rendering'):
+        run_plan['literals'] = {
+            key: templates.format_value(run_plan[key])
+            for _, _, variables in scripts for key in variables.values()}
+        run_plan['scripts'] = render_scripts(
+            run_plan['literals'], template_dir, scripts, selected,
+            template_cache_dir, script_constants)
+    with instrument.stage('decks'):
+        run_plan['decks'] = plan_decks(
+            template_dir, scripts, run_plan['scripts'], run_plan,
+            script_constants)
+    return run_plan
+
+
+def plan_volumes(run_plan):
+    """Follows the volume of every well of run_plan through the four steps
+    (see ledger.VolumeLedger), from the transfers of plan_transfers. Returns
+    the ledger.WellBalance of each well.
+
+    Source wells start with their volume from the sources csv files, when
+    given, and wells filled by the run empty. Reagent wells are filled by
+    the user, their minimum fill being reported.
+
+    """
+    volume_ledger = ledger.VolumeLedger()
+
+    def well(transfer_well):
+        if transfer_well is None or not transfer_well.ledgered:
+            return None
+        dead_volume, capacity = WELL_VOLUMES.get(transfer_well.labware,
+                                                 (0, None))
+        if transfer_well.dead_volume is not None:
+            dead_volume = transfer_well.dead_volume
+        return volume_ledger.well(
+            transfer_well.label, transfer_well.well, transfer_well.content,
+            transfer_well.start_volume, dead_volume, capacity)
+
+    for transfer in plan_transfers(run_plan):
+        volume_ledger.transfer(transfer.step, well(transfer.source),
+                               well(transfer.destination), transfer.volume)
+    return volume_ledger.balances()
+
+
+def plan_transfers(run_plan, positions=None):
+    """Yields the Transfer of every liquid handling of run_plan, in the
+    order of the four steps. The volume ledger (plan_volumes) and the
+    transfer table of the run record (generate_transfers) both follow them.
+
+    Multichannel steps (purification, SOC) move liquid on every channel of
+    a column, whether the column is full or not, the empty wells of the
+    column not being ledgered. Aspirations meant to empty a well, larger
+    than the well holds (purification sample and ethanol dead volumes), are
+    planned at the volume of liquid the well holds.
+
+    Args:
+        positions (dict): deck positions of each step (see step_positions),
+            giving the slots. Slots are those of the first script of each
+            step, other script variants may place labware elsewhere (see the
+            deck report), and missing without deck positions.
+
+    """
+    if positions is None:
+        positions = {}
+    clip_slots, purif_slots, assembly_slots, transfo_slots = (
+        positions.get(step, {}) for step in (
+            'clip', 'purification', 'assembly', 'transformation'))
+    sources = {(location.plate, location.well): (name, location.volume)
+               for name, locations in run_plan['sources_index'].items()
+               for location in locations}
+    clips_df = run_plan['clips_df']
+    clips_dict = run_plan['clips_dict']
+    clip_names = [
+        '|'.join((prefix, part, suffix))
+        for prefix, part, suffix, number in zip(
+            clips_df['prefixes'], clips_df['parts'], clips_df['suffixes'],
+            clips_df['number'].tolist())
+        for _ in range(number)]
+    clip_wells = mplates.final_wells(range(1, len(clip_names) + 1))
+
+    # CLIP reactions
+    tube_rack = clip_slots.get('tube_rack')
+    clip_plate_slot = clip_slots.get('destination_plate',
+                                     clip_slots.get('clip_plate'))
+    master_mix = TransferWell('clip tube rack', '24_tuberack_1500ul',
+                              tube_rack, CLIP_MASTER_MIX_WELL, 'master mix')
+    water = TransferWell('clip tube rack', '24_tuberack_1500ul', tube_rack,
+                         CLIP_WATER_WELL, 'water')
+
+    def source(key, index):
+        plate = clips_dict[f'{key}_plates'][index]
+        source_well = clips_dict[f'{key}_wells'][index]
+        return TransferWell(f'source plate {plate}', 'clip_source_plate',
+                            plate, source_well,
+                            *sources.get((plate, source_well), (None, None)))
+
+    for index, clip_well in enumerate(clip_wells):
+        destination = TransferWell('clip plate', 'clip_plate',
+                                   clip_plate_slot, clip_well, start_volume=0)
+        yield Transfer('clip', master_mix, destination, CLIP_MASTER_MIX_VOL,
+                       'master mix')
+        yield Transfer('clip', water, destination,
+                       clips_dict['water_vols'][index], 'water')
+        for key, volume in (('prefixes', CLIP_LINKER_VOL),
+                            ('suffixes', CLIP_LINKER_VOL),
+                            ('parts', clips_dict['parts_vols'][index])):
+            part_source = source(key, index)
+            yield Transfer('clip', part_source, destination, float(volume),
+                           part_source.content)
+    # Multi-dispensed water and linkers: each new tip also aspirates the
+    #   disposal volume, dropped with the tip
+    tip_policy = run_plan['clip_tip_policy']
+    if tip_policy != 'always':
+        reactions = len(clip_wells)
+        runs = placement.dispense_runs(clips_dict['water_vols'],
+                                       [water] * reactions)
+        for key in ('prefixes', 'suffixes'):
+            runs += placement.dispense_runs(
+                [CLIP_LINKER_VOL] * reactions,
+                [source(key, index) for index in range(reactions)])
+        for disposal_source, _, first in runs:
+            if first or tip_policy == 'aspiration':
+                yield Transfer('clip', disposal_source, None,
+                               placement.DISPOSAL_VOLUME,
+                               disposal_source.content)
+
+    # Purification, column by column, as the template: beads and CLIP
+    #   reaction mixed in the mix plate and moved back onto the magnetic
+    #   module, supernatant removed, ethanol washes, then elution of the
+    #   CLIP products into the magbead wells
+    bead_volume = CLIP_VOL * run_plan['parameters']['purif_bead_ratio']['value']
+    reservoir = purif_slots.get('reagant_plate')
+    ethanol = TransferWell('reagent reservoir', '12_reservoir_21000ul',
+                           reservoir, run_plan['etoh_well'], 'ethanol')
+    elution_buffer = TransferWell(
+        'reagent reservoir', '12_reservoir_21000ul', reservoir,
+        PURIF_ELUTION_BUFFER_WELL, 'elution buffer')
+    liquid_waste = TransferWell(
+        'reagent reservoir', '12_reservoir_21000ul', reservoir,
+        PURIF_LIQUID_WASTE_WELL, 'liquid waste', start_volume=0)
+    mag_wells = [mag_well for mag_wells in clips_df['mag_well']
+                 for mag_well in mag_wells]
+    column_number = -(-len(clip_wells) // mplates.PLATE_96.rows)
+    mix_wells = mplates.final_wells(
+        range(1, column_number * mplates.PLATE_96.rows + 1))
+    for channel, mix_well in enumerate(mix_wells):
+        row = mplates.PLATE_96.row_names[channel % mplates.PLATE_96.rows]
+        beads = TransferWell('bead plate', '96_deepwellplate_2ml',
+                             purif_slots.get('bead_plate'), f'{row}1',
+                             'beads')
+        # Emptied by the template, whatever the dead volume of the plate
+        mix = TransferWell('mix plate', 'mix_plate',
+                           purif_slots.get('mix_plate'), mix_well,
+                           start_volume=0, dead_volume=0)
+        # Wells of the column past the last CLIP reaction are empty
+        sampled = channel < len(clip_wells)
+        name = clip_names[channel] if sampled else None
+        sample = TransferWell('clip plate', 'clip_plate',
+                              purif_slots.get('clip_plate'), mix_well,
+                              start_volume=0, ledgered=sampled)
+        yield Transfer('purification', beads, mix, bead_volume, 'beads')
+        yield Transfer('purification', sample, mix, CLIP_VOL, name)
+        yield Transfer('purification', mix, sample, CLIP_VOL + bead_volume,
+                       name)
+        yield Transfer('purification', sample, liquid_waste,
+                       CLIP_VOL + bead_volume, 'supernatant')
+        for _ in range(PURIF_ETHANOL_WASHES):
+            yield Transfer('purification', ethanol, sample,
+                           PURIF_ETHANOL_VOL, 'ethanol')
+            yield Transfer('purification', sample, liquid_waste,
+                           PURIF_ETHANOL_VOL, 'ethanol')
+        yield Transfer('purification', elution_buffer, sample,
+                       CLIP_ELUTION_VOL, 'elution buffer')
+        if sampled:
+            product = TransferWell('clip plate', 'mix_plate',
+                                   purif_slots.get('clip_plate'),
+                                   mag_wells[channel], start_volume=0)
+            yield Transfer('purification', sample, product,
+                           CLIP_ELUTION_VOL - CLIP_ELUTION_DEAD_VOL, name)
+
+    # Final assembly: master mix of the construct size, then CLIP products
+    clip_products = dict(zip(mag_wells, clip_names))
+    if run_plan['assembly_plate_wells'] == 384:
+        assembly_labware = 'final_assembly_plate_384'
+    else:
+        assembly_labware = 'final_assembly_plate'
+    assembly_plate_slot = assembly_slots.get(
+        assembly_labware.replace('final_', ''),
+        assembly_slots.get('destination_plate'))
+    construct_names = dict(zip(run_plan['final_assembly_dict'],
+                               run_plan['constructs_list'].names))
+    for assembly_well, construct_clips in \
+            run_plan['final_assembly_dict'].items():
+        construct = construct_names[assembly_well]
+        size = len(construct_clips)
+        assembly = TransferWell('assembly plate', assembly_labware,
+                                assembly_plate_slot, assembly_well,
+                                start_volume=0)
+        content = f'master mix ({size} parts)'
+        master_mix = TransferWell(
+            'assembly tube rack', '24_tuberack_1500ul',
+            assembly_slots.get('tube_rack'),
+            'ABCD'[(size - 1) // 6] + str(size - 1), content)
+        yield Transfer('assembly', master_mix, assembly,
+                       ASSEMBLY_TOTAL_VOL - size * ASSEMBLY_PART_VOL, content,
+                       construct)
+        for mag_well in construct_clips:
+            product = TransferWell('clip plate', 'mix_plate',
+                                   assembly_slots.get('purified_sample_plate'),
+                                   mag_well, start_volume=0)
+            yield Transfer('assembly', product, assembly, ASSEMBLY_PART_VOL,
+                           clip_products[mag_well], construct)
+
+    # Transformation, plate by plate (quadrant by quadrant for 384 well
+    #   final assemblies, each with its own SOC plate): final assemblies,
+    #   SOC on every channel of each column, then spotting. Transformation
+    #   plate wells match final assembly wells, and are prefixed with the
+    #   quadrant number for 384 well final assemblies
+    if run_plan['quadrant_spotting_tuples'] is not None:
+        plates = run_plan['quadrant_spotting_tuples']
+        assembly_wells = mplates.quadrant_wells(
+            range(1, len(construct_names) + 1))
+    else:
+        plates = [run_plan['spotting_tuples']]
+        assembly_wells = list(construct_names)
+    assembly_wells = iter(assembly_wells)
+    transfo_assembly_slot = transfo_slots.get(
+        assembly_labware.replace('final_', ''))
+    transfo_plate_slot = transfo_slots.get('transformation_plate')
+    soc_column = str(run_plan['soc_column'])
+    for plate_number, spotting_tuples in enumerate(plates, 1):
+        prefix = f'{plate_number}:' if len(plates) > 1 else ''
+        spots = []
+        for _, target_wells, vols in spotting_tuples:
+            for target_well, vol in zip(target_wells, vols):
+                assembly_well = next(assembly_wells)
+                construct = construct_names[assembly_well]
+                transformation = TransferWell(
+                    'transformation plate', 'transfo_plate',
+                    transfo_plate_slot, prefix + target_well, start_volume=0)
+                spots.append((target_well, vol, transformation, construct))
+                yield Transfer(
+                    'transformation',
+                    TransferWell('assembly plate', assembly_labware,
+                                 transfo_assembly_slot, assembly_well,
+                                 start_volume=0),
+                    transformation, TRANSFO_ASSEMBLY_VOL, construct,
+                    construct)
+        transformations = {target_well: (transformation, construct)
+                           for target_well, _, transformation, construct
+                           in spots}
+        columns = dict.fromkeys(target_well[1:] for target_well, *_ in spots)
+        for column in columns:
+            for row in mplates.PLATE_96.row_names:
+                soc = TransferWell('SOC plate', '96_deepwellplate_2ml',
+                                   transfo_slots.get('SOC_plate'),
+                                   prefix + row + soc_column, 'SOC')
+                transformation, construct = transformations.get(
+                    row + column, (TransferWell(
+                        'transformation plate', 'transfo_plate',
+                        transfo_plate_slot, prefix + row + column,
+                        start_volume=0, ledgered=False), None))
+                yield Transfer('transformation', soc, transformation,
+                               TRANSFO_SOC_VOL, 'SOC', construct)
+        for target_well, vol, transformation, construct in spots:
+            yield Transfer(
+                'transformation', transformation,
+                TransferWell('agar plate', 'agar_plate',
+                             transfo_slots.get('agar_plate'),
+                             prefix + target_well, start_volume=0),
+                float(vol), construct, construct)
+
+
+def render_scripts(literals, template_dir, scripts, selected=None,
+                   template_cache_dir=None, script_constants=None):
+    """Renders the scripts listed in selected (default all scripts) from
+    formatted plan variables. Returns a dict mapping script file names to
+    script texts.
+
+    Args:
+        script_constants (dict): by script file name, values replacing
+            template constants (see templates.CompiledTemplate.render_literals).
+
+    """
+    if script_constants is None:
+        script_constants = {}
+    return {
+        fname: templates.compile_template(
+            os.path.join(template_dir, template_fname), template_cache_dir
+            ).render_literals(
+            {variable: literals[key] for variable, key in variables.items()},
+            script_constants.get(fname))
+        for fname, template_fname, variables in scripts
+        if selected is None or fname in selected}
+
+
+def assign_clip_slots(clips_dict, source_positions, template_dir, scripts,
+                      selected=None, tip_policy='always'):
+    """Assigns the slots of the source plates, tip racks and tube rack of
+    the CLIP scripts (scripts of selected taking clips_dict, default all
+    scripts) minimising the expected pipette travel (see
+    placement.assign_clip_slots). Returns the placement.SlotAssignment, or
+    None without CLIP scripts, and the template constants to replace in
+    each CLIP script (see render_scripts). Scripts whose template supports
+    it (TIP_POLICY constant) follow tip_policy, the others a new tip per
+    transfer (see placement.clip_aspirations): enough tip racks are placed
+    for the script using the most tips.
+
+    """
+    clip_decks = read_clip_decks(template_dir, scripts, selected)
+    if not clip_decks:
+        return None, {}
+    initial_tip = max((deck.constants.get('INITIAL_TIP', 'A1')
+                       for deck in clip_decks.values()),
+                      key=placement.tips_used)
+    tip_policies = [tip_policy if 'TIP_POLICY' in deck.constants
+                    else 'always' for deck in clip_decks.values()]
+    slot_assignment = placement.assign_clip_slots(
+        clips_dict, source_positions,
+        [(slots.get_positions_from_clip(deck), deck.modules)
+         for deck in clip_decks.values()],
+        initial_tip, tip_policies[0],
+        max(placement.tip_racks_needed(clips_dict, initial_tip, policy)
+            for policy in set(tip_policies)))
+    assigned = {'CANDIDATE_TIPRACK_SLOTS': slot_assignment.tip_racks,
+                'TUBE_RACK_POSITION': slot_assignment.tube_rack}
+    script_constants = {
+        fname: {name: value for name, value in assigned.items()
+                if name in deck.constants}
+        for fname, deck in clip_decks.items()}
+    return slot_assignment, script_constants
+
+
+def read_clip_decks(template_dir, scripts, selected=None):
+    """Returns the slots.DeckModel of the templates of the CLIP scripts
+    (scripts of selected taking clips_dict, default all scripts), by script
+    file name.
+
+    """
+    return {
+        fname: slots.read_deck(os.path.join(template_dir, template_fname))
+        for fname, template_fname, variables in scripts
+        if 'clips_dict' in variables
+        and (selected is None or fname in selected)}
+
+
+def plan_clip_tips(clips_dict, template_dir, scripts, selected, tip_policy,
+                   script_constants=None):
+    """Applies tip_policy to the CLIP scripts whose template supports it
+    (TIP_POLICY constant), and estimates the tips and time of their CLIP
+    step with it and with a new tip per transfer (see
+    placement.estimate_clip_step).
+
+    Args:
+        script_constants (dict): template constants already replaced in
+            each script, e.g. assigned slots.
+
+    Returns:
+        tuple: the report ({'tip_policy', 'scripts', 'estimates'}) and the
+            template constants to replace in each CLIP script (see
+            render_scripts).
+
+    Raises:
+        ValueError: no selected CLIP script supports tip policies.
+
+    """
+    if script_constants is None:
+        script_constants = {}
+    clip_decks = {
+        fname: deck.filled(dict(clips_dict=clips_dict,
+                                **script_constants.get(fname, {})))
+        for fname, deck in read_clip_decks(
+            template_dir, scripts, selected).items()
+        if 'TIP_POLICY' in deck.constants}
+    if not clip_decks:
+        raise ValueError(
+            f'No CLIP template supports the {tip_policy!r} tip policy.')
+    fname, deck = next(iter(clip_decks.items()))
+    positions = slots.get_positions_from_clip(deck)
+    labware_slots = {
+        'tube_rack': positions['tube_rack'],
+        'destination': positions.get('destination_plate',
+                                     positions['clip_plate']),
+        'trash': placement.TRASH_SLOT}
+    labware_slots.update({
+        ('source', plate): plate for key in (
+            'prefixes_plates', 'suffixes_plates', 'parts_plates')
+        for plate in clips_dict[key]})
+    initial_tip = deck.constants.get('INITIAL_TIP', 'A1')
+    estimates = [
+        placement.estimate_clip_step(
+            clips_dict, labware_slots, positions['tip_racks'], initial_tip,
+            policy)._asdict()
+        for policy in ('always', tip_policy)]
+    report = {'tip_policy': tip_policy, 'scripts': list(clip_decks),
+              'estimates': estimates}
+    return report, {fname: {'TIP_POLICY': tip_policy} for fname in clip_decks}
+
+
+def plan_decks(template_dir, scripts, fnames, values, script_constants=None):
+    """Returns the slots.DeckModel of each script of fnames: the deck model
+    of its template filled in with the planned variables deck positions
+    depend on (slots.PLANNED_CONSTANTS), so that scripts are not parsed
+    once written.
+
+    Args:
+        values (dict): value of the plan keys of the planned variables.
+        script_constants (dict): template constants replaced in each script
+            (see render_scripts).
+
+    """
+    if script_constants is None:
+        script_constants = {}
+    return {
+        fname: slots.read_deck(os.path.join(template_dir, template_fname)).filled(
+            dict({variable: values[key] for variable, key in variables.items()
+                  if variable in slots.PLANNED_CONSTANTS},
+                 **script_constants.get(fname, {})))
+        for fname, template_fname, variables in scripts if fname in fnames}
+
+
+def write_plan(run_plan, output_dir, construct_base, deck_scripts=None,
+               table_format='csv'):
+    """Writes the OT-2 scripts and metainformation of run_plan into
+    output_dir, metainformation files being prefixed with construct_base.
+    The run record (RUN_INFO_FNAME, see write_run_info) is streamed first,
+    the other metainformation files being formatted from it. The plan is
+    persisted to PLAN_FNAME so that other scripts can be rendered later (see
+    render_plan). Files already holding the same content are left untouched.
+
+    Args:
+        deck_scripts (list): deck reports to write, default DECK_SCRIPTS.
+        table_format (str): format of the transfer table written next to
+            the run record (runinfo.TABLE_FORMATS).
+
+    Returns:
+        list: paths of the files of the run, relative to output_dir.
+
+    """
+    # Dealing with output dir
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Write OT2 scripts
+    for fname, script in run_plan['scripts'].items():
+        write_file(output_dir / fname, script)
+
+    # Write non-OT2 scripts
+    metainfo_dir = output_dir / "metainformation"
+    metainfo_dir.mkdir(exist_ok=True)
+    metainfo_fnames = [f"{construct_base}_{fname}" for fname in (
+        RUN_INFO_FNAME, CLIPS_INFO_FNAME, FINAL_ASSEMBLIES_INFO_FNAME,
+        WELL_OUTPUT_FNAME, PLAN_FNAME, DECK_OUTPUT_FNAME)]
+    run_info_fname, clips_info_fname, final_assemblies_info_fname, \
+        well_output_fname, plan_fname, deck_output_fname = metainfo_fnames
+
+    run_info_path = metainfo_dir / run_info_fname
+    with instrument.stage(run_info_fname, kind='file',
+                          path=os.fspath(run_info_path)) as record:
+        with runinfo.RunWriter(
+                run_info_path,
+                metainfo_dir / f"{construct_base}_{RUN_TABLE_FNAME}",
+                table_format) as writer:
+            write_run_info(writer, run_plan, construct_base, output_dir,
+                           deck_scripts)
+        record['written'] = any(writer.written.values())
+    metainfo_fnames.append(writer.table_path.name)
+    run_info = writer.record
+
+    write_file(
+        metainfo_dir / clips_info_fname, format_clips_info(run_info),
+        newline='')
+    write_file(
+        metainfo_dir / final_assemblies_info_fname,
+        format_final_assemblies_info(run_info), newline='')
+    write_file(
+        metainfo_dir / well_output_fname,
+        'Magbead ethanol well: {}\nSOC column: {}'.format(
+            run_info['run']['etoh_well'], run_info['run']['soc_column']))
+    if run_info['construct_order'] is not None:
+        construct_order_fname = f"{construct_base}_{CONSTRUCT_ORDER_FNAME}"
+        write_file(
+            metainfo_dir / construct_order_fname,
+            format_construct_order(run_info['construct_order']),
+            newline='')
+        metainfo_fnames.append(construct_order_fname)
+    volumes_fname = f"{construct_base}_{VOLUMES_FNAME}"
+    write_file(metainfo_dir / volumes_fname,
+               format_volumes(run_info['volumes']), newline='')
+    metainfo_fnames.append(volumes_fname)
+    write_file(
+        metainfo_dir / plan_fname,
+        json.dumps({
+            'construct_base': construct_base,
+            'template_dir': run_plan['template_dir'],
+            'assembly_plate_wells': run_plan['assembly_plate_wells'],
+            'slot_assignment': run_plan['slot_assignment'],
+            'clip_tips': run_plan['clip_tips'],
+            'script_constants': run_plan['script_constants'],
+            'literals': run_plan['literals'],
+            'scripts': list(run_plan['scripts'])
+            }, indent=1))
+
+    # Write deck position info
+    write_file(metainfo_dir / deck_output_fname, format_deck_report(
+        run_info['decks'], run_info['slot_assignment'],
+        run_info['clip_tips']))
+    return list(run_plan['scripts']) + [
+        f"metainformation/{fname}" for fname in metainfo_fnames]
+
+
+def write_run_info(writer, run_plan, construct_base, output_dir,
+                   deck_scripts=None):
+    """Streams the run record of run_plan, section by section.
+
+    Args:
+        writer (runinfo.RunWriter): run record writer.
+        output_dir (str): directory of the written scripts, parsed for the
+            deck report when run_plan has no deck model of them.
+        deck_scripts (list): deck reports to write, default DECK_SCRIPTS.
+
+    """
+    writer.section('run', {
+        'schema_version': runinfo.SCHEMA_VERSION,
+        'construct_base': construct_base,
+        'assembly_plate_wells': run_plan['assembly_plate_wells'],
+        'etoh_well': run_plan['etoh_well'],
+        'soc_column': run_plan['soc_column'],
+        'soc_well': run_plan['soc_well'],
+        'scripts': list(run_plan['scripts']),
+        'table_format': writer.table_format})
+    writer.section('labwares', run_plan['labwares'])
+    writer.section('parameters', run_plan['parameters'])
+    writer.section('master_mix', runinfo.frame_table(run_plan['master_mix_df']))
+    writer.section('source_plates',
+                   runinfo.frame_table(run_plan['sources_paths_df']))
+    writer.section('clip_reactions', runinfo.frame_table(run_plan['clips_df']))
+    writer.section('final_assemblies', runinfo.table(
+        ['well', 'construct', 'clip_wells'],
+        [(well, name, clip_wells) for name, (well, clip_wells) in zip(
+            run_plan['constructs_list'].names,
+            run_plan['final_assembly_dict'].items())]))
+    construct_order = None
+    if run_plan['construct_order'] is not None:
+        construct_order = construct_order_table(
+            run_plan['constructs_list'], run_plan['construct_order'],
+            run_plan['assembly_plate_wells'])
+    writer.section('construct_order', construct_order)
+    writer.section('slot_assignment', run_plan['slot_assignment'])
+    writer.section('clip_tips', run_plan['clip_tips'])
+    report = deck_report(output_dir, run_plan['scripts'], deck_scripts,
+                         run_plan.get('decks'))
+    writer.section('decks', report)
+    writer.section('volumes', runinfo.table(
+        ledger.WellBalance._fields, run_plan['volumes']))
+    writer.table(runinfo.WELLS_SECTION, runinfo.WELLS_COLUMNS,
+                 generate_transfers(run_plan, step_positions(
+                     report, deck_scripts)))
+
+
+def step_positions(report, deck_scripts=None):
+    """Returns the deck positions of the first script of each step (clip,
+    purification, assembly, transformation) of a deck report (see
+    deck_report), deck_scripts (default DECK_SCRIPTS) listing the scripts
+    of the four steps in turn.
+
+    """
+    if deck_scripts is None:
+        deck_scripts = DECK_SCRIPTS
+    positions = {}
+    for step, (_, section, _) in zip(
+            ('clip', 'purification', 'assembly', 'transformation'),
+            deck_scripts):
+        positions[step] = next((deck['positions'] for deck in report
+                                if deck['section'] == section), {})
+    return positions
+
+
+def generate_transfers(run_plan, positions=None):
+    """Yields the transfers planned for run_plan (see plan_transfers), as
+    rows of runinfo.WELLS_COLUMNS. Source or destination columns are empty
+    for volumes coming from or going to outside the deck, e.g. the disposal
+    volume dropped with the tip.
+
+    Args:
+        positions (dict): deck positions of each step (see step_positions),
+            giving the slots.
+
+    """
+    labwares = run_plan['labwares']
+
+    def location(transfer_well):
+        if transfer_well is None:
+            return None, None, None, None
+        return (transfer_well.labware,
+                labwares.get(transfer_well.labware, {}).get('id'),
+                transfer_well.slot, transfer_well.well)
+
+    for transfer in plan_transfers(run_plan, positions):
+        yield (transfer.step, transfer.content, transfer.volume,
+               *location(transfer.source), *location(transfer.destination),
+               transfer.construct)
+
+
+def record_frame(record_table, tuple_columns=()):
+    """Returns a record table (see runinfo.table) as a pandas DataFrame,
+    lists of tuple_columns being turned back into tuples.
+
+    """
+    import pandas as pd
+    df = pd.DataFrame(record_table['rows'], columns=record_table['columns'])
+    for column in tuple_columns:
+        df[column] = [tuple(value) for value in df[column]]
+    return df
+
+
+def format_clips_info(run_info):
+    """Returns the csv text of the master mix, source plates and CLIP
+    reactions of a run record (see write_run_info).
+
+    """
+    clips_info = io.StringIO()
+    dfs_to_csv(
+        clips_info,
+        index=False,
+        MASTER_MIX=record_frame(run_info['master_mix']),
+        SOURCE_PLATES=record_frame(run_info['source_plates']),
+        CLIP_REACTIONS=record_frame(run_info['clip_reactions'],
+                                    tuple_columns=['mag_well'])
+        )
+    return clips_info.getvalue()
+
+
+def format_final_assemblies_info(run_info):
+    """Returns the csv text of the CLIP wells of each final assembly well of
+    a run record (see write_run_info).
+
+    """
+    final_assemblies_info = io.StringIO()
+    csvwriter = csv.writer(final_assemblies_info)
+    for final_assembly_well, _, construct_clips in \
+            run_info['final_assemblies']['rows']:
+        csvwriter.writerow([final_assembly_well, construct_clips])
+    return final_assemblies_info.getvalue()
+
+
+def final_assembly_wells(number, assembly_plate_wells=96):
+    """Returns the final assembly wells of the first number constructs."""
+    sample_numbers = range(1, number + 1)
+    if assembly_plate_wells == 384:
+        return mplates.quadrant_wells(sample_numbers)
+    return mplates.final_wells(sample_numbers)
+
+
+def construct_order_table(constructs_list, construct_order,
+                          assembly_plate_wells=96):
+    """Returns the record table (see runinfo.table) mapping each construct,
+    in assembly order, to its final assembly well in csv order and its
+    assigned well.
+
+    Args:
+        constructs_list (constructs.ConstructLibrary): reordered constructs.
+        construct_order (list): csv index of each construct of
+            constructs_list.
+
+    """
+    wells = final_assembly_wells(len(constructs_list), assembly_plate_wells)
+    return runinfo.table(
+        ['Construct', 'Original well', 'Assigned well'],
+        [(name, wells[index], well) for name, index, well in zip(
+            constructs_list.names, construct_order, wells)])
+
+
+def format_construct_order(construct_order):
+    """Returns the csv text of a construct order record table (see
+    construct_order_table).
+
+    """
+    construct_order_info = io.StringIO()
+    csvwriter = csv.writer(construct_order_info)
+    csvwriter.writerow(construct_order['columns'])
+    csvwriter.writerows(construct_order['rows'])
+    return construct_order_info.getvalue()
+
+
+def format_volumes(volumes):
+    """Returns the csv text of the volumes record table, steps joined by
+    '|' and unknown start volumes left empty.
+
+    """
+    volumes_info = io.StringIO()
+    csvwriter = csv.writer(volumes_info)
+    csvwriter.writerow(volumes['columns'])
+    steps = volumes['columns'].index('steps')
+    for row in volumes['rows']:
+        row = list(row)
+        row[steps] = '|'.join(row[steps])
+        csvwriter.writerow(row)
+    return volumes_info.getvalue()
+
+
+def write_file(path, text, newline=None):
+    """Writes text to path unless the file already holds it (see
+    manifest.write_if_changed), instrumented as a 'file' stage.
+
+    """
+    with instrument.stage(os.path.basename(path), kind='file',
+                          path=os.fspath(path)) as record:
+        record['written'] = manifest.write_if_changed(path, text, newline)
+    return record['written']
+
+
+def deck_report(output_dir, fnames, deck_scripts=None, decks=None):
+    """Returns the deck positions and labware IDs of the scripts of
+    output_dir listed in fnames, as a list of {'script', 'section',
+    'positions', 'labware_ids'}.
+
+    Args:
+        deck_scripts (list): deck reports to write, default DECK_SCRIPTS.
+        decks (dict): slots.DeckModel of scripts (see plan_decks). Scripts
+            without one are parsed (see slots.read_deck).
+
+    """
+    if deck_scripts is None:
+        deck_scripts = DECK_SCRIPTS
+    report = []
+    for get_positions, section, deck_fnames in deck_scripts:
+        for fname in deck_fnames:
+            if fname not in fnames:
+                continue
+            with instrument.stage('slots', script=fname):
+                if decks is not None and fname in decks:
+                    deck = decks[fname]
+                else:
+                    deck = slots.read_deck(Path(output_dir) / fname)
+                report.append({'script': fname, 'section': section,
+                               'positions': get_positions(deck),
+                               'labware_ids': deck.labware_ids()})
+    return report
+
+
+def format_deck_report(report, slot_assignment=None, clip_tips=None):
+    """Formats a deck report (see deck_report) as markdown.
+
+    Args:
+        slot_assignment (dict): optional slots assigned to the CLIP step
+            (see assign_clip_slots), reported with their expected travel.
+        clip_tips (dict): optional tip policy report of the CLIP step (see
+            plan_clip_tips).
+
+    """
+    deck_info = []
+    if slot_assignment is not None:
+        deck_info.append(format_slot_assignment(slot_assignment))
+    if clip_tips is not None:
+        deck_info.append(format_clip_tips(clip_tips))
+    for deck in report:
+        deck_info.append(slots.format_deck_info(
+            deck['positions'], section=f"{deck['section']}: {deck['script']}"))
+    return ''.join(deck_info)
+
+
+def format_slot_assignment(slot_assignment):
+    """Formats the slots assigned to the CLIP step (see assign_clip_slots)
+    as a deck report section.
+
+    """
+    lines = ['## Slot assignment (CLIP step)', '',
+             'Source plates: ' + ', '.join(
+                 f'{position} -> {slot}' for position, slot
+                 in slot_assignment['source_plates'].items()),
+             'Tip racks: ' + ', '.join(slot_assignment['tip_racks']),
+             f"Tube rack: {slot_assignment['tube_rack']}",
+             f"Expected pipette travel: {slot_assignment['travel']:.1f} m"]
+    if slot_assignment['default_travel'] is not None:
+        lines[-1] += (f" (template slots: "
+                      f"{slot_assignment['default_travel']:.1f} m)")
+    return '\n'.join(lines) + '\n\n'
+
+
+def format_clip_tips(clip_tips):
+    """Formats the tip policy report of the CLIP step (see plan_clip_tips)
+    as a deck report section, compared with a new tip per transfer.
+
+    """
+    always, estimate = clip_tips['estimates']
+    lines = [f"## Tip policy (CLIP step): {clip_tips['tip_policy']}", '',
+             f"Scripts: {', '.join(clip_tips['scripts'])}"]
+    for label, key, unit in (('Tips', 'tips', ''),
+                             ('Tip racks', 'tip_racks', ''),
+                             ('Aspirations', 'aspirations', ''),
+                             ('Pipette travel', 'travel', ' m')):
+        lines.append(f"{label}: {estimate[key]}{unit} "
+                     f"(new tip per transfer: {always[key]}{unit})")
+    lines.append(f"Estimated duration: {estimate['seconds'] / 60:.0f} min "
+                 f"(new tip per transfer: {always['seconds'] / 60:.0f} min)")
+    return '\n'.join(lines) + '\n\n'
+
+
+def render_plan(plan_path, selected=None, scripts=None, deck_scripts=None,
+                template_cache_dir=None):
+    """Renders scripts from a plan persisted by write_plan, without planning
+    again. Scripts are written next to the metainformation directory holding
+    plan_path, and the deck report, run record and run manifest (if any) are
+    updated.
+
+    Args:
+        selected (list): file names of the scripts to render, default all
+            scripts.
+        scripts (list): OT-2 scripts available, default those of
+            ASSEMBLY_PLATE_SCRIPTS for the final assembly plate of the plan.
+        deck_scripts (list): deck reports to write, default DECK_SCRIPTS.
+
+    """
+    plan_path = Path(plan_path).resolve()
+    metainfo_dir = plan_path.parent
+    output_dir = metainfo_dir.parent
+    with open(plan_path) as ifh:
+        persisted_plan = json.load(ifh)
+    if scripts is None:
+        scripts = ASSEMBLY_PLATE_SCRIPTS[
+            persisted_plan.get('assembly_plate_wells', 96)]
+
+    script_constants = persisted_plan.get('script_constants', {})
+    rendered = render_scripts(
+        persisted_plan['literals'], persisted_plan['template_dir'], scripts,
+        selected, template_cache_dir, script_constants)
+    for fname, script in rendered.items():
+        write_file(output_dir / fname, script)
+
+    fnames = list(persisted_plan['scripts'])
+    fnames += [fname for fname in rendered if fname not in fnames]
+    persisted_plan['scripts'] = fnames
+    write_file(plan_path, json.dumps(persisted_plan, indent=1))
+    construct_base = persisted_plan['construct_base']
+    literals = persisted_plan['literals']
+    planned_keys = {key for _, _, variables in scripts
+                    for variable, key in variables.items()
+                    if variable in slots.PLANNED_CONSTANTS and key in literals}
+    decks = plan_decks(
+        persisted_plan['template_dir'], scripts, fnames,
+        {key: json.loads(literals[key]) for key in planned_keys},
+        script_constants)
+    report = deck_report(output_dir, fnames, deck_scripts, decks)
+    write_file(
+        metainfo_dir / f"{construct_base}_{DECK_OUTPUT_FNAME}",
+        format_deck_report(report, persisted_plan.get('slot_assignment'),
+                           persisted_plan.get('clip_tips')))
+
+    relpaths = list(rendered) + [
+        f"metainformation/{construct_base}_{fname}"
+        for fname in (PLAN_FNAME, DECK_OUTPUT_FNAME)]
+
+    # Runs planned before run records were written have none to update
+    run_info_path = metainfo_dir / f"{construct_base}_{RUN_INFO_FNAME}"
+    if run_info_path.exists():
+        run_info = runinfo.load(run_info_path)
+        run_info['run']['scripts'] = fnames
+        run_info['decks'] = report
+        written = runinfo.write_record(
+            run_info_path, metainfo_dir / f"{construct_base}_{RUN_TABLE_FNAME}",
+            run_info, run_info['run'].get('table_format', 'csv'))
+        relpaths += [f"metainformation/{path.name}" for path in written]
+
+    # Keeps the manifest of the run in step with the files rewritten, so that
+    #   generating the run again finds it up to date
+    manifest_path = metainfo_dir / f"{construct_base}_{MANIFEST_FNAME}"
+    previous = manifest.load(manifest_path)
+    if previous is not None:
+        templates = dict(previous['templates'])
+        templates.update({
+            fname: manifest.fingerprint_file(os.path.join(
+                persisted_plan['template_dir'], template_fname))
+            for fname, template_fname, _ in scripts if fname in rendered})
+        artifacts = list(previous['artifacts'])
+        artifacts += [relpath for relpath in relpaths
+                      if relpath not in artifacts]
+        manifest.dump(manifest_path, {
+            'inputs': previous['inputs'],
+            'templates': templates,
+            'artifacts': manifest.record_artifacts(
+                output_dir, artifacts, previous['artifacts'])
+        })
+    return rendered
+
+
+def read_constructs_csv(path):
+    """Reads a constructs csv file. Returns the header row and the list of
+    construct rows, each stripped of empty cells and starting with the
+    construct name. Reading stops at the first row without linkers/parts.
+
+    """
+    with open(path, 'r') as csvfile:
+        csv_reader = csv.reader(csvfile)
+        header = next(csv_reader, [])
+        construct_rows = [construct for _, construct in
+                          __construct_rows(csv_reader)]
+    return header, construct_rows
+
+
+def iter_constructs_csv(path):
+    """Streams the construct rows of a constructs csv file as (row number,
+    construct row) tuples, construct rows being as in read_constructs_csv.
+
+    """
+    with open(path, 'r') as csvfile:
+        csv_reader = csv.reader(csvfile)
+        next(csv_reader, None)
+        yield from __construct_rows(csv_reader)
+
+
+def __construct_rows(csv_reader):
+    for construct in csv_reader:
+        construct = list(filter(None, construct))
+        if not construct[1:]:
+            break
+        yield csv_reader.line_num, construct
+
+
+def load_constructs(constructs_input, sources_index,
+                    max_constructs=MAX_CONSTRUCTS):
+    """Loads constructs into a constructs.ConstructLibrary, checking while
+    reading that every linker and part is found in sources_index and that
+    every construct has a supported number of parts. All problems are
+    reported at once, before any planning stage runs.
+
+    Args:
+        constructs_input (str or list): path to a constructs csv file, or
+            list of construct rows as returned by read_constructs_csv (row
+            numbers then count the header as row 1).
+        sources_index (dict): as returned by generate_sources_index (or
+            generate_sources_dict).
+        max_constructs (int): maximum number of constructs, None for no
+            limit.
+
+    Raises:
+        ValueError: too many constructs, or constructs not matching the
+            sources.
+
+    """
+    if isinstance(constructs_input, (str, os.PathLike)):
+        rows = iter_constructs_csv(constructs_input)
+    else:
+        rows = ((index + 2, construct)
+                for index, construct in enumerate(constructs_input))
+
+    library = constructs.ConstructLibrary()
+    unresolved = {}
+    unsupported = []
+    for row_number, construct in rows:
+        if max_constructs is not None and len(library) == max_constructs:
+            raise ValueError(
+                'Number of constructs exceeds maximum. Reduce construct number '
+                'in construct.csv, or use the --batch option.')
+        clips = process_construct(construct[1:])
+        for clip in clips:
+            for kind, name in zip(('Linker', 'Part', 'Linker'), clip):
+                if name not in sources_index:
+                    row_numbers = unresolved.setdefault((kind, name), [])
+                    if row_number not in row_numbers:
+                        row_numbers.append(row_number)
+        if len(clips) not in SPOTTING_VOLS_DICT:
+            unsupported.append((row_number, construct[0], len(clips)))
+        library.add(construct[0], clips)
+
+    if unresolved or unsupported:
+        messages = []
+        for (kind, name), row_numbers in unresolved.items():
+            messages.append('{} {} not found in sources, row{} {}'.format(
+                kind, name, 's' if len(row_numbers) > 1 else '',
+                ', '.join(str(row_number) for row_number in row_numbers)))
+        for row_number, name, part_number in unsupported:
+            messages.append(
+                f'Construct {name} (row {row_number}) has {part_number} '
+                f'parts, {min(SPOTTING_VOLS_DICT)} to '
+                f'{max(SPOTTING_VOLS_DICT)} are supported')
+        raise ValueError('Constructs do not match the sources:\n  ' +
+                         '\n  '.join(messages))
+    return library
+
+
+def process_construct(construct):
+    """Processes an individual construct (linkers and parts) into the tuple of
+    its CLIP reactions, each a (prefix linker, part, suffix linker) tuple.
+
+    """
+    def interogate_linker(linker):
+        """Interrogates linker to determine if the suffix linker is a UTR
+        linker.
+
+        """
+        if linker.startswith('U'):
+            return linker.split('-')[0] + '-S'
+        else:
+            return linker + "-S"
+
+    clips = []
+    for i, sequence in enumerate(construct):
+        if i % 2 != 0:
+            if i == len(construct) - 1:
+                suffix_linker = interogate_linker(construct[0])
+            else:
+                suffix_linker = interogate_linker(construct[i + 1])
+            clips.append((construct[i - 1] + '-P', sequence, suffix_linker))
+    return tuple(clips)
+
+
+def generate_constructs_list(path):
+    """Generates the constructs.ConstructLibrary of the constructs of a
+    constructs csv file, holding the CLIP reactions required by each
+    construct.
+
+    """
+    _, construct_rows = read_constructs_csv(path)
+    return generate_constructs_list_from_rows(construct_rows)
+
+
+def generate_constructs_list_from_rows(construct_rows,
+                                       max_constructs=MAX_CONSTRUCTS):
+    """Generates the constructs.ConstructLibrary of construct rows (construct
+    name followed by linkers and parts).
+
+    Args:
+        max_constructs (int): maximum number of constructs, None for no
+            limit, e.g. to screen libraries larger than a run.
+
+    """
+    # Errors
+    if max_constructs is not None and len(construct_rows) > max_constructs:
+        raise ValueError(
+            'Number of constructs exceeds maximum. Reduce construct number in '
+            'construct.csv, or use the --batch option.')
+
+    library = constructs.ConstructLibrary()
+    for construct in construct_rows:
+        library.add(construct[0], process_construct(construct[1:]))
+    return library
+
+
+def count_clips(constructs_list):
+    """Counts how many times each CLIP reaction is used across
+    constructs_list, a constructs.ConstructLibrary or a list of
+    constructs.Construct. Keys are (prefix, part, suffix) tuples ordered by
+    first occurrence, values are usage counts.
+
+    """
+    if isinstance(constructs_list, constructs.ConstructLibrary):
+        # CLIP codes are given in order of first occurrence
+        return Counter(dict(zip(constructs_list.clips,
+                                constructs_list.clip_counts())))
+    clip_counter = Counter()
+    for construct in constructs_list:
+        clip_counter.update(construct.clips)
+    return clip_counter
+
+
+def generate_clips_df(constructs_list):
+    """Generates a dataframe containing information about all the unique CLIP
+    reactions required to synthesise the constructs in constructs_list.
+
+    """
+    import numpy as np
+    import pandas as pd
+    clip_counter = count_clips(constructs_list)
+    clips_df = pd.DataFrame(list(clip_counter.keys()), columns=CLIP_COLUMNS)
+
+    # Error
+    if len(clips_df.index) > MAX_CLIPS:
+        raise ValueError(
+            'Number of CLIP reactions exceeds 48. Reduce number of constructs in construct.csv.')
+
+    # Count number of each CLIP reaction, from the CLIP product needed
+    clip_count = np.fromiter(clip_counter.values(), dtype=int,
+                             count=len(clip_counter))
+    clips_df['number'] = [int(i) for i in clip_replicates(clip_count).tolist()]
+
+    # Associate well/s for each CLIP reaction
+    clips_df['mag_well'] = pd.Series(
+        allocate_mag_wells(clips_df['number']),
+        index=clips_df.index, dtype=object)
+    return clips_df
+
+
+def assemblies_per_clip(elution_vol=CLIP_ELUTION_VOL,
+                        elution_dead_vol=CLIP_ELUTION_DEAD_VOL,
+                        part_vol=ASSEMBLY_PART_VOL,
+                        dead_vol=CLIP_PRODUCT_DEAD_VOL):
+    """Number of final assemblies one purified CLIP reaction serves: the
+    volume of CLIP product transferred out of the purification, less the
+    dead volume of the purified well, over the volume drawn by each final
+    assembly.
+
+    """
+    return int((elution_vol - elution_dead_vol - dead_vol) // part_vol)
+
+
+def clip_replicates(clip_counts, per_clip=None):
+    """Returns the number of reactions of each CLIP reaction needed to
+    provide clip_counts final assemblies, each reaction serving per_clip
+    final assemblies (default assemblies_per_clip()).
+
+    """
+    import numpy as np
+    if per_clip is None:
+        per_clip = assemblies_per_clip()
+    clip_counts = np.asarray(clip_counts, dtype=int)
+    return -(-clip_counts // per_clip)
+
+
+def allocate_mag_wells(numbers):
+    """Allocates purified CLIP reaction wells from the number of replicates
+    of each CLIP reaction, starting after MAG_WELL_OFFSET. Returns a list
+    with one tuple of wells per CLIP reaction.
+
+    Args:
+        numbers (list): number of replicates of each CLIP reaction.
+
+    Raises:
+        ValueError: the samples exceed MAX_MAGBEAD_SAMPLES or the magbead
+            plate.
+
+    """
+    import numpy as np
+    numbers = np.asarray(numbers, dtype=int)
+    samples = int(numbers.sum())
+    max_samples = min(MAX_MAGBEAD_SAMPLES,
+                      mplates.PLATE_96.size - MAG_WELL_OFFSET)
+    if samples > max_samples:
+        raise ValueError(
+            f'{samples} purified CLIP samples exceed the {max_samples} wells '
+            'of the magbead plate. Reduce number of constructs in '
+            'construct.csv.')
+    replicate_ends = np.cumsum(numbers)
+    sample_numbers = np.arange(1, samples + 1) + MAG_WELL_OFFSET
+    mag_wells = mplates.final_wells(sample_numbers)
+    return [tuple(mag_wells[end - number:end])
+            for number, end in zip(numbers.tolist(), replicate_ends.tolist())]
+
+
+def expand_sources_paths(paths):
+    """Returns the absolute paths of sources csv files, directories being
+    replaced by the csv files they contain, in name order.
+
+    """
+    sources_paths = []
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            sources_paths.extend(sorted(
+                os.path.join(path, fname) for fname in os.listdir(path)
+                if fname.lower().endswith('.csv')))
+        else:
+            sources_paths.append(path)
+    return sources_paths
+
+
+def generate_sources_index(paths, plates=None):
+    """Imports csv files containing a series of parts/linkers into a
+    sources.SourceIndex keeping every location of each part/linker.
+
+    Args:
+        paths (list): list of strings each corresponding to a path for a
+                      sources csv file.
+        plates (list): plate recorded for the locations of each path,
+            default SOURCE_DECK_POS, placing plates on the deck in the order
+            of paths.
+
+    """
+    if plates is None:
+        plates = SOURCE_DECK_POS
+    return sources.read_sources(paths, plates)
+
+
+def select_source_plates(constructs_list, sources_paths, registry):
+    """Selects the fewest source plates providing every linker and part of
+    constructs_list (see sources.select_plates), and places them on the deck
+    at SOURCE_DECK_POS, in the order of sources_paths.
+
+    Args:
+        constructs_list (ConstructLibrary): constructs of the run.
+        sources_paths (list): paths of the source plates of the registry.
+        registry (SourceIndex): sources of all plates, as returned by
+            generate_sources_index(sources_paths, range(len(sources_paths))).
+
+    Returns:
+        tuple: (paths of the selected plates, SourceIndex of their sources on
+            the deck).
+
+    Raises:
+        ValueError: the selected plates exceed deck positions.
+
+    """
+    plates = [set() for _ in sources_paths]
+    for name, locations in registry.items():
+        for location in locations:
+            plates[location.plate].add(name)
+    selection = sources.select_plates(
+        {name for clip in constructs_list.clips for name in clip}, plates)
+    if len(selection) > len(SOURCE_DECK_POS):
+        raise ValueError(
+            f'Constructs need {len(selection)} source plates, more than the '
+            f'{len(SOURCE_DECK_POS)} deck positions.')
+    return ([sources_paths[index] for index in selection],
+            registry.on_plates(dict(zip(selection, SOURCE_DECK_POS))))
+
+
+def generate_sources_dict(paths):
+    """Imports csvs files containing a series of parts/linkers with
+    corresponding information into a dictionary where the key corresponds with
+    part/linker and the value contains a tuple of corresponding information.
+
+    Records are normalised on load to (well, concentration, deck position),
+    with an empty concentration for 2 column csv files. Parts/linkers stocked
+    in several wells are given their first location, see
+    generate_sources_index for all of them.
+
+    Args:
+        paths (list): list of strings each corresponding to a path for a
+                      sources csv file.
+
+    """
+    return {name: tuple(locations[0][:3])
+            for name, locations in generate_sources_index(paths).items()}
+
+
+def calculate_part_vols(concentrations, max_part_vol):
+    """Calculates the part volume of each CLIP reaction from an array of part
+    concentrations (NaN when not provided), clipped to [MIN_VOL,
+    max_part_vol]. Returns an object array so that default and clipped
+    volumes keep the type of their constant.
+
+    """
+    import numpy as np
+    with np.errstate(divide='ignore'):
+        raw_vols = PART_PER_CLIP / concentrations
+    # Python round() rather than np.round() to keep exact decimal rounding
+    part_vols = np.array([round(vol, 1) for vol in raw_vols.tolist()],
+                         dtype=object)
+    rounded_vols = part_vols.astype(float)
+    part_vols[rounded_vols < MIN_VOL] = MIN_VOL
+    part_vols[rounded_vols > max_part_vol] = max_part_vol
+    part_vols[np.isnan(concentrations)] = DEFAULT_PART_VOL
+    return part_vols
+
+
+def generate_clips_dict(clips_df, sources_index):
+    """Using clips_df and sources_index, returns a clips_dict which acts as the
+    sole variable for the opentrons script "clip.ot2.py".
+
+    Parts/linkers stocked in several wells are drawn from each of them in
+    turn, according to their available volume (see sources.SourceAllocator),
+    the part volume following the concentration of the well drawn from.
+
+    """
+    import numpy as np
+    max_part_vol = CLIP_VOL - (T4_BUFF_VOL + BSAI_VOL + T4_LIG_VOL
+                               + CLIP_MAST_WATER + 2)
+
+    if any(source not in sources_index
+           for column in CLIP_COLUMNS for source in clips_df[column]):
+        sys.exit('likely part/linker not listed in sources.csv')
+
+    # Volumes at every location of the parts, all at once
+    part_names = list(dict.fromkeys(clips_df['parts']))
+    concentrations = np.array(
+        [float(location.concentration) if location.concentration else np.nan
+         for part in part_names for location in sources_index[part]])
+    all_part_vols = calculate_part_vols(concentrations, max_part_vol).tolist()
+    location_part_vols = {}
+    for part in part_names:
+        location_number = len(sources_index[part])
+        location_part_vols[part] = all_part_vols[:location_number]
+        del all_part_vols[:location_number]
+
+    # One entry per clip reaction replicate, drawing in script order
+    allocator = sources.SourceAllocator(sources_index)
+    clips_dict = {key: [] for key in (
+        'prefixes_wells', 'prefixes_plates', 'suffixes_wells',
+        'suffixes_plates', 'parts_wells', 'parts_plates', 'parts_vols',
+        'water_vols')}
+    for prefix, part, suffix, number in zip(
+            clips_df['prefixes'], clips_df['parts'], clips_df['suffixes'],
+            clips_df['number'].tolist()):
+        for _ in range(number):
+            prefix_location = allocator.take(prefix, CLIP_LINKER_VOL)
+            suffix_location = allocator.take(suffix, CLIP_LINKER_VOL)
+            position = allocator.choose(part)
+            part_vol = location_part_vols[part][position]
+            part_location = allocator.draw(part, position, float(part_vol))
+            clips_dict['prefixes_wells'].append(prefix_location.well)
+            clips_dict['prefixes_plates'].append(prefix_location.plate)
+            clips_dict['suffixes_wells'].append(suffix_location.well)
+            clips_dict['suffixes_plates'].append(suffix_location.plate)
+            clips_dict['parts_wells'].append(part_location.well)
+            clips_dict['parts_plates'].append(part_location.plate)
+            clips_dict['parts_vols'].append(part_vol)
+            clips_dict['water_vols'].append(max_part_vol - float(part_vol))
+    return clips_dict
+
+
+def generate_clips_index(clips_df):
+    """Indexes clips_df on the (prefix, part, suffix) tuple of each CLIP
+    reaction. Values are (clip row index, mag_well tuple).
+
+    """
+    return {clip: (clip_num, mag_wells) for clip_num, (clip, mag_wells) in
+            enumerate(zip(zip(*(clips_df[column] for column in CLIP_COLUMNS)),
+                          clips_df['mag_well']))}
+
+
+def generate_final_assembly_dict(constructs_list, clips_df,
+                                 assembly_plate_wells=96):
+    """Using constructs_list and clips_df, returns a dictionary of final
+    assemblies with keys defining destination plate well positions and values
+    indicating which clip reaction wells are used. The uses of a CLIP
+    reaction are spread evenly over its replicate wells, in construct order.
+
+    """
+    import numpy as np
+    final_assembly_dict = {}
+    clips_index = generate_clips_index(clips_df)
+    clips_count = np.zeros(len(clips_df.index), dtype=int)
+    clips_total = np.zeros(len(clips_df.index), dtype=int)
+    for clip, count in count_clips(constructs_list).items():
+        clips_total[clips_index[clip][0]] = count
+    wells = final_assembly_wells(len(constructs_list), assembly_plate_wells)
+    for well, construct in zip(wells, constructs_list):
+        construct_well_list = []
+        for clip in construct.clips:
+            clip_num, clip_wells = clips_index[clip]
+            clip_well = clip_wells[clips_count[clip_num] * len(clip_wells) //
+                                   clips_total[clip_num]]
+            clips_count[clip_num] += 1
+            construct_well_list.append(clip_well)
+        final_assembly_dict[well] = construct_well_list
+    return final_assembly_dict
+
+
+def calculate_final_assembly_tipracks(final_assembly_dict,
+                                      max_tipracks=MAX_FINAL_ASSEMBLY_TIPRACKS):
+    """Calculates the number of final assembly tipracks required ensuring
+    no more than max_tipracks are used (None for no limit, when tipracks are
+    refilled during the run).
+
+    """
+    final_assembly_lens = []
+    for values in final_assembly_dict.values():
+        final_assembly_lens.append(len(values))
+    master_mix_tips = len(list(set(final_assembly_lens)))
+    total_tips = master_mix_tips + sum(final_assembly_lens)
+    final_assembly_tipracks = total_tips // 96 + (
+        1 if total_tips % 96 > 0 else 0)
+    if max_tipracks is not None and final_assembly_tipracks > max_tipracks:
+        raise ValueError(
+            'Final assembly tiprack number exceeds number of slots. Reduce number of constructs in constructs.csv')
+    else:
+        return final_assembly_tipracks
+
+
+def generate_spotting_tuples(constructs_list, spotting_vols_dict):
+    """Using constructs_list, generates a spotting tuple
+    (Refer to 'transformation_spotting_template.py') for every column of
+    constructs, assuming the 1st construct is located in well A1 and wells
+    increase linearly. Target wells locations are equivalent to construct well
+    locations and spotting volumes are defined by spotting_vols_dict.
+
+    Args:
+        spotting_vols_dict (dict): Part number defined by keys, spottting
+            volumes defined by corresponding value.
+
+    """
+    # Calculate wells and volumes
+    wells = mplates.final_wells(range(1, len(constructs_list) + 1))
+    vols = [SPOTTING_VOLS_DICT[len(construct)]
+            for construct in constructs_list]
+
+    # Package spotting tuples, one per plate column
+    return [(tuple(column_wells), tuple(column_wells), tuple(column_vols))
+            for column_wells, column_vols in zip(
+                mplates.PLATE_96.lines(wells), mplates.PLATE_96.lines(vols))]
+
+# Introduced 12 well plate format for spotting
+def generate_spotting_tuples_12(constructs_list, spotting_vols_dict):
+    """Using constructs_list, generates a spotting tuple
+    (Refer to 'transformation_spotting_template.py') for every column of
+    constructs, assuming the 1st construct is located in well A1 and wells
+    increase linearly. Target wells locations are equivalent to construct well
+    locations and spotting volumes are defined by spotting_vols_dict.
+
+    Args:
+        spotting_vols_dict (dict): Part number defined by keys, spottting
+            volumes defined by corresponding value.
+
+    """
+    # Calculate wells and volumes
+    sample_numbers = range(1, len(constructs_list) + 1)
+    wells = mplates.final_wells(sample_numbers)
+    vols = [SPOTTING_VOLS_DICT_12[len(construct)]
+            for construct in constructs_list]
+    spot_wells = mplates.PLATE_12.plate_wells(sample_numbers)
+
+    # Package spotting tuples, one per 12 well plate
+    plate_size = mplates.PLATE_12.size
+    return [(tuple(wells[start:start + plate_size]),
+             tuple(spot_wells[start:start + plate_size]),
+             tuple(vols[start:start + plate_size]))
+            for start in range(0, len(constructs_list), plate_size)]
+
+
+def generate_quadrant_spotting_tuples(constructs_list, spotting_vols_dict):
+    """Spotting tuples of constructs assembled into a 384 well plate,
+    quadrant by quadrant (see mplates.quadrant_wells). Returns, for each
+    quadrant, the spotting tuples (refer to 'transformation_template_384'),
+    one per column of the quadrant: source wells are final assembly wells,
+    target wells the wells of the quadrant as a 96 well plate, used for both
+    the transformation plate and the agar plate of the quadrant.
+
+    Args:
+        spotting_vols_dict (dict): Part number defined by keys, spottting
+            volumes defined by corresponding value.
+
+    """
+    sample_numbers = range(1, len(constructs_list) + 1)
+    wells = mplates.quadrant_wells(sample_numbers)
+    target_wells = mplates.final_wells(
+        [(number - 1) % mplates.PLATE_96.size + 1 for number in sample_numbers])
+    vols = [spotting_vols_dict[len(construct)] for construct in constructs_list]
+
+    quadrant_spotting_tuples = []
+    plate_size = mplates.PLATE_96.size
+    for start in range(0, len(constructs_list), plate_size):
+        end = start + plate_size
+        quadrant_spotting_tuples.append([
+            (tuple(column_wells), tuple(column_targets), tuple(column_vols))
+            for column_wells, column_targets, column_vols in zip(
+                mplates.PLATE_96.lines(wells[start:end]),
+                mplates.PLATE_96.lines(target_wells[start:end]),
+                mplates.PLATE_96.lines(vols[start:end]))])
+    return quadrant_spotting_tuples
+
+
+def render_ot2_script(template_path, **kwargs):
+    """Renders an ot2 script from template_path, where kwargs are written as
+    global variables at the top of the script. For each kwarg, the keyword
+    defines the variable name while the value defines the name of the
+    variable. The remainder of template file is subsequently written below.
+    Returns the script text.
+
+    """
+    return templates.compile_template(template_path).render(**kwargs)
+
+
+def generate_ot2_script(ot2_script_path, template_path, **kwargs):
+    """Generates an ot2 script named 'ot2_script_path' (see
+    render_ot2_script).
+
+    """
+    with open(ot2_script_path, 'w') as wf:
+        wf.write(render_ot2_script(template_path, **kwargs))
+
+
+def generate_master_mix_df(clip_number):
+    """Generates a dataframe detailing the components required in the clip
+    reaction master mix.
+
+    """
+    import numpy as np
+    import pandas as pd
+    COMPONENTS = {'Component': ['Promega T4 DNA Ligase buffer, 10X',
+                                'Water', 'NEB BsaI-HFv2',
+                                'Promega T4 DNA Ligase']}
+    VOL_COLUMN = 'Volume (uL)'
+    master_mix_df = pd.DataFrame.from_dict(COMPONENTS)
+    master_mix_df[VOL_COLUMN] = (clip_number + CLIP_DEAD_VOL/CLIP_VOL) * \
+        np.array([T4_BUFF_VOL,
+                  CLIP_MAST_WATER,
+                  BSAI_VOL,
+                  T4_LIG_VOL])
+    return master_mix_df
+
+
+def generate_sources_paths_df(paths, deck_positions):
+    """Generates a dataframe detailing source plate information.
+
+    Args:
+        paths (list): list of strings specifying paths to source plates.
+        deck_positions (list): list of strings specifying candidate deck positions.
+
+    """
+    import pandas as pd
+    source_plates_dict = {'Deck position': [], 'Source plate': [], 'Path': []}
+    for index, path in enumerate(paths):
+        source_plates_dict['Deck position'].append(deck_positions[index])
+        source_plates_dict['Source plate'].append(os.path.basename(path))
+        source_plates_dict['Path'].append(path)
+    return pd.DataFrame(source_plates_dict)
+
+
+def dfs_to_csv(path, index=True, **kw_dfs):
+    """Generates a csv file defined by path, where kw_dfs are
+    written one after another with each key acting as a title. If index=True,
+    df indexes are written to the csv file. path may also be an open file
+    object.
+
+    """
+    if hasattr(path, 'write'):
+        __write_dfs(path, index, kw_dfs)
+    else:
+        with open(path, 'w', newline='') as csvfile:
+            __write_dfs(csvfile, index, kw_dfs)
+
+
+def __write_dfs(csvfile, index, kw_dfs):
+    csvwriter = csv.writer(csvfile)
+    for key, value in kw_dfs.items():
+        csvwriter.writerow([str(key)])
+        value.to_csv(csvfile, index=index)
+        csvwriter.writerow('')
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Machine-readable record of a run, for LIMS ingestion.
+
+A run record gathers in one JSON object everything the metainformation
+files describe: run settings, labware IDs, master mix, source plates, CLIP
+reactions, final assemblies, deck slots and the planned transfers of every
+well. Sections are streamed to disk as they are built (RunWriter), one line
+per section or table row, and the transfer table is also written as a
+columnar table: csv, or Parquet (pyarrow) on request. Files are only
+replaced when their content changes, as other artifacts of a run.
+
+Tables are stored as {"columns": [...], "rows": [[...], ...]}, tuples as
+lists.
+"""
+import csv
+import json
+import os
+from pathlib import Path
+
+SCHEMA_VERSION = 1
+# Section holding the transfer table, also written as a columnar table
+WELLS_SECTION = 'wells'
+WELLS_COLUMNS = (
+    'step', 'content', 'volume_ul', 'source_labware', 'source_labware_id',
+    'source_slot', 'source_well', 'destination_labware',
+    'destination_labware_id', 'destination_slot', 'destination_well',
+    'construct')
+# Formats of the columnar transfer table, the file extension
+TABLE_FORMATS = ('csv', 'parquet')
+
+
+def table(columns, rows):
+    """Returns the record table of rows, converting numpy scalars, tuples
+    and paths to JSON types.
+
+    """
+    return {'columns': list(columns),
+            'rows': [[_plain(value) for value in row] for row in rows]}
+
+
+def frame_table(df):
+    """Returns the record table of a pandas DataFrame, without its index."""
+    return table(df.columns, df.itertuples(index=False, name=None))
+
+
+def _plain(value):
+    if isinstance(value, tuple):
+        return [_plain(item) for item in value]
+    if isinstance(value, os.PathLike):
+        return os.fspath(value)
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def check_table_format(table_format):
+    """Checks that transfer tables can be written as table_format.
+
+    Raises:
+        ValueError: unknown table_format.
+        ImportError: Parquet table without pyarrow.
+
+    """
+    if table_format not in TABLE_FORMATS:
+        raise ValueError(
+            f'Unknown run table format {table_format!r}, expected one of '
+            f'{", ".join(TABLE_FORMATS)}.')
+    if table_format == 'parquet':
+        import pyarrow  # noqa: F401
+
+
+class RunWriter:
+    """Streams a run record to path, section by section.
+
+    Sections are written as soon as they are added and kept in record, so
+    that other files can be formatted from the record. Use as a context
+    manager: the record is completed and the transfer table written on exit,
+    written then mapping both paths to True if the file was written, files
+    holding the same content being left untouched. Nothing is written if an
+    exception was raised.
+
+    Args:
+        path (str): JSON file of the record.
+        table_path (str): columnar transfer table file, without extension.
+        table_format (str): format of the columnar transfer table
+            (TABLE_FORMATS), 'parquet' requiring pyarrow.
+
+    Raises:
+        ValueError, ImportError: see check_table_format.
+
+    """
+
+    def __init__(self, path, table_path, table_format='csv'):
+        check_table_format(table_format)
+        self.path = Path(path)
+        self.table_format = table_format
+        self.table_path = Path(f'{table_path}.{table_format}')
+        self.record = {}
+        self.written = {}
+        self._part = _part_path(self.path)
+        self._ofh = None
+
+    def __enter__(self):
+        self._ofh = open(self._part, 'w')
+        self._ofh.write('{')
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self._ofh.close()
+            os.remove(self._part)
+            return
+        self._ofh.write('\n}\n')
+        self._ofh.close()
+        self.written[self.path] = _replace_if_changed(self._part, self.path)
+        if WELLS_SECTION in self.record:
+            table_part = _part_path(self.table_path)
+            write_columns(table_part, self.record[WELLS_SECTION],
+                          self.table_format)
+            self.written[self.table_path] = _replace_if_changed(
+                table_part, self.table_path)
+
+    def section(self, name, value):
+        """Writes the section name holding value, kept in record as read
+        back from the file (tuples as lists).
+
+        """
+        self._key(name)
+        text = json.dumps(value)
+        self._ofh.write(text)
+        self._ofh.flush()
+        self.record[name] = json.loads(text)
+
+    def table(self, name, columns, rows):
+        """Writes the section name holding the table of rows, rows being
+        written as they are produced.
+
+        """
+        self._key(name)
+        self._ofh.write('{"columns": ' + json.dumps(list(columns)) +
+                        ', "rows": [')
+        kept = []
+        for index, row in enumerate(rows):
+            row = [_plain(value) for value in row]
+            self._ofh.write((',\n' if index else '\n') + json.dumps(row))
+            kept.append(row)
+        self._ofh.write('\n]}')
+        self._ofh.flush()
+        self.record[name] = {'columns': list(columns), 'rows': kept}
+
+    def _key(self, name):
+        self._ofh.write(('\n' if not self.record else ',\n') +
+                        json.dumps(name) + ': ')
+
+
+def write_record(path, table_path, record, table_format='csv'):
+    """Writes record, e.g. a loaded record updated (see load), as
+    RunWriter does. Returns the {path: written} of the files.
+
+    """
+    with RunWriter(path, table_path, table_format) as writer:
+        for name, value in record.items():
+            if name == WELLS_SECTION:
+                writer.table(name, value['columns'], value['rows'])
+            else:
+                writer.section(name, value)
+    return writer.written
+
+
+def load(path):
+    """Returns the run record stored at path."""
+    with open(path) as ifh:
+        return json.load(ifh)
+
+
+def write_columns(path, record_table, table_format='csv'):
+    """Writes a record table to path, as 'parquet' or 'csv'."""
+    if table_format == 'csv':
+        with open(path, 'w', newline='') as ofh:
+            csvwriter = csv.writer(ofh)
+            csvwriter.writerow(record_table['columns'])
+            csvwriter.writerows(record_table['rows'])
+        return
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    columns = record_table['columns']
+    values = list(zip(*record_table['rows'])) or [()] * len(columns)
+    pq.write_table(
+        pa.table({column: list(column_values)
+                  for column, column_values in zip(columns, values)}),
+        path)
+
+
+def _part_path(path):
+    return path.with_name(path.name + '.part')
+
+
+def _replace_if_changed(part, path):
+    """Moves part to path unless path already holds the same bytes, in which
+    case part is removed and path left untouched. Returns True if path was
+    written.
+
+    """
+    try:
+        with open(part, 'rb') as new, open(path, 'rb') as old:
+            if new.read() == old.read():
+                os.remove(part)
+                return False
+    except OSError:
+        pass
+    os.replace(part, path)
+    return True
@@ -1,20 +1,166 @@
 import ast
-import tabulate
-import pandas as pd
+import os
 from pathlib import Path
 
-# Preserve white space for markdown output
-#   used within to_markdown method from pandas df
-tabulate.PRESERVE_WHITESPACE = True
+try:
+    from . import mplates
+except ImportError:
+    import mplates
+
 MAXLEN_PLATE_NAME = 25
+# OT-2 deck: 12 slots in 4 rows of 3, numbered row by row from the front left
+DECK = mplates.PlateFormat(4, 3, column_major=False)
+# Planned variables, injected into the scripts, that deck positions depend on
+PLANNED_CONSTANTS = ("clips_dict", "__LABWARES")
 
-def get_positions_from_clip(fpath: Path) -> dict:
-    """Get labware slots from a clip reaction script
+# In-process cache of parsed scripts and templates:
+#   absolute path -> ((modification time in ns, size), DeckModel)
+_CACHE = {}
+
+
+class DeckModel:
+    """Deck of an OT-2 script: the literal constants of the script, among
+    which its slots, the labware of each labware constant and the modules
+    loaded. Templates provide the model of their scripts, filled in with the
+    planned variables (see filled), so that deck positions are known without
+    parsing the scripts written.
+
+    Parameters
+    ----------
+    constants : dict
+        literal value of each assigned name, the last assignment found
+        walking the script winning
+    labwares : dict
+        __LABWARES key of each constant set to a labware id
+    modules : list
+        names of the modules loaded, in script order
+    """
+
+    def __init__(self, constants=None, labwares=None, modules=None):
+        self.constants = {} if constants is None else constants
+        self.labwares = {} if labwares is None else labwares
+        self.modules = [] if modules is None else modules
+
+    def filled(self, variables: dict) -> "DeckModel":
+        """Returns the model of a script rendered with variables, the
+        template variables injected at the top of the script"""
+        return DeckModel(
+            dict(self.constants, **variables), self.labwares, self.modules)
+
+    def labware_ids(self) -> dict:
+        """Labware id of each labware constant, from the __LABWARES
+        variable"""
+        labwares = self.constants.get("__LABWARES", {})
+        return {name: labwares[key]["id"]
+                for name, key in self.labwares.items() if key in labwares}
+
+
+def _labware_key(node):
+    """__LABWARES key of a __LABWARES['key']['id'] expression, or None"""
+    if isinstance(node, ast.Subscript) and \
+            isinstance(node.value, ast.Subscript) and \
+            isinstance(node.value.value, ast.Name) and \
+            node.value.value.id == "__LABWARES":
+        try:
+            return ast.literal_eval(node.value.slice)
+        except ValueError:
+            return None
+    return None
+
+
+def parse_deck(source: str) -> DeckModel:
+    """Builds the deck model of a script or template source, walking its
+    syntax tree once"""
+    deck = DeckModel()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            labware_key = _labware_key(node.value)
+            if labware_key is not None:
+                deck.labwares[name] = labware_key
+                continue
+            try:
+                deck.constants[name] = ast.literal_eval(node.value)
+            except ValueError:
+                pass
+        elif isinstance(node, ast.Call) and \
+                isinstance(node.func, ast.Attribute) and \
+                node.func.attr == "load_module":
+            args = node.args[:1] + [keyword.value for keyword in node.keywords
+                                    if keyword.arg == "module_name"]
+            for arg in args:
+                if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                    deck.modules.append(arg.value)
+    return deck
+
+
+def read_deck(fpath: Path) -> DeckModel:
+    """Deck model of a script or template file, parsed once and cached
+    while the file is unchanged
 
     Parameters
     ----------
     fpath : Path
-        script file to be parsed
+        script or template file
+
+    Returns
+    -------
+    DeckModel
+        deck model, shared by callers: not to be modified
+    """
+    path = os.path.abspath(fpath)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(path) as ifh:
+        deck = parse_deck(ifh.read())
+    _CACHE[path] = (stamp, deck)
+    return deck
+
+
+def clear_cache():
+    """Empties the in-process cache of parsed scripts"""
+    _CACHE.clear()
+
+
+def _constants(source) -> dict:
+    """Constants of a DeckModel, or of the script at path source"""
+    if isinstance(source, (str, os.PathLike)):
+        source = read_deck(source)
+    return source.constants
+
+
+def _default_slot(deck: dict, key: str, slot: str, message: str) -> None:
+    """Sets deck[key] to slot when missing. Plates on the thermocycler are
+    not explicitely positioned in the scripts, the thermocycler being
+    always at position 7"""
+    if key not in deck:
+        used_slots = []
+        for item in deck:
+            if isinstance(item, list):
+                used_slots += item
+            if isinstance(item, str):
+                used_slots.append(item)
+        if slot in used_slots:
+            raise AssertionError(message)
+        deck[key] = slot
+
+
+def _positions(constants: dict, names: dict) -> dict:
+    """Deck positions named after the script constants of names"""
+    return {key: constants[name] for name, key in names.items()
+            if name in constants}
+
+
+def get_positions_from_clip(fpath) -> dict:
+    """Get labware slots from a clip reaction script
+
+    Parameters
+    ----------
+    fpath : Path or DeckModel
+        script file to be parsed, or its deck model
 
     Returns
     -------
@@ -27,69 +173,30 @@ def get_positions_from_clip(fpath: Path) -> dict:
             'tube_rack': str,
             'destination_plate': str
         }
-
-    Raises
-    ------
-    e
-        parsing error
     """
     DEFAULT_CLIP_PLATE_SLOT = "7"
+    constants = _constants(fpath)
     deck = {}
-
-    with open(fpath) as ifh:
-        code = ast.parse(ifh.read())
-
-    for node in ast.walk(code):
-        if isinstance(node, ast.Assign) and "id" in node.targets[0]._fields:
-            try:
-                name = node.targets[0].id
-                if name == "clips_dict":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["biolegio_plate"] = sorted(list(set(value["prefixes_plates"])))
-                    deck["parts_plates"] = sorted(list(set(value["parts_plates"])))
-                elif name == "CANDIDATE_TIPRACK_SLOTS":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["tip_racks"] = value
-                elif name == "TUBE_RACK_POSITION":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["tube_rack"] = value
-                elif name == "DESTINATION_PLATE_POSITION":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["destination_plate"] = value
-                else:
-                    pass
-            except Exception as e:
-                ast.dump(node)
-                raise e
-    # Destination plate is only explicitely defined in the 
-    #   no thermocycler script, but not in the with thermo
-    #   script. The thermocycler is always at position
-    #   position 7
-    if "clip_plate" not in deck:
-        used_slots = []
-        for item in deck:
-            if isinstance(item, list):
-                used_slots += item
-            if isinstance(item, str):
-                used_slots.append(item)
-        if DEFAULT_CLIP_PLATE_SLOT in used_slots:
-            raise AssertionError(f"Slot {DEFAULT_CLIP_PLATE_SLOT} already used for clip plate.")
-        deck["clip_plate"] = DEFAULT_CLIP_PLATE_SLOT
-
+    if "clips_dict" in constants:
+        clips_dict = constants["clips_dict"]
+        deck["biolegio_plate"] = sorted(list(set(clips_dict["prefixes_plates"])))
+        deck["parts_plates"] = sorted(list(set(clips_dict["parts_plates"])))
+    deck.update(_positions(constants, {
+        "CANDIDATE_TIPRACK_SLOTS": "tip_racks",
+        "TUBE_RACK_POSITION": "tube_rack",
+        "DESTINATION_PLATE_POSITION": "destination_plate"}))
+    _default_slot(deck, "clip_plate", DEFAULT_CLIP_PLATE_SLOT,
+                  f"Slot {DEFAULT_CLIP_PLATE_SLOT} already used for clip plate.")
     return deck
 
 
-def get_positions_from_purif(fpath: Path) -> dict:
+def get_positions_from_purif(fpath) -> dict:
     """Get labware positions from a purification / magbead script
 
     Parameters
     ----------
-    fpath : Path
-        script file to be parsed
+    fpath : Path or DeckModel
+        script file to be parsed, or its deck model
 
     Returns
     -------
@@ -102,54 +209,29 @@ def get_positions_from_purif(fpath: Path) -> dict:
             'reagant_container_plate': str,
             'bead_container_plate': str
         }
-
-    Raises
-    ------
-    e
-        parsing error
     """
-    deck = {}
-    with open(fpath) as ifh:
-        code = ast.parse(ifh.read())
-    for node in ast.walk(code):
-        if isinstance(node, ast.Assign) and "id" in node.targets[0]._fields:
-            try:
-                name = node.targets[0].id
-                if name == "CANDIDATE_TIPRACK_SLOTS":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["tip_racks"] = value
-                if name == "MAGDECK_POSITION":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["clip_plate"] = value
-                elif name == "MIX_PLATE_POSITION":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["mix_plate"] = value
-                elif name == "REAGENT_CONTAINER_POSITION":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["reagant_plate"] = value
-                elif name == "BEAD_CONTAINER_POSITION":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["bead_plate"] = value
-                else:
-                    pass
-            except Exception as e:
-                ast.dump(node)
-                raise e
-    return deck
+    return _positions(_constants(fpath), {
+        "CANDIDATE_TIPRACK_SLOTS": "tip_racks",
+        "MAGDECK_POSITION": "clip_plate",
+        "MIX_PLATE_POSITION": "mix_plate",
+        "REAGENT_CONTAINER_POSITION": "reagant_plate",
+        "BEAD_CONTAINER_POSITION": "bead_plate"})
+
 
+def _name_assembly_plate(deck: dict, assembly_plate_wells: int) -> None:
+    """Names the final assembly plate after its number of wells, when not a
+    96 well plate (ASSEMBLY_PLATE_WELLS of the 384 well scripts)"""
+    if assembly_plate_wells != 96 and "assembly_plate" in deck:
+        deck[f"assembly_plate_{assembly_plate_wells}"] = deck.pop("assembly_plate")
 
-def get_positions_from_assembly(fpath: Path) -> dict:
+
+def get_positions_from_assembly(fpath) -> dict:
     """Get labware positions from an assembly script
 
     Parameters
     ----------
-    fpath : Path
-        script file to be parsed
+    fpath : Path or DeckModel
+        script file to be parsed, or its deck model
 
     Returns
     -------
@@ -161,75 +243,29 @@ def get_positions_from_assembly(fpath: Path) -> dict:
             'destination_plate': str,
             'tube_rack': str
         }
-
-    Raises
-    ------
-    e
-        parsing error
     """
     DEFAULT_DESTINATION_PLATE_SLOT = "7"
-    deck = {}
-    with open(fpath) as ifh:
-        code = ast.parse(ifh.read())
-    for node in ast.walk(code):
-        if isinstance(node, ast.Assign) and "id" in node.targets[0]._fields:
-            try:
-                name = node.targets[0].id
-                if name == "CANDIDATE_TIPRACK_SLOTS":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["tip_racks"] = value
-                if name == "MAG_PLATE_POSITION":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["purified_sample_plate"] = value
-                elif name == "TUBE_RACK_POSITION":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["tube_rack"] = value
-                elif name == "REAGENT_CONTAINER_POSITION":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["reagant_plate"] = value
-                elif name == "BEAD_CONTAINER_POSITION":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["bead_plate"] = value
-                elif name == "TEMPDECK_SLOT":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["assembly_plate"] = value
-                else:
-                    pass
-            except Exception as e:
-                ast.dump(node)
-                raise e
-
-    # Destination plate is only explicitely defined in the 
-    #   no thermocycler script, but not in the with thermo
-    #   script. The thermocycler is always at position
-    #   position 7
-    if "destination_plate" not in deck:
-        used_slots = []
-        for item in deck:
-            if isinstance(item, list):
-                used_slots += item
-            if isinstance(item, str):
-                used_slots.append(item)
-        if DEFAULT_DESTINATION_PLATE_SLOT in used_slots:
-            raise AssertionError(f"Destination slot {DEFAULT_DESTINATION_PLATE_SLOT} already used.")
-        deck["destination_plate"] = DEFAULT_DESTINATION_PLATE_SLOT
-
+    constants = _constants(fpath)
+    deck = _positions(constants, {
+        "CANDIDATE_TIPRACK_SLOTS": "tip_racks",
+        "MAG_PLATE_POSITION": "purified_sample_plate",
+        "TUBE_RACK_POSITION": "tube_rack",
+        "REAGENT_CONTAINER_POSITION": "reagant_plate",
+        "BEAD_CONTAINER_POSITION": "bead_plate",
+        "TEMPDECK_SLOT": "assembly_plate"})
+    _name_assembly_plate(deck, constants.get("ASSEMBLY_PLATE_WELLS", 96))
+    _default_slot(deck, "destination_plate", DEFAULT_DESTINATION_PLATE_SLOT,
+                  f"Destination slot {DEFAULT_DESTINATION_PLATE_SLOT} already used.")
     return deck
 
 
-def get_positions_from_transfo(fpath: Path) -> dict:
+def get_positions_from_transfo(fpath) -> dict:
     """Get labware positions from aa transformation script
 
     Parameters
     ----------
-    fpath : Path
-        script file to be parsed
+    fpath : Path or DeckModel
+        script file to be parsed, or its deck model
 
     Returns
     -------
@@ -244,69 +280,20 @@ def get_positions_from_transfo(fpath: Path) -> dict:
             "assembly_plate": str,
             "transformation_plate": str
         }
-
-    Raises
-    ------
-    e
-        parsing error
     """
     DEFAULT_TRANSFORMATION_PLATE_SLOT = "7"
-    deck = {}
-    with open(fpath) as ifh:
-        code = ast.parse(ifh.read())
-    for node in ast.walk(code):
-        if isinstance(node, ast.Assign) and "id" in node.targets[0]._fields:
-            try:
-                name = node.targets[0].id
-                if name == "CANDIDATE_p20_SLOTS":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["tip_racks_p20"] = value
-                if name == "CANDIDATE_P300_SLOTS":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["tip_racks_p300"] = value
-                if name == "TUBE_RACK_SLOT":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["tube_rack"] = value
-                if name == "ASSEMBLY_PLATE_SLOT":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["assembly_plate"] = value
-                elif name == "SOC_PLATE_SLOT":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["SOC_plate"] = value
-                elif name == "AGAR_PLATE_SLOT":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["agar_plate"] = value
-                elif name == "TEMPDECK_SLOT":
-                    literal_value = ast.unparse(node.value)
-                    value = ast.literal_eval(literal_value)
-                    deck["transformation_plate"] = value
-                else:
-                    pass
-            except Exception as e:
-                ast.dump(node)
-                raise e
-
-    # Transformation plate is only explicitely defined in the 
-    #   no thermocycler script, but not in the with thermo
-    #   script. The thermocycler is always at position
-    #   position 7
-    if "transformation_plate" not in deck:
-        used_slots = []
-        for item in deck:
-            if isinstance(item, list):
-                used_slots += item
-            if isinstance(item, str):
-                used_slots.append(item)
-        if DEFAULT_TRANSFORMATION_PLATE_SLOT in used_slots:
-            raise AssertionError(f"Transformation slot {DEFAULT_TRANSFORMATION_PLATE_SLOT} already used.")
-        deck["transformation_plate"] = DEFAULT_TRANSFORMATION_PLATE_SLOT
-
+    constants = _constants(fpath)
+    deck = _positions(constants, {
+        "CANDIDATE_p20_SLOTS": "tip_racks_p20",
+        "CANDIDATE_P300_SLOTS": "tip_racks_p300",
+        "TUBE_RACK_SLOT": "tube_rack",
+        "ASSEMBLY_PLATE_SLOT": "assembly_plate",
+        "SOC_PLATE_SLOT": "SOC_plate",
+        "AGAR_PLATE_SLOT": "agar_plate",
+        "TEMPDECK_SLOT": "transformation_plate"})
+    _name_assembly_plate(deck, constants.get("ASSEMBLY_PLATE_WELLS", 96))
+    _default_slot(deck, "transformation_plate", DEFAULT_TRANSFORMATION_PLATE_SLOT,
+                  f"Transformation slot {DEFAULT_TRANSFORMATION_PLATE_SLOT} already used.")
     return deck
 
 
@@ -322,6 +309,13 @@ def format_deck_info(deck: dict, section="Deck info") -> str:
     str
         Formated string
     """
+    import pandas as pd
+    import tabulate
+
+    # Preserve white space for markdown output
+    #   used within to_markdown method from pandas df
+    tabulate.PRESERVE_WHITESPACE = True
+
     # Table of position per plate type
     data = {"Plate": [], "Positions": []}
     for plate, position in deck.items():
@@ -338,7 +332,7 @@ def format_deck_info(deck: dict, section="Deck info") -> str:
     plate_table = df.to_markdown(tablefmt="grid", index=False)
 
     # Deck representation
-    data = ["-" for i in range(11)] + ["bin"]
+    data = ["-" for i in range(DECK.size - 1)] + ["bin"]
     for plate, position in deck.items():
         if isinstance(position, str):
             data[int(position)-1] = plate
@@ -350,7 +344,7 @@ def format_deck_info(deck: dict, section="Deck info") -> str:
     for i in range(len(data)):  # Prettify
         data[i] = data[i].replace("_", " ")
         data[i] = f"{i+1:2d} | {data[i]:^{MAXLEN_PLATE_NAME}}"
-    df = pd.DataFrame([data[i:i+3] for i in range(0, len(data), 3)])
+    df = pd.DataFrame(DECK.lines(data))
     df = df.iloc[::-1]
     deck_table = df.to_markdown(index=False, headers="", tablefmt="grid", stralign="center")
 
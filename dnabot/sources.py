@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Index of the source plates: every location of every part and linker.
+
+The same part or linker may be stocked in several wells, on one or several
+plates, so that high-use linkers do not run dry. The index keeps all of them,
+in the order of the source csv files, and a SourceAllocator spreads the
+aspirations of a run across them. When the source files form a registry of
+more plates than the deck holds, select_plates picks the fewest plates
+providing a design.
+"""
+import csv
+import itertools
+from collections import namedtuple
+
+# Largest number of plate combinations tried by the exact search of
+#   select_plates, above which the greedy cover is kept
+EXACT_MAX_COMBINATIONS = 100000
+
+# Location of a part/linker. concentration is the csv string ('' when not
+#   provided), volume the available volume in uL (None when not provided)
+Location = namedtuple('Location', ['well', 'concentration', 'plate', 'volume'])
+
+
+class SourceIndex(dict):
+    """Dictionary of part/linker name to the list of its Locations."""
+
+    def add(self, name, location):
+        self.setdefault(name, []).append(location)
+
+    def duplicates(self):
+        """Returns the names stocked in more than one location."""
+        return [name for name, locations in self.items()
+                if len(locations) > 1]
+
+    def on_plates(self, plates):
+        """Returns the index restricted to the locations on some plates.
+
+        Args:
+            plates (dict): plate of the locations to keep to the plate to
+                record instead, e.g. their deck position.
+
+        """
+        index = SourceIndex()
+        for name, locations in self.items():
+            for location in locations:
+                if location.plate in plates:
+                    index.add(name, location._replace(
+                        plate=plates[location.plate]))
+        return index
+
+
+def read_sources(paths, plates):
+    """Reads source csv files into a SourceIndex.
+
+    Columns are part/linker name, well, and optionally concentration (ng/uL)
+    and available volume (uL), the first line being a header.
+
+    Args:
+        paths (list): paths of the source csv files.
+        plates (list): plate of each path, e.g. its deck position.
+
+    """
+    index = SourceIndex()
+    for path, plate in zip(paths, plates):
+        with open(path, 'r') as csvfile:
+            csv_reader = csv.reader(csvfile)
+            next(csv_reader, None)
+            for row in csv_reader:
+                if not row:
+                    continue
+                concentration = row[2] if len(row) > 2 else ''
+                volume = float(row[3]) if len(row) > 3 and row[3] else None
+                index.add(str(row[0]),
+                          Location(row[1], concentration, plate, volume))
+    return index
+
+
+def select_plates(required, plates, max_combinations=EXACT_MAX_COMBINATIONS):
+    """Returns the indexes, in increasing order, of the fewest plates
+    providing every required name (a set cover).
+
+    Plates providing nothing more than another one are discarded, and plates
+    that are the only ones providing a name are always selected. The other
+    plates are then chosen greedily, the plate providing the most names not
+    yet provided first. When it takes at most max_combinations combinations
+    of the remaining plates, an exact search then looks for a smaller
+    selection than the greedy one. Ties go to the first plates.
+
+    Args:
+        required (iterable): names to provide.
+        plates (list): set of the names of each plate.
+        max_combinations (int): budget of the exact search.
+
+    Raises:
+        ValueError: required names provided by no plate.
+
+    """
+    required = set(required)
+    missing = required.difference(*plates)
+    if missing:
+        raise ValueError('Not found in any source plate: ' +
+                         ', '.join(sorted(missing)))
+    useful = [frozenset(required.intersection(plate)) for plate in plates]
+
+    # Plates not dominated by a larger, or identical and earlier, plate
+    candidates = [
+        index for index, names in enumerate(useful) if names and not any(
+            names <= other_names and
+            (len(other_names) > len(names) or other < index)
+            for other, other_names in enumerate(useful) if other != index)]
+
+    # Plates being the only candidate providing a name
+    providers = {}
+    for index in candidates:
+        for name in useful[index]:
+            providers.setdefault(name, []).append(index)
+    selected = sorted({indexes[0] for indexes in providers.values()
+                       if len(indexes) == 1})
+    remaining = required.difference(*(useful[index] for index in selected))
+    candidates = [index for index in candidates if index not in selected and
+                  useful[index] & remaining]
+
+    # Greedy cover of the remaining names
+    cover = []
+    uncovered = set(remaining)
+    while uncovered:
+        best = max(candidates,
+                   key=lambda index: (len(useful[index] & uncovered), -index))
+        cover.append(best)
+        uncovered -= useful[best]
+
+    # Exact search of a smaller cover, smallest sizes first
+    combinations = 1
+    for size in range(1, len(cover)):
+        combinations = combinations * (len(candidates) - size + 1) // size
+        max_combinations -= combinations
+        if max_combinations < 0:
+            break
+        for combination in itertools.combinations(candidates, size):
+            if remaining <= frozenset().union(
+                    *(useful[index] for index in combination)):
+                cover = list(combination)
+                break
+        else:
+            continue
+        break
+    return sorted(selected + cover)
+
+
+class SourceAllocator:
+    """Chooses, for each aspiration of a run, which location of a part or
+    linker to draw from, keeping track of the volume drawn from each.
+
+    When every location of a part has a known volume, the location with the
+    most remaining volume is chosen. Otherwise volumes are spread evenly, the
+    location with the least volume drawn so far being chosen. Ties go to the
+    first location listed, so that a part stocked once is always drawn from
+    that location.
+
+    Args:
+        index (SourceIndex): source locations.
+
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.drawn = {}
+
+    def choose(self, name):
+        """Returns the position, in index[name], of the location to draw
+        from next.
+
+        """
+        locations = self.index[name]
+        if len(locations) == 1:
+            return 0
+        drawn = self.drawn.setdefault(name, [0] * len(locations))
+        if all(location.volume is not None for location in locations):
+            scores = [location.volume - volume
+                      for location, volume in zip(locations, drawn)]
+        else:
+            scores = [-volume for volume in drawn]
+        return scores.index(max(scores))
+
+    def draw(self, name, position, volume):
+        """Records that volume was drawn from index[name][position]. Returns
+        that location.
+
+        """
+        locations = self.index[name]
+        drawn = self.drawn.setdefault(name, [0] * len(locations))
+        drawn[position] += volume
+        return locations[position]
+
+    def take(self, name, volume):
+        """Chooses a location of name and draws volume from it. Returns the
+        location.
+
+        """
+        return self.draw(name, self.choose(name), volume)
+
+    def remaining(self):
+        """Returns {name: [remaining volume of each location]} for the parts
+        and linkers drawn from, None for locations without a known volume.
+
+        """
+        return {name: [None if location.volume is None
+                       else location.volume - volume
+                       for location, volume in zip(self.index[name], drawn)]
+                for name, drawn in self.drawn.items()}
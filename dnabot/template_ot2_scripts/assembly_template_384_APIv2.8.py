@@ -0,0 +1,95 @@
+from opentrons import protocol_api
+import numpy as np
+# metadata
+metadata = {
+'protocolName': 'DNABOT Step 3: Assembly (384 well plate)',
+'description': 'DNABOT Assembly Step3 without Thermocycler, into a 384 well final assembly plate',
+'apiLevel': '2.8'
+}
+
+# test dict can be used for simulation
+#final_assembly_dict={ "A1": ['A7', 'B7', 'C7', 'F7'], "C1": ['A7', 'B7', 'D7', 'G7'], "E1": ['A7', 'B7', 'E7', 'H7']}
+#tiprack_num=1
+
+# __LABWARES is expected to be redefined by "generate_ot2_script" method
+# Test dict
+# __LABWARES={"p20_single": {"id": "p20_single_gen2"}, "96_tiprack_20ul": {"id": "opentrons_96_tiprack_20ul"}, "24_tuberack_1500ul": {"id": "e14151500starlab_24_tuberack_1500ul"}, "clip_plate": {"id": "nest_96_wellplate_100ul_pcr_full_skirt"}, "final_assembly_plate_384": {"id": "biorad_384_wellplate_50ul"}}
+
+def run(protocol: protocol_api.ProtocolContext):
+    def final_assembly(final_assembly_dict, tiprack_num, tiprack_type=__LABWARES['96_tiprack_20ul']['id']):
+            # Constants
+            #Tiprack
+            CANDIDATE_TIPRACK_SLOTS = ['3', '6', '9', '2', '5', '8', '11']
+            PIPETTE_MOUNT = 'right'
+            #Plate of sample after  purification
+            MAG_PLATE_TYPE = __LABWARES['clip_plate']['id']
+            MAG_PLATE_POSITION = '1'
+            #Tuberack
+            TUBE_RACK_TYPE = __LABWARES['24_tuberack_1500ul']['id']
+            TUBE_RACK_POSITION = '7'
+            #Destination plate, filled quadrant by quadrant by DNA-BOT
+            DESTINATION_PLATE_TYPE = __LABWARES['final_assembly_plate_384']['id']
+            ASSEMBLY_PLATE_WELLS = 384
+            #Temperature control plate
+            TEMPDECK_SLOT = '4'
+            TEMP = 20
+            TOTAL_VOL = 15
+            PART_VOL = 1.5
+            MIX_SETTINGS = (1, 3)
+            tiprack_num=tiprack_num+1
+            # Errors
+            sample_number = len(final_assembly_dict.keys())
+            if sample_number > ASSEMBLY_PLATE_WELLS:
+                raise ValueError('Final assembly nummber cannot exceed 384.')
+
+            # More tipracks than slots are refilled during the run
+            slots = CANDIDATE_TIPRACK_SLOTS[:min(tiprack_num, len(CANDIDATE_TIPRACK_SLOTS))]
+            tipracks = [protocol.load_labware(tiprack_type, slot) for slot in slots]
+            pipette = protocol.load_instrument(__LABWARES['p20_single']['id'], PIPETTE_MOUNT, tip_racks=tipracks)
+            tips = {'used': 0}
+
+            def pick_up_tip():
+                if tips['used'] == len(tipracks) * 96:
+                    protocol.pause('Replace all tip racks with full ones, then resume.')
+                    pipette.reset_tipracks()
+                    tips['used'] = 0
+                pipette.pick_up_tip()
+                tips['used'] += 1
+
+            # Define Labware and set temperature
+            magbead_plate = protocol.load_labware(MAG_PLATE_TYPE, MAG_PLATE_POSITION)
+            tube_rack = protocol.load_labware(TUBE_RACK_TYPE, TUBE_RACK_POSITION)
+            tempdeck = protocol.load_module('tempdeck', TEMPDECK_SLOT)
+            destination_plate = tempdeck.load_labware(
+            DESTINATION_PLATE_TYPE, TEMPDECK_SLOT)
+            tempdeck.set_temperature(TEMP)
+
+             # Master mix transfers
+            final_assembly_lens = []
+            for values in final_assembly_dict.values():
+                final_assembly_lens.append(len(values))
+            unique_assemblies_lens = list(set(final_assembly_lens))
+            master_mix_well_letters = ['A', 'B', 'C', 'D']
+            for x in unique_assemblies_lens:
+                master_mix_well = master_mix_well_letters[(x - 1) // 6] + str(x - 1)
+                destination_inds = [i for i, lens in enumerate(final_assembly_lens) if lens == x]
+                destination_wells = np.array([key for key, value in list(final_assembly_dict.items())])
+                destination_wells = list(destination_wells[destination_inds])
+                for destination_well in destination_wells:
+                    pick_up_tip()
+                    pipette.transfer(TOTAL_VOL - x * PART_VOL, tube_rack.wells(master_mix_well),
+                                     destination_plate.wells(destination_well), new_tip='never')
+                    pipette.drop_tip()
+
+            # Part transfers
+            for key, values in list(final_assembly_dict.items()):
+                for value in values:
+                    pick_up_tip()
+                    pipette.transfer(PART_VOL, magbead_plate.wells(value),
+                                     destination_plate.wells(key), mix_after=MIX_SETTINGS,
+                                     new_tip='never')
+                    pipette.drop_tip()
+
+            tempdeck.deactivate() #stop increasing the temperature
+
+    final_assembly(final_assembly_dict=final_assembly_dict, tiprack_num=tiprack_num)
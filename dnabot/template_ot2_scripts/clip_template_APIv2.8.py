@@ -59,6 +59,14 @@ def run(protocol: protocol_api.ProtocolContext):
     LINKER_MIX_SETTINGS = (1, 3)
     PART_MIX_SETTINGS = (4, 5)
 
+    # Tip policy of the water and linker transfers: 'always' a new tip per transfer,
+    # 'aspiration' a new tip per multi-dispense aspiration, 'source' one tip per source well
+    # Multi-dispensed linkers are not mixed, the part transfer mixing each reaction
+    TIP_POLICY = 'always'
+    PIPETTE_MAX_VOLUME = 20
+    DISPOSAL_VOLUME = 1
+    DISPENSE_DEPTH = 2
+
     def clip(
             prefixes_wells,
             prefixes_plates,
@@ -69,9 +77,38 @@ def run(protocol: protocol_api.ProtocolContext):
             parts_vols,
             water_vols):
 
+        ### Multi-dispense runs
+        # Groups transfers by source well and splits each group into the aspirations the pipette holds
+        def dispense_runs(volumes, sources):
+            groups = {}
+            for clip_num, (volume, source) in enumerate(zip(volumes, sources)):
+                if volume > 0:
+                    groups.setdefault(source, []).append(clip_num)
+            runs = []
+            for source, clip_nums in groups.items():
+                run, total, first = [], 0, True
+                for clip_num in clip_nums:
+                    if run and total + volumes[clip_num] > PIPETTE_MAX_VOLUME - DISPOSAL_VOLUME:
+                        runs.append((source, run, first))
+                        run, total, first = [], 0, False
+                    run.append(clip_num)
+                    total += volumes[clip_num]
+                runs.append((source, run, first))
+            return runs
+
+        linker_vols = [1] * len(parts_wells)
+        water_runs = dispense_runs(water_vols, [WATER_WELL] * len(parts_wells))
+        prefix_runs = dispense_runs(linker_vols, list(zip(prefixes_plates, prefixes_wells)))
+        suffix_runs = dispense_runs(linker_vols, list(zip(suffixes_plates, suffixes_wells)))
+
         ### Loading Tiprack
         # Calculates whether one, two, or three tipracks are needed, which are in slots 3, 6, and 9 respectively
-        total_tips = 4 * len(parts_wells)
+        if TIP_POLICY == 'always':
+            total_tips = 4 * len(parts_wells)
+        else:
+            total_tips = 1 + len(parts_wells) + sum(
+                1 for _, _, first in water_runs + prefix_runs + suffix_runs
+                if first or TIP_POLICY == 'aspiration')
         letter_dict = {'A': 0, 'B': 1, 'C': 2,
                        'D': 3, 'E': 4, 'F': 5, 'G': 6, 'H': 7}
         tiprack_1_tips = (
@@ -121,15 +158,42 @@ def run(protocol: protocol_api.ProtocolContext):
         pipette.transfer(MASTER_MIX_VOLUME, master_mix, destination_wells, blow_out=True, blowout_location='destination well', new_tip='never')
         pipette.drop_tip()
 
-        # transfer water into destination wells
-            # added blowout into destination wells ('blowout_location' only works for API 2.8 and above)
-        pipette.transfer(water_vols, water, destination_wells, blow_out=True, blowout_location='destination well', new_tip='always')
-
-        #transfer prefixes, suffixes, and parts into destination wells
-            # added blowout into destination wells ('blowout_location' only works for API 2.8 and above)
+        if TIP_POLICY == 'always':
+            # transfer water into destination wells
+                # added blowout into destination wells ('blowout_location' only works for API 2.8 and above)
+            pipette.transfer(water_vols, water, destination_wells, blow_out=True, blowout_location='destination well', new_tip='always')
+
+            #transfer prefixes, suffixes, and parts into destination wells
+                # added blowout into destination wells ('blowout_location' only works for API 2.8 and above)
+            for clip_num in range(len(parts_wells)):
+                pipette.transfer(1, source_plates[prefixes_plates[clip_num]].wells(prefixes_wells[clip_num]), destination_wells[clip_num], blow_out=True, blowout_location='destination well', new_tip='always', mix_after=LINKER_MIX_SETTINGS)
+                pipette.transfer(1, source_plates[suffixes_plates[clip_num]].wells(suffixes_wells[clip_num]), destination_wells[clip_num], blow_out=True, blowout_location='destination well', new_tip='always', mix_after=LINKER_MIX_SETTINGS)
+                pipette.transfer(parts_vols[clip_num], source_plates[parts_plates[clip_num]].wells(parts_wells[clip_num]), destination_wells[clip_num], blow_out=True, blowout_location='destination well', new_tip='always', mix_after=PART_MIX_SETTINGS)
+            return
+
+        # multi-dispense water, prefixes and suffixes from each source well
+            # the disposal volume stays in the tip and is dropped with it, dispensing at the top of the wells
+        def multi_dispense(runs, volumes, source_well):
+            for source, clip_nums, first in runs:
+                if first or TIP_POLICY == 'aspiration':
+                    if pipette.has_tip:
+                        pipette.drop_tip()
+                    pipette.pick_up_tip()
+                    pipette.aspirate(DISPOSAL_VOLUME + sum(volumes[clip_num] for clip_num in clip_nums), source_well(source))
+                else:
+                    pipette.aspirate(sum(volumes[clip_num] for clip_num in clip_nums), source_well(source))
+                for clip_num in clip_nums:
+                    pipette.dispense(volumes[clip_num], destination_wells[clip_num].top(-DISPENSE_DEPTH))
+                    pipette.touch_tip(destination_wells[clip_num], v_offset=-DISPENSE_DEPTH)
+            if pipette.has_tip:
+                pipette.drop_tip()
+
+        multi_dispense(water_runs, water_vols, lambda well: tube_rack[well])
+        multi_dispense(prefix_runs, linker_vols, lambda source: source_plates[source[0]][source[1]])
+        multi_dispense(suffix_runs, linker_vols, lambda source: source_plates[source[0]][source[1]])
+
+        #transfer parts into destination wells, mixing each reaction
         for clip_num in range(len(parts_wells)):
-            pipette.transfer(1, source_plates[prefixes_plates[clip_num]].wells(prefixes_wells[clip_num]), destination_wells[clip_num], blow_out=True, blowout_location='destination well', new_tip='always', mix_after=LINKER_MIX_SETTINGS)
-            pipette.transfer(1, source_plates[suffixes_plates[clip_num]].wells(suffixes_wells[clip_num]), destination_wells[clip_num], blow_out=True, blowout_location='destination well', new_tip='always', mix_after=LINKER_MIX_SETTINGS)
             pipette.transfer(parts_vols[clip_num], source_plates[parts_plates[clip_num]].wells(parts_wells[clip_num]), destination_wells[clip_num], blow_out=True, blowout_location='destination well', new_tip='always', mix_after=PART_MIX_SETTINGS)
 
     # the run function will first define the CLIP function, and then run the CLIP function with the dictionary produced by DNA-BOT
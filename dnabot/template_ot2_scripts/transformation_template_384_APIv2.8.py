@@ -0,0 +1,322 @@
+from opentrons import protocol_api
+import numpy as np
+
+
+metadata = {
+     'apiLevel': '2.8',
+     'protocolName': 'DNABOT Step 4: Transformation (384 well plate)',
+     'description': 'Transformation reactions using an opentrons OT-2 for BASIC assembly, from a 384 well final assembly plate, one quadrant at a time.'}
+
+# Example output produced by DNA-BOT for 3 constructs, uncomment and run to test the template
+# Each quadrant of the final assembly plate is transformed into its own transformation plate and spotted onto its own agar plate
+#quadrant_spotting_tuples=[[(('A1','C1','E1'), ('A1','B1', 'C1'), (5,5,5))]]
+#soc_well='A1'
+
+# __LABWARES is expected to be redefined by "generate_ot2_script" method
+# Test dict
+# __LABWARES={"p20_single": {"id": "p20_single_gen2"}, "p300_multi": {"id": "p300_multi_gen2"}, "96_tiprack_20ul": {"id": "opentrons_96_tiprack_20ul"}, "96_tiprack_300ul": {"id": "opentrons_96_tiprack_300ul"}, "24_tuberack_1500ul": {"id": "e14151500starlab_24_tuberack_1500ul"}, "final_assembly_plate_384": {"id": "biorad_384_wellplate_50ul"}, "transfo_plate_wo_thermo": {"id": "nest_96_wellplate_100ul_pcr_full_skirt"}, "agar_plate": {"id": "nest_96_wellplate_100ul_pcr_full_skirt"}, "96_deepwellplate_2ml": {"id": "nest_96_wellplate_2ml_deep"}}
+# __PARAMETERS={"transfo_incubation_temp": {"value": 4.0}, "transfo_incubation_time": {"value": 20.0}}
+
+def run(protocol: protocol_api.ProtocolContext):
+
+# Constants
+    CANDIDATE_p20_SLOTS = ['9', '2', '5']
+    CANDIDATE_P300_SLOTS = ['3', '6']
+    p20_TIPRACK_TYPE = __LABWARES['96_tiprack_20ul']['id']
+    P300_TIPRACK_TYPE = __LABWARES['96_tiprack_300ul']['id']
+    P20_MOUNT = 'right'
+    P300_MOUNT = 'left'
+    ASSEMBLY_PLATE_TYPE = __LABWARES['final_assembly_plate_384']['id']
+    ASSEMBLY_PLATE_SLOT = '8'
+    ASSEMBLY_PLATE_WELLS = 384
+
+    TRANSFORMATION_PLATE_TYPE = __LABWARES['transfo_plate_wo_thermo']['id']
+    SOC_PLATE_TYPE = __LABWARES['96_deepwellplate_2ml']['id']
+    SOC_PLATE_SLOT = '7'
+    TUBE_RACK_TYPE = __LABWARES['24_tuberack_1500ul']['id']
+    TUBE_RACK_SLOT = '11'
+    SPOTTING_WASTE_WELL = 'A1'
+    AGAR_PLATE_TYPE = __LABWARES['agar_plate']['id']
+        # see transformation_template_APIv2.8.py for the agar tray custom labware
+    AGAR_PLATE_SLOT = '1'
+
+    TEMPDECK_SLOT = '10'
+
+
+    def generate_transformation_wells(spotting_tuples):
+        """
+        Evaluates spotting_tuples and returns (final assembly well, transformation well) pairs.
+
+        Args:
+        spotting_tuples (list): Sets of spotting reactions are given in the form: ((final assembly wells), (target wells), (spotting volumes)).
+        Transformation wells are the target wells.
+
+        """
+
+        pairs = []
+        for spotting_tuple in spotting_tuples:
+            for pair in zip(spotting_tuple[0], spotting_tuple[1]):
+                if pair not in pairs:
+                    pairs.append(pair)
+        return pairs
+
+
+    def tiprack_slots(spotting_tuples, max_spot_vol=5):
+        """
+        Calculates p20 and p300 tiprack slots required by one quadrant.
+
+        Args:
+        spotting_tuples (list): Sets of spotting reactions are given in the form: ((source wells), (target wells), (spotting volumes)).
+        max_spot_vol (float): Maximum volume that is spotted per spot reaction.
+
+        """
+
+        # Reactions' number
+        transformation_reactions = len(generate_transformation_wells(spotting_tuples))
+        spotting_reactions = 0
+        for spotting_tuple in spotting_tuples:
+            spots = np.ceil(np.array(spotting_tuple[2])/max_spot_vol)
+            spotting_reactions = spotting_reactions + int(np.sum(spots))
+
+        # p20 tiprack slots
+        p20_tips = transformation_reactions + spotting_reactions
+        p20_tiprack_slots = p20_tips // 96 + (1 if p20_tips % 96 > 0 else 0)
+
+        # p300 tiprack slots
+        p300_tips = transformation_reactions + spotting_reactions
+        p300_tiprack_slots = p300_tips // 96 + (1 if p300_tips % 96 > 0 else 0)
+        return p20_tiprack_slots, p300_tiprack_slots
+
+
+    def transformation_setup(transformation_wells):
+        """
+        Sets up transformation reactions
+
+        Args:
+        transformation_wells (list): (final assembly well, transformation well) pairs.
+
+        """
+
+        # Constants
+        TEMP = __PARAMETERS['transfo_incubation_temp']['value']  # Incubation temperature.
+        ASSEMBLY_VOL = 5  # Volume of final assembly added to competent cells.
+        MIX_SETTINGS = (4, 5)  # Mix after setting during final assembly transfers.
+        INCUBATION_TIME = __PARAMETERS['transfo_incubation_time']['value']  # Cells and final assembly incubation time.
+
+        # Set temperature deck to 4 °C and load competent cells
+        tempdeck.set_temperature(TEMP)
+        protocol.pause('Load competent cells, uncap and resume run')
+
+        # Transfer final assemblies
+        p20_pipette.transfer(ASSEMBLY_VOL,
+                             [assembly_plate.wells_by_name()[assembly_well] for assembly_well, _ in transformation_wells],
+                             [transformation_plate.wells_by_name()[well_name] for _, well_name in transformation_wells],
+                             new_tip='always',
+                             mix_after=(MIX_SETTINGS))
+
+        # Incubate for 20 minutes and remove competent cells for heat shock
+        protocol.delay(minutes=INCUBATION_TIME)
+
+        protocol.pause('Remove transformation reactions, conduct heatshock and replace.')
+
+
+    def phase_switch():
+        """
+        Function pauses run enabling addition/removal of labware.
+
+        """
+        protocol.pause('Set the final assembly plate aside for the next quadrant. Introduce agar tray and deep well plate containing SOC media. Resume run.')
+
+
+    def quadrant_switch(quadrant):
+        """
+        Function pauses run enabling the labware of the next quadrant to be introduced.
+
+        """
+        protocol.pause(f'Quadrant {quadrant + 1}: replace the transformation plate, agar tray and tip racks, put back the final assembly plate. Resume run.')
+        p20_pipette.reset_tipracks()
+        p300_pipette.reset_tipracks()
+
+
+    def outgrowth(
+            cols,
+            soc_well):
+        """
+        Outgrows transformed cells.
+
+        Args:
+        cols (list of str): list of cols in transformation plate containing samples.
+        soc_well (str): Well containing SOC media in relevant plate.
+
+        """
+
+        # Constants
+        SOC_VOL = 125
+        SOC_MIX_SETTINGS = (4, 50)
+        TEMP = 37
+        OUTGROWTH_TIME = 60
+        SOC_ASPIRATION_RATE = 25
+        P300_DEFAULT_ASPIRATION_RATE = 150
+
+        # Define wells
+        transformation_cols = [transformation_plate.columns_by_name()[column] for column in cols]
+
+        soc = soc_plate.wells(soc_well)
+
+        # Add SOC to transformed cells
+        p300_pipette.flow_rate.aspirate = SOC_ASPIRATION_RATE
+        p300_pipette.transfer(SOC_VOL, soc, transformation_cols,
+                              new_tip='always', mix_after=SOC_MIX_SETTINGS)
+        p300_pipette.flow_rate.aspirate = P300_DEFAULT_ASPIRATION_RATE
+
+        # Incubate for 1 hour at 37 °C
+        tempdeck.set_temperature(TEMP)
+
+        protocol.delay(minutes=OUTGROWTH_TIME)
+
+        tempdeck.deactivate()
+
+
+    def spotting_cols(spotting_tuples):
+        """
+        Evaluates spotting_tuples and returns unique cols (str) of the transformation plate associated with each spotting_tuple's target wells.
+
+        Args:
+        spotting_tuples (list): Sets of spotting reactions are given in the form: ((source wells), (target wells), (spotting volumes)).
+
+        """
+        cols_list = []
+        for spotting_tuple in spotting_tuples:
+            target_wells_cols = [target_well[1:] for target_well in spotting_tuple[1]]
+            unique_cols = [col for i, col in enumerate(target_wells_cols) if target_wells_cols.index(col) == i]
+            cols_list.append(unique_cols)
+        return cols_list
+
+
+    def spot_transformations(
+            spotting_tuples,
+            dead_vol=1,
+            spotting_dispense_rate=0.025,
+            stabbing_depth=10,
+            max_spot_vol=5):
+        """
+        Spots transformation reactions.
+
+        Args:
+        spotting_tuples (list): Sets of spotting reactions are given in the form: ((source wells), (target wells), (spotting volumes)).
+        dead_vol (float): Dead volume aspirated during spotting.
+        spotting_dispense_rate (float): Rate p20_pipette dispenses at during spotting.
+        stabbing_depth (float): Depth p20_pipette moves into agar during spotting.
+        max_spot_vol (float): Maximum volume that is spotted per spot reaction.
+
+        """
+
+        def spot(
+                source,
+                target,
+                spot_vol):
+            """
+            Spots an individual reaction using the p20 pipette.
+
+            Args:
+            source (str): Well containing the transformation reaction to be spotted.
+            target (str): Well transformation reaction is to be spotted to.
+            spot_vol (float): Volume of transformation reaction to be spotted (uL).
+
+            """
+
+            # Constants
+            DEFAULT_HEAD_SPEED = {'x': 400, 'y': 400,'z': 125, 'a': 125}
+            SPOT_HEAD_SPEED = {'x': 400, 'y': 400, 'z': 125,'a': 125 // 4}
+            DISPENSING_HEIGHT = 5
+            SAFE_HEIGHT = 7  # height avoids collision with agar tray.
+
+            # Spot
+            p20_pipette.pick_up_tip()
+            p20_pipette.aspirate(spot_vol + dead_vol, source[0])
+            p20_pipette.move_to(target[0].top(SAFE_HEIGHT))
+            p20_pipette.move_to(target[0].top(DISPENSING_HEIGHT))
+            p20_pipette.dispense(volume=spot_vol, rate=spotting_dispense_rate)
+            protocol.max_speeds.update(SPOT_HEAD_SPEED)
+            p20_pipette.move_to(target[0].top(-1 * stabbing_depth))
+            protocol.max_speeds.update(DEFAULT_HEAD_SPEED)
+            p20_pipette.move_to(target[0].top(SAFE_HEIGHT))
+
+            # the code below makes sure that the transformend cells are efficiently reaching to the agar surface
+            p20_pipette.blow_out()
+            protocol.delay(seconds=10)
+            p20_pipette.blow_out()
+            protocol.delay(seconds=10)
+
+            # Dispose of dead volume and tip
+            p20_pipette.dispense(dead_vol, spotting_waste[0])
+            p20_pipette.blow_out()
+            p20_pipette.drop_tip()
+
+        def spot_tuple(spotting_tuple):
+            """
+            Spots all reactions defined by the spotting tuple, from their transformation wells (the target wells). Requires the function spot.
+
+            Args:
+            spotting_tuple (tuple): Spotting reactions given in the form: (source wells), (target wells), (spotting volumes).
+
+            """
+            target_wells = spotting_tuple[1]
+            spot_vols = list(spotting_tuple[2])
+            while max(spot_vols) > 0:
+                for index, spot_vol in enumerate(spot_vols):
+                    if spot_vol == 0:
+                        pass
+                    else:
+                        vol = spot_vol if spot_vol <= max_spot_vol else max_spot_vol
+                        spot(source = transformation_plate.wells(target_wells[index]), target = agar_plate.wells(target_wells[index]), spot_vol = vol)
+                        spot_vols[index] = spot_vols[index] - vol
+
+        # Constants
+        TRANSFORMATION_MIX_SETTINGS = [4, 50]
+
+        # Spot transformation reactions
+            # Each unique transformation well is resuspended once prior to spotting.
+        for spotting_tuple, cols in zip(spotting_tuples, spotting_cols(spotting_tuples)):
+            for col in cols:
+                p300_pipette.pick_up_tip()
+                p300_pipette.mix(TRANSFORMATION_MIX_SETTINGS[0], TRANSFORMATION_MIX_SETTINGS[1],transformation_plate.columns_by_name()[col][0])
+                p300_pipette.drop_tip()
+            spot_tuple(spotting_tuple)
+
+    # Errors
+    if sum(len(spotting_tuple[0]) for spotting_tuples in quadrant_spotting_tuples for spotting_tuple in spotting_tuples) > ASSEMBLY_PLATE_WELLS:
+        raise ValueError('Final assembly nummber cannot exceed 384.')
+
+    #Tiprack slots, tipracks being replaced for each quadrant
+    quadrant_tiprack_slots = [tiprack_slots(spotting_tuples) for spotting_tuples in quadrant_spotting_tuples]
+    p20_slots = CANDIDATE_p20_SLOTS[:max(slots[0] for slots in quadrant_tiprack_slots)]
+    p300_slots = CANDIDATE_P300_SLOTS[:max(slots[1] for slots in quadrant_tiprack_slots)]
+    # Define labware
+    p20_tipracks = [protocol.load_labware(p20_TIPRACK_TYPE, slot) for slot in p20_slots]
+    p300_tipracks = [protocol.load_labware(P300_TIPRACK_TYPE, slot) for slot in p300_slots]
+    p20_pipette = protocol.load_instrument(__LABWARES['p20_single']['id'], P20_MOUNT, tip_racks=p20_tipracks)
+    p300_pipette = protocol.load_instrument(__LABWARES['p300_multi']['id'], P300_MOUNT, tip_racks=p300_tipracks)
+    assembly_plate = protocol.load_labware(ASSEMBLY_PLATE_TYPE, ASSEMBLY_PLATE_SLOT)
+    tempdeck = protocol.load_module('tempdeck', TEMPDECK_SLOT)
+    transformation_plate = tempdeck.load_labware(TRANSFORMATION_PLATE_TYPE, TEMPDECK_SLOT)
+    soc_plate = protocol.load_labware(SOC_PLATE_TYPE, SOC_PLATE_SLOT)
+    tube_rack = protocol.load_labware(TUBE_RACK_TYPE, TUBE_RACK_SLOT)
+    spotting_waste = tube_rack.wells(SPOTTING_WASTE_WELL)
+    agar_plate = protocol.load_labware(AGAR_PLATE_TYPE, AGAR_PLATE_SLOT)
+
+    ### Run protocol
+
+    # Register agar_plate for calibration
+    p20_pipette.transfer(1, agar_plate.wells('A1'), agar_plate.wells('H12'), trash=False)
+
+    # Run functions, one quadrant of the final assembly plate at a time
+    for quadrant, spotting_tuples in enumerate(quadrant_spotting_tuples):
+        if quadrant > 0:
+            quadrant_switch(quadrant)
+        transformation_setup(generate_transformation_wells(spotting_tuples))
+        phase_switch()
+        spotting_tuples_cols = [col for cols in spotting_cols(spotting_tuples) for col in cols]
+        unique_cols = [col for i, col in enumerate(spotting_tuples_cols) if spotting_tuples_cols.index(col) == i]
+        outgrowth(cols=unique_cols, soc_well=soc_well)
+        spot_transformations(spotting_tuples)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Compilation and caching of OT-2 script templates.
+
+A template is split once into the header written before the injected
+variables (every line before the first 'def' line) and the body written
+after them. Compiled templates are cached in process, and optionally on disk,
+keyed by template path and validated against its modification time and size.
+"""
+import hashlib
+import json
+import os
+import re
+
+# In-process cache: absolute template path -> CompiledTemplate
+_CACHE = {}
+
+
+class CompiledTemplate:
+    """OT-2 script template split around its variable injection point.
+
+    Args:
+        path (str): absolute template path.
+        stamp (tuple): (modification time in ns, size) of the template file.
+        header (str): template text before the injected variables.
+        body (str): template text after the injected variables.
+
+    """
+
+    def __init__(self, path, stamp, header, body):
+        self.path = path
+        self.stamp = stamp
+        self.header = header
+        self.body = body
+
+    def render(self, **kwargs):
+        """Returns the script text, where kwargs are written as global
+        variables between the header and the body of the template.
+
+        """
+        return self.render_literals(
+            {key: format_value(value) for key, value in kwargs.items()})
+
+    def render_literals(self, literals, constants=None):
+        """Returns the script text, where literals maps global variable names
+        to already formatted values (see format_value).
+
+        Args:
+            constants (dict): optional values replacing those of single line
+                assignments of the template body, by assigned name, e.g. slot
+                constants of the template functions.
+
+        Raises:
+            ValueError: a constant is not assigned exactly once in the
+                template body.
+
+        """
+        script = [self.header]
+        for key, literal in literals.items():
+            script.append('{}={}\n'.format(key, literal))
+        script.append('\n')
+        body = self.body
+        if constants:
+            names = [match.group(2) for match in _ASSIGNMENT.finditer(body)]
+            for name in constants:
+                if names.count(name) != 1:
+                    raise ValueError(
+                        f'Constant {name} is assigned {names.count(name)} '
+                        f'times in template {self.path}, expected once.')
+            body = _ASSIGNMENT.sub(
+                lambda match: match.group(1) + format_value(
+                    constants[match.group(2)])
+                if match.group(2) in constants else match.group(0), body)
+        script.append(body)
+        return ''.join(script)
+
+
+# Single line assignment: indented name, equal sign and value
+_ASSIGNMENT = re.compile(r'^([ \t]*(\w+)[ \t]*=[ \t]*)(?!=).*$', re.M)
+
+
+def format_value(value):
+    """Formats a value as written in a global variable assignment of an
+    OT-2 script.
+
+    """
+    if type(value) == dict:
+        return json.dumps(value)
+    elif type(value) == str:
+        return "'{}'".format(value)
+    else:
+        return str(value)
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _disk_cache_path(path, cache_dir):
+    key = hashlib.sha1(path.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, key + '.json')
+
+
+def _compile(path, stamp):
+    with open(path, 'r') as rf:
+        lines = rf.readlines()
+    for index, line in enumerate(lines):
+        if line[:3] == 'def':
+            function_start = index
+            break
+    else:
+        raise ValueError(f'No function definition found in template {path}.')
+    if function_start == 0:
+        raise ValueError(
+            f'Template {path} has no header before its first function.')
+    # The line preceding the first function is written on both sides of the
+    #   injected variables
+    header = ''.join(lines[:function_start])
+    body = ''.join(lines[function_start - 1:])
+    return CompiledTemplate(path, stamp, header, body)
+
+
+def compile_template(template_path, cache_dir=None):
+    """Returns the compiled template of template_path, from cache when the
+    template file is unchanged.
+
+    Args:
+        template_path (str): path to the template file.
+        cache_dir (str): optional directory of an on-disk cache shared
+            between processes.
+
+    Raises:
+        ValueError: the template has no injection point.
+
+    """
+    path = os.path.abspath(template_path)
+    stamp = _stamp(path)
+    template = _CACHE.get(path)
+    if template is not None and template.stamp == stamp:
+        return template
+
+    template = None
+    if cache_dir is not None:
+        cache_path = _disk_cache_path(path, cache_dir)
+        try:
+            with open(cache_path, 'r') as ifh:
+                cached = json.load(ifh)
+            if tuple(cached['stamp']) == stamp:
+                template = CompiledTemplate(
+                    path, stamp, cached['header'], cached['body'])
+        except (OSError, ValueError, KeyError):
+            template = None
+    if template is None:
+        template = _compile(path, stamp)
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, 'w') as ofh:
+                json.dump({'stamp': stamp, 'header': template.header,
+                           'body': template.body}, ofh)
+    _CACHE[path] = template
+    return template
+
+
+def clear_cache():
+    """Empties the in-process template cache."""
+    _CACHE.clear()
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+import pytest
+import yaml
+
+from dnabot import planning
+
+
+in_dir = Path(__file__).resolve().parent / 'inputs'
+
+
+@pytest.fixture
+def settings():
+    """Labware and parameter settings of tests/inputs."""
+    with open(in_dir / 'default_settings.yaml') as ifh:
+        return yaml.safe_load(ifh)
+
+
+@pytest.fixture
+def sources():
+    """Linker and part source files of tests/inputs/constructs.csv."""
+    return [in_dir / 'linker_parts_coords.csv',
+            in_dir / 'user_parts_coords.csv']
+
+
+@pytest.fixture
+def plan_run(settings, sources):
+    """Plans tests/inputs/constructs.csv, keyword arguments being passed to
+    planning.plan. Only the APIv2.8 CLIP script is rendered by default.
+
+    """
+    def plan_run(**kwargs):
+        kwargs.setdefault('scripts', [
+            script for script in planning.OT2_SCRIPTS
+            if script[0] == planning.CLIP_FNAME_2])
+        return planning.plan(in_dir / 'constructs.csv', sources, settings,
+                             **kwargs)
+    return plan_run
+
+
+@pytest.fixture
+def run_plan(plan_run):
+    """Plan of tests/inputs/constructs.csv with the APIv2.8 CLIP script."""
+    return plan_run()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from dnabot import batches
+
+
+LIMITS = {
+    'constructs': 96,
+    'clips': 48,
+    'clip_reactions': 48,
+    'final_assembly_tips': 7 * 96
+}
+
+
+def make_clips(*parts):
+    return [('LMS-P', 'BB', 'LMP-S')] + [
+        ('LMP-P', part, 'LMS-S') for part in parts]
+
+
+def test_partition_groups_shared_clips():
+    constructs_clips = [make_clips('A'), make_clips('B'),
+                        make_clips('A'), make_clips('B')]
+    limits = dict(LIMITS, clips=2)
+    runs = batches.partition_constructs(constructs_clips, limits, 15)
+    assert runs == [[0, 2], [1, 3]]
+
+
+def test_partition_repacks_runs():
+    # Filled greedily, A and C share a run, AB and D need a run each
+    constructs_clips = [make_clips('A'), make_clips('C'),
+                        make_clips('A', 'B'), make_clips('D')]
+    limits = dict(LIMITS, clips=3)
+    runs = batches.partition_constructs(constructs_clips, limits, 15)
+    assert runs == [[0, 2], [1, 3]]
+
+
+def test_partition_respects_construct_limit():
+    constructs_clips = [make_clips('A')] * 10
+    limits = dict(LIMITS, constructs=4)
+    runs = batches.partition_constructs(constructs_clips, limits, 15)
+    assert [len(run) for run in runs] == [4, 4, 2]
+
+
+def test_partition_counts_clip_replicates():
+    # 16 uses of the same clips need 2 replicates of each (4 reactions),
+    #   15 uses only one
+    constructs_clips = [make_clips('A')] * 16
+    limits = dict(LIMITS, clip_reactions=3)
+    runs = batches.partition_constructs(constructs_clips, limits, 15)
+    assert [len(run) for run in runs] == [15, 1]
+
+
+def test_partition_oversized_construct():
+    with pytest.raises(ValueError):
+        batches.partition_constructs(
+            [make_clips('A', 'B', 'C')], dict(LIMITS, clips=2), 15)
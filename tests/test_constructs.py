@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from dnabot import constructs
+
+
+def test_library_interns_clips():
+    library = constructs.ConstructLibrary()
+    library.add('A1', [('LMS-P', 'BB', 'LMP-S'), ('LMP-P', 'PROM', 'LMS-S')])
+    library.add('A2', [('LMS-P', 'BB', 'LMP-S'), ('LMP-P', 'CDS', 'LMS-S')])
+    assert library.clips == [('LMS-P', 'BB', 'LMP-S'),
+                             ('LMP-P', 'PROM', 'LMS-S'),
+                             ('LMP-P', 'CDS', 'LMS-S')]
+    assert list(library.codes(1)) == [0, 2]
+    assert library.lengths() == [2, 2]
+    assert library.clip_counts() == [2, 1, 1]
+    # Names shared between CLIP reactions are stored once
+    assert library.clips[1][0] is library.clips[2][0]
+
+
+def test_library_sequence():
+    library = constructs.ConstructLibrary()
+    library.add('A1', [('LMS-P', 'BB', 'LMP-S')])
+    library.add('A2', [('LMS-P', 'BB', 'LMP-S'), ('LMP-P', 'CDS', 'LMS-S')])
+    assert len(library) == 2
+    construct = library[-1]
+    assert (construct.name, len(construct)) == ('A2', 2)
+    assert construct.clips[1] == ('LMP-P', 'CDS', 'LMS-S')
+    assert [construct.name for construct in library] == ['A1', 'A2']
+    with pytest.raises(IndexError):
+        library[2]
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+from dnabot import instrument
+
+
+def test_disabled_stage_records_nothing():
+    with instrument.stage('idle') as record:
+        pass
+    assert record == {'name': 'idle', 'kind': 'stage'}
+
+
+def test_nested_stages():
+    recorder = instrument.enable()
+    try:
+        with instrument.stage('outer'):
+            with instrument.stage('inner', kind='file') as record:
+                buffer = bytearray(1000000)
+                record['written'] = True
+            del buffer
+    finally:
+        assert instrument.disable() is recorder
+    report = recorder.report()
+    outer, = report['stages']
+    inner, = report['files']
+    assert (outer['depth'], inner['depth']) == (0, 1)
+    assert inner['written']
+    assert inner['peak_memory'] - inner['memory_start'] >= 1000000
+    assert outer['peak_memory'] >= inner['peak_memory']
+    assert outer['wall_time'] >= inner['wall_time'] >= 0
+    assert 'cpu_time' in outer
+
+
+def test_subscribers():
+    events = []
+
+    def callback(event, record):
+        events.append((event, record['name'], 'wall_time' in record))
+
+    instrument.subscribe(callback)
+    try:
+        with instrument.stage('outer'):
+            with instrument.stage('inner'):
+                pass
+    finally:
+        instrument.unsubscribe(callback)
+    assert events == [('start', 'outer', False), ('start', 'inner', False),
+                      ('end', 'inner', True), ('end', 'outer', True)]
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+import pytest
+
+from dnabot import ledger, planning
+
+
+in_dir = Path(__file__).resolve().parent / 'inputs'
+
+
+def test_volume_ledger_min_fill():
+    volume_ledger = ledger.VolumeLedger()
+    tube = volume_ledger.well('rack', 'A1', 'mix', dead_volume=10)
+    plate = volume_ledger.well('plate', 'A1', start_volume=0, capacity=50)
+    source = volume_ledger.well('plate', 'B1', 'part', start_volume=20,
+                                dead_volume=2)
+    volume_ledger.transfer('clip', tube, plate, 30)
+    volume_ledger.transfer('clip', source, plate, 20)
+    # Refilled after its first aspiration, the plate well is never drawn
+    #   below 20 uL
+    volume_ledger.transfer('assembly', plate, None, 30)
+    volume_ledger.transfer('assembly', None, plate, 40)
+    volume_ledger.transfer('assembly', plate, None, 40)
+    balances = {(b.labware, b.well): b for b in volume_ledger.balances()}
+
+    assert balances[('rack', 'A1')][5:] == (30, 0, 40, 'fill')
+    assert balances[('plate', 'A1')].steps == ['clip', 'assembly']
+    assert balances[('plate', 'A1')][5:] == (70, 90, 0, 'ok')
+    assert balances[('plate', 'B1')][5:] == (20, 0, 22, 'short')
+    assert ledger.failures(balances.values()) == [
+        'plate B1 (part) needs 22 uL, holds 20 uL']
+
+
+def test_plan_volumes(tmp_path, settings, sources, plan_run):
+    run_plan = plan_run(scripts=[])
+    balances = run_plan['volumes']
+    assert not ledger.failures(balances)
+    steps = {step for balance in balances for step in balance.steps}
+    assert steps == {'clip', 'purification', 'assembly', 'transformation'}
+    # Reagents are drawn as much as the master mix table plans
+    master_mix = next(balance for balance in balances
+                      if balance.content == 'master mix')
+    assert master_mix.drawn == planning.CLIP_MASTER_MIX_VOL * len(
+        run_plan['clips_dict']['parts_wells'])
+    # Beads and CLIP reactions are mixed in the mix plate, one column per
+    #   column of CLIP reactions, and moved back onto the magnetic module
+    bead_volume = planning.CLIP_VOL * \
+        settings['parameters']['purif_bead_ratio']['value']
+    mixes = [balance for balance in balances if balance.labware == 'mix plate']
+    assert len(mixes) == 8 * -(-len(run_plan['clips_dict']['parts_wells']) // 8)
+    assert mixes[0].well == 'A1'
+    assert mixes[0].drawn == mixes[0].dispensed == \
+        planning.CLIP_VOL + bead_volume
+    assert mixes[0].status == 'ok'
+
+    # Source wells holding too little for the CLIP reactions
+    low_sources = tmp_path / 'user_parts_coords.csv'
+    with open(sources[1]) as ifh:
+        rows = [line.rstrip('\n') for line in ifh if line.strip()]
+    low_sources.write_text('\n'.join(
+        [rows[0] + ',Volume (uL)'] + [row + ',3' for row in rows[1:]]))
+    with pytest.raises(ValueError, match='run dry'):
+        planning.plan(in_dir / 'constructs.csv', [sources[0], low_sources],
+                      settings, scripts=[])
@@ -57,4 +57,29 @@ def test_output(tmpdir):
             print(f'Difference in {fname}...')
             for diff in difflib.context_diff(out_str, ref_str):
                 print(diff)
-            raise e
\ No newline at end of file
+            raise e
+
+def test_startup_time():
+
+    import json
+
+    out = subprocess.run([
+        'python', '-m', 'dnabot.dnabot_app', '--startup_time'
+        ], stdout=subprocess.PIPE, check=True)
+    times = json.loads(out.stdout)
+    assert list(times) == [
+        'dnabot_app', 'yaml', 'numpy', 'pandas', 'tabulate', 'tkinter']
+
+
+def test_deferred_imports():
+
+    # Heavy and GUI-only modules are not imported with the generator
+    code = (
+        'import sys\n'
+        'from dnabot import dnabot_app\n'
+        'print(sorted({"pandas", "numpy", "yaml", "tabulate", "tkinter"}'
+        ' & set(sys.modules)))\n'
+        )
+    out = subprocess.run(['python', '-c', code], stdout=subprocess.PIPE,
+                         check=True)
+    assert out.stdout.decode().strip() == '[]'
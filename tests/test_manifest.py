@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from dnabot import manifest
+
+
+def test_write_if_changed_keeps_timestamp(tmp_path):
+    path = tmp_path / 'script.py'
+    assert manifest.write_if_changed(path, 'a=1\n')
+    os.utime(path, ns=(0, 0))
+    assert not manifest.write_if_changed(path, 'a=1\n')
+    assert os.stat(path).st_mtime_ns == 0
+    assert manifest.write_if_changed(path, 'a=2\n')
+    assert path.read_text() == 'a=2\n'
+
+
+def test_write_if_changed_csv_newlines(tmp_path):
+    path = tmp_path / 'info.csv'
+    assert manifest.write_if_changed(path, 'a,b\r\n', newline='')
+    assert not manifest.write_if_changed(path, 'a,b\r\n', newline='')
+    assert path.read_bytes() == b'a,b\r\n'
+
+
+def test_stale_artifacts(tmp_path):
+    (tmp_path / 'a.py').write_text('a')
+    (tmp_path / 'b.py').write_text('b')
+    artifacts = manifest.record_artifacts(tmp_path, ['a.py', 'b.py'])
+    assert manifest.stale_artifacts(tmp_path, artifacts) == []
+    (tmp_path / 'a.py').write_text('aa')
+    (tmp_path / 'b.py').unlink()
+    assert manifest.stale_artifacts(tmp_path, artifacts) == ['a.py', 'b.py']
+
+
+def test_fingerprint_data_ignores_key_order():
+    assert manifest.fingerprint_data({'a': 1, 'b': [2]}) == \
+        manifest.fingerprint_data({'b': [2], 'a': 1})
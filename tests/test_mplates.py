@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from dnabot import mplates
+
+
+@pytest.mark.parametrize('wells, last_well', [
+    (6, 'B3'), (12, 'C4'), (24, 'D6'), (96, 'H12'), (384, 'P24')])
+def test_plate_formats(wells, last_well):
+    plate = mplates.plate_format(wells)
+    assert plate.size == wells
+    assert plate.well(1) == 'A1'
+    assert plate.well(wells) == last_well
+    assert plate.number(last_well) == wells
+    assert plate.wells(range(1, wells + 1)) == plate.names
+    row_major = mplates.plate_format(wells, column_major=False)
+    assert row_major.well(2) == 'A2'
+    assert row_major.position('B1') == plate.position('B1') == (1, 0)
+    with pytest.raises(ValueError, match='Unsupported'):
+        mplates.plate_format(48)
+
+
+def test_legacy_well_numbering():
+    # 96 well plates overflow on extra columns, 12 well plates onto the next
+    #   plate
+    assert mplates.final_well(9) == 'A2'
+    assert mplates.final_wells([96, 97, 105]) == ['H12', 'A13', 'A14']
+    assert [mplates.final_12wellplate(number) for number in (1, 4, 12, 13)] \
+        == ['A1', 'A2', 'C4', 'A1']
+    assert mplates.PLATE_12.plate_wells([4, 16]) == ['A2', 'A2']
+    assert mplates.PLATE_96.lines(list(range(10))) == [
+        list(range(8)), [8, 9]]
+
+
+def test_quadrant_wells():
+    assert mplates.quadrant_wells([1, 2, 9, 96, 97, 193, 289, 384]) == [
+        'A1', 'C1', 'A3', 'O23', 'A2', 'B1', 'B2', 'P24']
+    assert sorted(mplates.quadrant_wells(range(1, 385))) == \
+        sorted(mplates.PLATE_384.names)
+    with pytest.raises(ValueError):
+        mplates.quadrant_wells([385])
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+import yaml
+
+from dnabot import constructs, ordering, planning
+
+
+in_dir = Path(__file__).resolve().parent / 'inputs'
+
+
+def test_order_constructs_groups_sizes_and_shared_clips():
+    library = constructs.ConstructLibrary()
+    short = [('L1-P', 'a', 'L2-S'), ('L2-P', 'b', 'L1-S')]
+    long_1 = short + [('L3-P', 'c', 'L1-S')]
+    long_2 = short + [('L3-P', 'd', 'L1-S')]
+    other = [('L1-P', 'e', 'L2-S'), ('L2-P', 'f', 'L1-S')]
+    for name, clips in [('s1', short), ('l1', long_1), ('o1', other),
+                        ('s2', short), ('l2', long_2), ('o2', other)]:
+        library.add(name, clips)
+    order = ordering.order_constructs(library, column_size=2)
+    # 2 parts constructs fill whole columns, sharing constructs neighbours
+    assert [library.names[index] for index in order] == \
+        ['s1', 's2', 'o1', 'o2', 'l1', 'l2']
+    reordered = library.take(order)
+    assert [construct.clips for construct in reordered] == \
+        [library[index].clips for index in order]
+
+
+def test_plan_writes_construct_order(tmp_path):
+    with open(in_dir / 'default_settings.yaml') as ifh:
+        settings = yaml.safe_load(ifh)
+    sources = [in_dir / 'linker_parts_coords.csv',
+               in_dir / 'user_parts_coords.csv']
+    run_plan = planning.plan(in_dir / 'constructs.csv', sources, settings,
+                             scripts=[], order_constructs=True)
+    assert sorted(run_plan['construct_order']) == \
+        list(range(len(run_plan['constructs_list'])))
+    relpaths = planning.write_plan(run_plan, tmp_path, 'constructs')
+    assert 'metainformation/constructs_construct_order.csv' in relpaths
+    rows = (tmp_path / 'metainformation' /
+            'constructs_construct_order.csv').read_text().splitlines()
+    assert rows[0] == 'Construct,Original well,Assigned well'
+    assert len(rows) == len(run_plan['constructs_list']) + 1
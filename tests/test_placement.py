@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+from pathlib import Path
+
+import pytest
+
+from dnabot import dnabot_app2_0, placement, planning
+
+
+def test_assign_clip_slots_respects_deck():
+    reactions = 48
+    clips_dict = {'parts_wells': ['A1'] * reactions,
+                  'prefixes_plates': ['2'] * reactions,
+                  'suffixes_plates': ['2'] * reactions,
+                  'parts_plates': ['5', '8'] * (reactions // 2)}
+    positions = {'tip_racks': ['3', '6', '9'], 'tube_rack': '4',
+                 'clip_plate': '7'}
+    assignment = placement.assign_clip_slots(
+        clips_dict, ['2', '5', '8'], [(positions, [])])
+    assigned = list(assignment.source_plates.values()) + \
+        assignment.tip_racks + [assignment.tube_rack]
+    assert len(assignment.tip_racks) == 3
+    assert len(set(assigned)) == len(assigned)
+    assert not set(assigned) & {'7', '12'}
+    assert assignment.travel <= assignment.default_travel
+
+    # The thermocycler takes slots 7, 8, 10 and 11
+    assignment = placement.assign_clip_slots(
+        clips_dict, ['2', '5', '8'], [(positions, ['thermocycler'])])
+    assigned = list(assignment.source_plates.values()) + \
+        assignment.tip_racks + [assignment.tube_rack]
+    assert sorted(assigned) == ['1', '2', '3', '4', '5', '6', '9']
+
+
+def test_plan_assign_slots(tmp_path, plan_run):
+    run_plan = plan_run(assign_slots=True)
+    assignment = run_plan['slot_assignment']
+    plates = set(run_plan['clips_dict']['prefixes_plates'] +
+                 run_plan['clips_dict']['parts_plates'])
+    assert plates <= set(assignment['source_plates'].values())
+    script = run_plan['scripts'][planning.CLIP_FNAME_2]
+    assert f"CANDIDATE_TIPRACK_SLOTS = {assignment['tip_racks']!r}" in script
+    assert f"TUBE_RACK_POSITION = {assignment['tube_rack']!r}" in script
+    positions = planning.slots.get_positions_from_clip(
+        run_plan['decks'][planning.CLIP_FNAME_2])
+    assert positions['tip_racks'] == assignment['tip_racks']
+    planning.write_plan(run_plan, tmp_path, 'constructs')
+    deck = (tmp_path / 'metainformation' / 'constructs_deck.md').read_text()
+    assert deck.startswith('## Slot assignment (CLIP step)')
+
+
+def test_clip_aspirations_tip_policies():
+    reactions = 24
+    clips_dict = {'parts_wells': ['A1'] * reactions,
+                  'prefixes_plates': ['2'] * reactions,
+                  'prefixes_wells': ['A7'] * reactions,
+                  'suffixes_plates': ['2'] * reactions,
+                  'suffixes_wells': ['B7', 'C1'] * (reactions // 2),
+                  'parts_plates': ['5'] * reactions,
+                  'water_vols': [7.0] * reactions}
+    assert placement.clip_tips(clips_dict) == 4 * reactions + 1
+    # Water: 2 wells per aspiration, linkers: 19 wells per aspiration
+    runs = placement.dispense_runs([1] * reactions, ['A7'] * reactions)
+    assert [(len(indexes), first) for _, indexes, first in runs] == \
+        [(19, True), (5, False)]
+    aspiration = placement.clip_aspirations(clips_dict, 'aspiration')
+    assert sum(a.new_tip for a in aspiration) == 1 + 12 + 2 + 2 + reactions
+    assert placement.clip_tips(clips_dict, 'source') == 1 + 1 + 1 + 2 + reactions
+    assert placement.tip_racks_needed(clips_dict, 'H12', 'source') == 2
+    estimates = [placement.estimate_clip_step(
+        clips_dict, {'tube_rack': '4', 'destination': '7', 'trash': '12',
+                     ('source', '2'): '2', ('source', '5'): '5'},
+        ['3'], tip_policy=policy) for policy in placement.TIP_POLICIES]
+    assert estimates[0].tip_racks == 2
+    assert estimates[2].seconds < estimates[1].seconds < estimates[0].seconds
+    with pytest.raises(ValueError):
+        placement.clip_aspirations(clips_dict, 'never')
+
+
+def test_assign_clip_slots_mixed_tip_policies():
+    reactions = 56
+    clips_dict = {'parts_wells': ['A1'] * reactions,
+                  'prefixes_plates': ['2'] * reactions,
+                  'prefixes_wells': ['A7'] * reactions,
+                  'suffixes_plates': ['2'] * reactions,
+                  'suffixes_wells': ['B7'] * reactions,
+                  'parts_plates': ['5'] * reactions,
+                  'water_vols': [7.0] * reactions}
+    template_dir = Path(planning.abs_path) / planning.TEMPLATE_DIR_NAME
+    scripts = [script for script in planning.OT2_SCRIPTS
+               if script[0] == planning.CLIP_FNAME_2] + \
+        [script for script in dnabot_app2_0.OT2_SCRIPTS
+         if script[0] == dnabot_app2_0.CLIP_FNAME_3]
+    assert placement.tip_racks_needed(clips_dict, tip_policy='source') == 1
+    # The thermocycler template has no tip policy and takes a new tip per
+    #   transfer, its tip racks are placed too
+    assignment, script_constants = planning.assign_clip_slots(
+        clips_dict, ['2', '5'], template_dir, scripts, tip_policy='source')
+    assert len(assignment.tip_racks) == placement.tip_racks_needed(
+        clips_dict, tip_policy='always') == 3
+    assert script_constants[dnabot_app2_0.CLIP_FNAME_3][
+        'CANDIDATE_TIPRACK_SLOTS'] == assignment.tip_racks
+    assignment, _ = planning.assign_clip_slots(
+        clips_dict, ['2', '5'], template_dir, scripts[:1], tip_policy='source')
+    assert len(assignment.tip_racks) == 1
+
+def test_plan_clip_tip_policy(plan_run):
+    run_plan = plan_run(clip_tip_policy='source')
+    assert "TIP_POLICY = 'source'" in run_plan['scripts'][planning.CLIP_FNAME_2]
+    clip_tips = run_plan['clip_tips']
+    assert clip_tips['scripts'] == [planning.CLIP_FNAME_2]
+    always, estimate = clip_tips['estimates']
+    assert estimate['tips'] == placement.clip_tips(run_plan['clips_dict'],
+                                                   'source') < always['tips']
+    # Each tip also draws the disposal volume from its source well
+    water = next(balance for balance in run_plan['volumes']
+                 if balance.content == 'water')
+    assert water.drawn == sum(run_plan['clips_dict']['water_vols']) + \
+        placement.DISPOSAL_VOLUME
+    assert 'Tip policy (CLIP step): source' in \
+        planning.format_deck_report([], None, clip_tips)
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import json
+import os
+
+import numpy as np
+import pytest
+from pathlib import Path
+
+from dnabot import constructs, dnabot_app, ledger, planning
+
+
+in_dir = Path(__file__).resolve().parent / 'inputs'
+in_file_construct = in_dir / 'constructs.csv'
+
+
+def make_construct(prefixes, parts, suffixes):
+    return constructs.Construct(
+        'construct', tuple(zip(prefixes, parts, suffixes)))
+
+
+def test_count_clips_first_occurrence_order():
+    constructs_list = planning.generate_constructs_list(in_file_construct)
+    clip_counter = planning.count_clips(constructs_list)
+    keys = list(clip_counter.keys())
+    assert keys[0] == ('LMS-P', 'BASIC_SEVA_37_CmR-p15A.1', 'LMP-S')
+    assert clip_counter[keys[0]] == 3
+    assert len(keys) == 13
+    assert sum(clip_counter.values()) == 15
+
+
+def test_clips_df_number_and_mag_well():
+    shared = make_construct(['LMS-P', 'LMP-P'], ['BB', 'PROM'], ['LMP-S', 'LMS-S'])
+    other = make_construct(['LMS-P', 'LMP-P'], ['BB', 'CDS'], ['LMP-S', 'LMS-S'])
+    # (40 - 2 - 5) uL of CLIP product, 1.5 uL per final assembly
+    assert planning.assemblies_per_clip() == 22
+    constructs_list = [shared] * 22 + [other]
+    clips_df = planning.generate_clips_df(constructs_list)
+    assert clips_df['parts'].tolist() == ['BB', 'PROM', 'CDS']
+    # 23 uses of BB -> 2 reactions, 22 of PROM -> 1, 1 of CDS -> 1
+    assert clips_df['number'].tolist() == [2, 1, 1]
+    assert clips_df['mag_well'].tolist() == [
+        ('A7', 'B7'), ('C7',), ('D7',)]
+
+
+def test_final_assembly_dict_spreads_clip_replicates():
+    shared = make_construct(['LMS-P', 'LMP-P'], ['BB', 'PROM'], ['LMP-S', 'LMS-S'])
+    constructs_list = [shared] * 23
+    clips_df = planning.generate_clips_df(constructs_list)
+    final_assembly_dict = planning.generate_final_assembly_dict(
+        constructs_list, clips_df)
+    assert final_assembly_dict['A1'] == ['A7', 'C7']
+    assert final_assembly_dict['D2'] == ['A7', 'C7']
+    # 23 uses of a clip over 2 replicates: 12 from the first, 11 from the
+    #   second
+    assert final_assembly_dict['E2'] == ['B7', 'D7']
+    assert final_assembly_dict['G3'] == ['B7', 'D7']
+
+
+def test_load_constructs_reports_all_unresolved(tmp_path, sources):
+    sources_dict = planning.generate_sources_dict(sources)
+    constructs_path = tmp_path / 'constructs.csv'
+    constructs_path.write_text(
+        in_file_construct.read_text()
+        + 'A4,LMS,BASIC_SEVA_37_CmR-p15A.1,LMP,MISSING,U9-RBS1,D5AP78\n'
+        + 'A5,LMS,BASIC_SEVA_37_CmR-p15A.1,LMP,MISSING\n'
+        + 'A6,LMS,BASIC_SEVA_37_CmR-p15A.1\n')
+    with pytest.raises(ValueError) as excinfo:
+        planning.load_constructs(constructs_path, sources_dict)
+    assert str(excinfo.value).splitlines()[1:] == [
+        '  Part MISSING not found in sources, rows 5, 6',
+        '  Linker U9-S not found in sources, row 5',
+        '  Linker U9-RBS1-P not found in sources, row 5',
+        '  Construct A6 (row 7) has 1 parts, 2 to 7 are supported']
+
+    library = planning.load_constructs(in_file_construct, sources_dict)
+    assert [construct.name for construct in library] == ['A1', 'A2', 'A3']
+    with pytest.raises(ValueError, match='exceeds maximum'):
+        planning.load_constructs(in_file_construct, sources_dict,
+                                 max_constructs=2)
+
+
+def test_part_vols_default_and_clipping():
+    concentrations = np.array([np.nan, 400, 57, 10])
+    part_vols = planning.calculate_part_vols(concentrations, 8.0)
+    assert part_vols.tolist() == [1, 1, 3.5, 8.0]
+    assert isinstance(part_vols[0], int)
+
+
+def test_sources_dict_2_columns(tmp_path):
+    sources_path = tmp_path / 'sources.csv'
+    sources_path.write_text('Part/linker,Well\nLMS-P,A1\n')
+    sources_dict = planning.generate_sources_dict([sources_path])
+    assert sources_dict['LMS-P'] == ('A1', '', '2')
+
+
+def test_clips_dict_2_columns_default_part_vol(tmp_path, sources):
+    # 2 column part files give no concentration: the default part volume
+    #   applies, not one computed from the deck position
+    parts_path = tmp_path / 'parts.csv'
+    with open(sources[1]) as ifh:
+        rows = [line.split(',')[:2] for line in ifh if line.strip()]
+    parts_path.write_text('\n'.join(','.join(row) for row in rows) + '\n')
+    sources_index = planning.generate_sources_index(
+        [sources[0], parts_path])
+    clips_df = planning.generate_clips_df(
+        planning.generate_constructs_list(in_file_construct))
+    clips_dict = planning.generate_clips_dict(clips_df, sources_index)
+    assert set(clips_dict['parts_vols']) == {planning.DEFAULT_PART_VOL}
+
+
+def test_clips_dict_draws_from_duplicate_wells(tmp_path):
+    sources_path = tmp_path / 'sources.csv'
+    sources_path.write_text(
+        'Part/linker,Well,Part concentration (ng/uL),Volume (uL)\n'
+        'LMS-P,A1,,\nLMS-P,A2,,\nLMP-S,B1,,\n'
+        'BB,C1,100,20\nBB,C2,25,100\n')
+    sources_index = planning.generate_sources_index([sources_path])
+    constructs_list = [make_construct(['LMS-P'], ['BB'], ['LMP-S'])] * 45
+    clips_df = planning.generate_clips_df(constructs_list)
+    clips_dict = planning.generate_clips_dict(clips_df, sources_index)
+    assert clips_dict['prefixes_wells'] == ['A1', 'A2', 'A1']
+    assert clips_dict['suffixes_wells'] == ['B1', 'B1', 'B1']
+    # Most remaining volume first, volume following the concentration
+    assert clips_dict['parts_wells'] == ['C2', 'C2', 'C2']
+    assert clips_dict['parts_vols'] == [8.0, 8.0, 8.0]
+    assert planning.generate_sources_dict([sources_path])['BB'] == \
+        ('C1', '100', '2')
+
+
+def test_allocate_mag_wells():
+    assert planning.allocate_mag_wells([2, 1, 9]) == [
+        ('A7', 'B7'), ('C7',),
+        ('D7', 'E7', 'F7', 'G7', 'H7', 'A8', 'B8', 'C8', 'D8')]
+    assert planning.allocate_mag_wells([]) == []
+    with pytest.raises(ValueError, match='magbead plate'):
+        planning.allocate_mag_wells([30, 19])
+
+
+def test_plan_in_memory(tmp_path, monkeypatch, plan_run):
+    monkeypatch.chdir(tmp_path)
+    run_plan = plan_run(scripts=[
+        ('1_clip.py', 'clip_template_APIv2.8.py',
+         {'clips_dict': 'clips_dict', '__LABWARES': 'labwares'})])
+    assert list(run_plan['final_assembly_dict']) == ['A1', 'B1', 'C1']
+    assert run_plan['spotting_tuples'] == [
+        (('A1', 'B1', 'C1'), ('A1', 'B1', 'C1'), (5, 5, 5))]
+    script = run_plan['scripts']['1_clip.py']
+    assert 'clips_dict={"prefixes_wells": ["B8", "B7",' in script
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_plan_selects_source_plates(tmp_path, settings, sources):
+    unused_path = tmp_path / 'unused.csv'
+    unused_path.write_text('Part/linker,Well\nLMS-P,A1\nOTHER,A2\n')
+    registry = [unused_path] * 6 + sources
+    with pytest.raises(ValueError, match='exceeds deck positions'):
+        planning.plan(in_file_construct, registry, settings, scripts=[])
+    run_plan = planning.plan(in_file_construct, registry, settings,
+                             scripts=[], select_sources=True)
+    assert run_plan['sources_paths'] == registry[6:]
+    assert set(run_plan['clips_dict']['prefixes_plates']) == {'2'}
+    assert set(run_plan['clips_dict']['parts_plates']) == {'5'}
+
+
+def test_plan_384_well_final_assembly(tmp_path, settings, sources):
+    # 120 constructs, more than a 96 well plate holds
+    rows = ['Well,Linker 1,Part 1,Linker 2,Part 2,Linker 3,Part 3,'
+            'Linker 4,Part 4,Linker 5,Part 5']
+    for index, (promoter, gene_1, gene_2, gene_3) in enumerate(
+            itertools.product(
+                ['PJ23101_BASIC', 'PJ23104_BASIC'],
+                ['D2WKD9', 'D5AP78', 'O07333', 'O48935', 'O66129'],
+                ['O66952', 'P48537', 'Q1XBU4', 'Q9C446'],
+                ['D2WKD9', 'D5AP78', 'O07333'])):
+        rows.append(f'C{index},LMS,BASIC_SEVA_37_CmR-p15A.1,LMP,{promoter},'
+                    f'U1-RBS1,{gene_1},U2-RBS1,{gene_2},U3-RBS1,{gene_3}')
+    constructs_path = tmp_path / 'constructs_120.csv'
+    constructs_path.write_text('\n'.join(rows) + '\n')
+
+    with pytest.raises(ValueError, match='exceeds maximum'):
+        planning.plan(constructs_path, sources, settings, scripts=[])
+    run_plan = planning.plan(constructs_path, sources, settings, scripts=[],
+                             assembly_plate_wells=384)
+    wells = list(run_plan['final_assembly_dict'])
+    assert len(wells) == 120
+    assert wells[:2] == ['A1', 'C1'] and wells[95:97] == ['O23', 'A2']
+    assert run_plan['spotting_tuples'] is None
+    quadrants = run_plan['quadrant_spotting_tuples']
+    assert [len(quadrant) for quadrant in quadrants] == [12, 3]
+    assert quadrants[1][0][:2] == (
+        ('A2', 'C2', 'E2', 'G2', 'I2', 'K2', 'M2', 'O2'),
+        ('A1', 'B1', 'C1', 'D1', 'E1', 'F1', 'G1', 'H1'))
+    # A SOC plate per quadrant, 12 then 3 transformation plate columns
+    socs = [balance for balance in run_plan['volumes']
+            if balance.labware == 'SOC plate']
+    assert [(balance.well, balance.min_fill) for balance in socs
+            if balance.well[2] == 'A'] == [
+        ('1:A1', 12 * planning.TRANSFO_SOC_VOL + 100),
+        ('2:A1', 3 * planning.TRANSFO_SOC_VOL + 100)]
+    assert not ledger.failures(run_plan['volumes'], ('over capacity',))
+
+
+def test_select_targets_and_render_plan(tmp_path, plan_run):
+    assert dnabot_app.select_targets(dnabot_app.TARGETS, None) is None
+    assert dnabot_app.select_targets(
+        dnabot_app.TARGETS, ['APIv2.8', 'Thermocycler']) == [
+        planning.CLIP_FNAME_2, planning.MAGBEAD_FNAME_2,
+        planning.F_ASSEMBLY_FNAME_2, planning.TRANS_SPOT_FNAME_2,
+        planning.CLIP_FNAME_3, planning.F_ASSEMBLY_FNAME_3,
+        planning.TRANS_SPOT_FNAME_3]
+
+    # Only render the clip script, the assembly script is rendered later
+    scripts = [script for script in planning.OT2_SCRIPTS
+               if script[0] in (planning.CLIP_FNAME_2,
+                                planning.F_ASSEMBLY_FNAME_2)]
+    run_plan = plan_run(scripts=scripts, selected=[planning.CLIP_FNAME_2])
+    assert list(run_plan['scripts']) == [planning.CLIP_FNAME_2]
+    planning.write_plan(run_plan, tmp_path, 'constructs')
+    assert not (tmp_path / planning.F_ASSEMBLY_FNAME_2).exists()
+
+    plan_path = tmp_path / 'metainformation' / 'constructs_plan.json'
+    rendered = planning.render_plan(
+        plan_path, selected=[planning.F_ASSEMBLY_FNAME_2], scripts=scripts)
+    full_plan = plan_run(scripts=scripts)
+    assert rendered == {planning.F_ASSEMBLY_FNAME_2:
+                        full_plan['scripts'][planning.F_ASSEMBLY_FNAME_2]}
+    assert (tmp_path / planning.F_ASSEMBLY_FNAME_2).exists()
+    deck = (tmp_path / 'metainformation' / 'constructs_deck.md').read_text()
+    assert planning.CLIP_FNAME_2 in deck
+    assert planning.F_ASSEMBLY_FNAME_2 in deck
+
+
+def test_generate_run_incremental(tmp_path, capsys, settings, sources):
+    template_dir = tmp_path / 'templates'
+    template_dir.mkdir()
+    scripts = [script for script in planning.OT2_SCRIPTS
+               if script[0] in (planning.CLIP_FNAME_2,
+                                planning.F_ASSEMBLY_FNAME_2)]
+    for _, template_fname, _ in scripts:
+        (template_dir / template_fname).write_text(
+            (Path(planning.abs_path) / planning.TEMPLATE_DIR_NAME
+             / template_fname).read_text())
+    out_dir = tmp_path / 'out'
+
+    def run(**kwargs):
+        return dnabot_app.generate_run(
+            in_file_construct, sources, out_dir, settings,
+            template_dir=template_dir, scripts=scripts, **kwargs)
+
+    def stamps():
+        return {path: os.stat(path).st_mtime_ns
+                for path in out_dir.rglob('*') if path.is_file()}
+
+    assert run() is not None
+    first = stamps()
+    assert run() is None
+    assert stamps() == first
+    assert 'Run is up to date.' in capsys.readouterr().out
+
+    # Only the script of the edited template is written again
+    with open(template_dir / scripts[1][1], 'a') as ofh:
+        ofh.write('# edited\n')
+    assert run() is None
+    changed = {path.name for path, stamp in stamps().items()
+               if stamp != first[path]}
+    assert changed == {planning.F_ASSEMBLY_FNAME_2,
+                       'constructs_manifest.json'}
+    assert (out_dir / planning.F_ASSEMBLY_FNAME_2).read_text().endswith(
+        '# edited\n')
+
+    # Changed settings trigger planning again
+    settings['parameters']['clip_keep_thermo_lid_closed']['value'] = 1
+    assert run(profile=True) is not None
+    with open(out_dir / 'constructs_profile.json') as ifh:
+        profile = json.load(ifh)
+    assert [stage['name'] for stage in profile['stages']][:5] == [
+        'run', 'fingerprints', 'plan', 'sources_dict', 'constructs_list']
+    assert {record['name'] for record in profile['files']} >= {
+        planning.CLIP_FNAME_2, 'constructs_deck.md'}
+
+
+def test_render_plan_updates_manifest(tmp_path, capsys, settings, sources):
+    scripts = [script for script in planning.OT2_SCRIPTS
+               if script[0] in (planning.CLIP_FNAME_2,
+                                planning.F_ASSEMBLY_FNAME_2)]
+
+    def run():
+        return dnabot_app.generate_run(
+            in_file_construct, sources, tmp_path, settings, scripts=scripts,
+            selected=[planning.CLIP_FNAME_2])
+
+    assert run() is not None
+    # Rendering another script rewrites the deck report and run record
+    planning.render_plan(
+        tmp_path / 'metainformation' / 'constructs_plan.json',
+        selected=[planning.F_ASSEMBLY_FNAME_2], scripts=scripts)
+    with open(tmp_path / 'metainformation' / 'constructs_manifest.json') as ifh:
+        artifacts = json.load(ifh)['artifacts']
+    assert planning.F_ASSEMBLY_FNAME_2 in artifacts
+    capsys.readouterr()
+    assert run() is None
+    assert 'Run is up to date.' in capsys.readouterr().out
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import json
+
+import pytest
+
+from dnabot import planning, runinfo
+
+
+def test_run_writer(tmp_path):
+    path = tmp_path / 'run.json'
+
+    def write():
+        with runinfo.RunWriter(path, tmp_path / 'run_wells') as writer:
+            writer.section('run', {'wells': ('A1', 'B1')})
+            writer.table(runinfo.WELLS_SECTION, ['well', 'volume_ul'],
+                         iter([('A1', 1.5), ('B1', 2)]))
+        return writer
+
+    writer = write()
+    assert json.loads(path.read_text()) == writer.record == {
+        'run': {'wells': ['A1', 'B1']},
+        'wells': {'columns': ['well', 'volume_ul'],
+                  'rows': [['A1', 1.5], ['B1', 2]]}}
+    assert all(writer.written.values())
+    assert writer.table_path.name == 'run_wells.csv'
+    # Unchanged files are left untouched
+    assert not any(write().written.values())
+
+    # Nothing is written when the record fails
+    written = path.read_text()
+    with pytest.raises(ValueError):
+        with runinfo.RunWriter(path, tmp_path / 'run_wells') as writer:
+            writer.section('run', {})
+            raise ValueError
+    assert path.read_text() == written
+    assert sorted(p.name for p in tmp_path.iterdir()) == \
+        ['run.json', writer.table_path.name]
+    with pytest.raises(ValueError, match='Unknown run table format'):
+        runinfo.RunWriter(path, tmp_path / 'run_wells', 'xlsx')
+
+
+def test_run_writer_parquet(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    with runinfo.RunWriter(tmp_path / 'run.json', tmp_path / 'run_wells',
+                           'parquet') as writer:
+        writer.table(runinfo.WELLS_SECTION, ['well', 'volume_ul'],
+                     iter([('A1', 1.5), ('B1', 2.0)]))
+    assert writer.table_path.name == 'run_wells.parquet'
+    assert pq.read_table(writer.table_path).to_pydict() == {
+        'well': ['A1', 'B1'], 'volume_ul': [1.5, 2.0]}
+
+
+def test_write_plan_run_info(tmp_path, plan_run):
+    run_plan = plan_run(scripts=[])
+    relpaths = planning.write_plan(run_plan, tmp_path, 'constructs')
+    metainfo_dir = tmp_path / 'metainformation'
+    run_info = runinfo.load(metainfo_dir / 'constructs_run.json')
+    assert 'metainformation/constructs_run.json' in relpaths
+
+    # Metainformation files are formatted from the run record
+    with open(metainfo_dir / 'constructs_clip_run_info.csv', newline='') as ifh:
+        clips_info = ifh.read()
+    assert clips_info == planning.format_clips_info(run_info)
+    assert "\"('A7',)\"" in clips_info
+    assert run_info['final_assemblies']['rows'][0] == \
+        ['A1', 'A1', list(run_plan['final_assembly_dict']['A1'])]
+
+    # One row per planned transfer
+    rows = run_info['wells']['rows']
+    clips = len(run_plan['clips_dict']['parts_wells'])
+    steps = [row[0] for row in rows]
+    assert steps.count('clip') == 5 * clips
+    # Every channel of each column: beads, mix, washes and elution, then
+    #   the purified CLIP product of each CLIP reaction
+    channels = 8 * -(-clips // 8)
+    assert steps.count('purification') == \
+        (5 + 2 * planning.PURIF_ETHANOL_WASHES) * channels + clips
+    # Master mix and CLIP products of each final assembly
+    assert steps.count('assembly') == sum(
+        1 + len(wells) for wells in run_plan['final_assembly_dict'].values())
+    # Final assembly and spotting of each construct, SOC on every channel
+    #   of each column
+    constructs_number = len(run_plan['constructs_list'])
+    assert steps.count('transformation') == \
+        2 * constructs_number + 8 * -(-constructs_number // 8)
+    columns = runinfo.WELLS_COLUMNS
+    master_mix, water = (dict(zip(columns, row)) for row in rows[:2])
+    assert (master_mix['source_well'], water['source_well']) == (
+        planning.CLIP_MASTER_MIX_WELL, planning.CLIP_WATER_WELL)
+    products = [dict(zip(columns, row)) for row in rows
+                if row[0] == 'purification'
+                and row[columns.index('destination_well')] == 'A7']
+    assert [product['volume_ul'] for product in products] == [
+        planning.CLIP_ELUTION_VOL - planning.CLIP_ELUTION_DEAD_VOL]
+    # Reagents drawn as the volume ledger counts them, ethanol washes being
+    #   removed from the CLIP plate
+    for content in ('SOC', 'ethanol', 'elution buffer', 'beads', 'water'):
+        assert sum(row[2] for row in rows if row[1] == content
+                   and row[columns.index('source_labware')] != 'clip_plate') \
+            == sum(balance.drawn for balance in run_plan['volumes']
+                   if balance.content == content)
+    with open(metainfo_dir / 'constructs_run_wells.csv', newline='') as ifh:
+        table_rows = list(csv.reader(ifh))
+    assert table_rows[0] == list(runinfo.WELLS_COLUMNS)
+    assert len(table_rows) == len(rows) + 1
+
+
+def test_generate_transfers_slots(plan_run):
+    scripts = [script for script in planning.OT2_SCRIPTS
+               if script[0] in (planning.CLIP_FNAME_2,
+                                planning.TRANS_SPOT_FNAME_2)]
+    run_plan = plan_run(scripts=scripts, assign_slots=True)
+    report = planning.deck_report(None, run_plan['scripts'],
+                                  decks=run_plan['decks'])
+    positions = planning.step_positions(report)
+    transfers = [dict(zip(runinfo.WELLS_COLUMNS, row))
+                 for row in planning.generate_transfers(run_plan, positions)]
+    # Slots of the tube rack as assigned, of the plates as in the templates
+    master_mix = transfers[0]
+    assert master_mix['source_slot'] == \
+        run_plan['slot_assignment']['tube_rack']
+    assert master_mix['destination_slot'] == '7'
+    soc = next(transfer for transfer in transfers
+               if transfer['content'] == 'SOC')
+    assert (soc['source_slot'], soc['destination_slot']) == (
+        positions['transformation']['SOC_plate'],
+        positions['transformation']['transformation_plate'])
+    # Scripts of the purification and assembly steps are not rendered
+    assert {transfer['source_slot'] for transfer in transfers
+            if transfer['step'] == 'purification'} == {None}
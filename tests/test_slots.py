@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+from dnabot import planning, slots
+
+
+def test_parse_deck():
+    deck = slots.parse_deck(
+        "def run(protocol):\n"
+        "    TUBE_RACK_POSITION = '4'\n"
+        "    CANDIDATE_TIPRACK_SLOTS = ['3', '6', '9']\n"
+        "    TUBE_RACK_TYPE = __LABWARES['24_tuberack_1500ul']['id']\n"
+        "    tc_mod = protocol.load_module(module_name='thermocycler')\n"
+        "    tempdeck = protocol.load_module('tempdeck', TUBE_RACK_POSITION)\n")
+    assert deck.constants == {'TUBE_RACK_POSITION': '4',
+                              'CANDIDATE_TIPRACK_SLOTS': ['3', '6', '9']}
+    assert deck.modules == ['thermocycler', 'tempdeck']
+    filled = deck.filled(
+        {'__LABWARES': {'24_tuberack_1500ul': {'id': 'rack'}},
+         'clips_dict': {'prefixes_plates': ['2'], 'parts_plates': ['5', '5']}})
+    assert filled.labware_ids() == {'TUBE_RACK_TYPE': 'rack'}
+    assert slots.get_positions_from_clip(filled) == {
+        'biolegio_plate': ['2'], 'parts_plates': ['5'],
+        'tip_racks': ['3', '6', '9'], 'tube_rack': '4', 'clip_plate': '7'}
+    assert 'clips_dict' not in deck.constants
+
+
+def test_plan_decks_match_written_scripts(tmp_path, run_plan):
+    planning.write_plan(run_plan, tmp_path, 'constructs')
+    script_path = tmp_path / planning.CLIP_FNAME_2
+    written = slots.read_deck(script_path)
+    assert slots.read_deck(script_path) is written
+    assert slots.get_positions_from_clip(
+        run_plan['decks'][planning.CLIP_FNAME_2]) == \
+        slots.get_positions_from_clip(written)
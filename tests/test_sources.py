@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from dnabot import sources
+
+
+def test_read_sources_keeps_every_location(tmp_path):
+    linkers_path = tmp_path / 'linkers.csv'
+    linkers_path.write_text(
+        'Part/linker,Well,Part concentration (ng/uL)\nLMS-P,A1,\nLMP-S,B1,\n')
+    parts_path = tmp_path / 'parts.csv'
+    parts_path.write_text(
+        'Part/linker,Well,Part concentration (ng/uL),Volume (uL)\n'
+        'LMS-P,H12,,40\nBB,A1,100,\n')
+    index = sources.read_sources([linkers_path, parts_path], ['2', '5'])
+    assert index['LMS-P'] == [sources.Location('A1', '', '2', None),
+                              sources.Location('H12', '', '5', 40.0)]
+    assert index['BB'] == [sources.Location('A1', '100', '5', None)]
+    assert index.duplicates() == ['LMS-P']
+
+
+def test_allocator_balances_duplicate_wells():
+    index = sources.SourceIndex()
+    index.add('LMS-P', sources.Location('A1', '', '2', 10.0))
+    index.add('LMS-P', sources.Location('A2', '', '2', 30.0))
+    index.add('LMP-S', sources.Location('B1', '', '2', None))
+    index.add('LMP-S', sources.Location('B2', '', '5', 50.0))
+    allocator = sources.SourceAllocator(index)
+    # Most remaining volume first, then alternating once levelled
+    wells = [allocator.take('LMS-P', 5).well for _ in range(6)]
+    assert wells == ['A2'] * 4 + ['A1', 'A2']
+    # Unknown volumes: even split, first location on ties
+    wells = [allocator.take('LMP-S', 1).well for _ in range(3)]
+    assert wells == ['B1', 'B2', 'B1']
+    assert allocator.remaining() == {'LMS-P': [5.0, 5.0],
+                                     'LMP-S': [None, 49.0]}
+
+
+def test_select_plates_fewest_plates():
+    plates = [set('acdh'), set('abdf'), set('efgh'), set('cegh'), set('ch'),
+              set('abc')]
+    # Greedy cover takes the first largest plate, exact search does better
+    assert sources.select_plates('abcdefgh', plates,
+                                 max_combinations=0) == [0, 1, 2]
+    assert sources.select_plates('abcdefgh', plates) == [1, 3]
+    # The only plate providing a name is always selected
+    assert sources.select_plates('ax', [set('a'), set('ax')]) == [1]
+    with pytest.raises(ValueError, match='x, y'):
+        sources.select_plates('axy', plates)
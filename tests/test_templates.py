@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from dnabot import templates
+
+
+TEMPLATE = "from opentrons import protocol_api\n\ndef run(protocol):\n    pass\n"
+
+
+def test_render(tmp_path):
+    template_path = tmp_path / 'template.py'
+    template_path.write_text(TEMPLATE)
+    script = templates.compile_template(template_path).render(
+        clips_dict={'a': [1]}, ethanol_well='A11', sample_number=3)
+    assert script == (
+        "from opentrons import protocol_api\n\n"
+        'clips_dict={"a": [1]}\n'
+        "ethanol_well='A11'\n"
+        "sample_number=3\n"
+        "\n"
+        "\ndef run(protocol):\n    pass\n")
+
+
+def test_cache_invalidation(tmp_path):
+    template_path = tmp_path / 'template.py'
+    template_path.write_text(TEMPLATE)
+    compiled = templates.compile_template(template_path)
+    assert templates.compile_template(template_path) is compiled
+    template_path.write_text('# v2\n' + TEMPLATE)
+    os.utime(template_path, ns=(0, compiled.stamp[0] + 1))
+    recompiled = templates.compile_template(template_path)
+    assert recompiled is not compiled
+    assert recompiled.header.startswith('# v2\n')
+
+
+def test_disk_cache(tmp_path):
+    template_path = tmp_path / 'template.py'
+    template_path.write_text(TEMPLATE)
+    cache_dir = tmp_path / 'cache'
+    compiled = templates.compile_template(template_path, cache_dir)
+    templates.clear_cache()
+    cached = templates.compile_template(template_path, cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+    assert cached is not compiled
+    assert (cached.header, cached.body) == (compiled.header, compiled.body)
+
+
+def test_no_injection_point(tmp_path):
+    template_path = tmp_path / 'template.py'
+    template_path.write_text("import os\n")
+    with pytest.raises(ValueError):
+        templates.compile_template(template_path)
+
+
+def test_render_constants(tmp_path):
+    template_path = tmp_path / 'template.py'
+    template_path.write_text(
+        "import os\n\ndef run(protocol):\n    SLOT = '1'\n"
+        "    def nested():\n        OTHER = '2'\n        OTHER = '3'\n")
+    compiled = templates.compile_template(template_path)
+    script = compiled.render_literals({}, constants={'SLOT': '4'})
+    assert "    SLOT = '4'\n" in script
+    with pytest.raises(ValueError):
+        compiled.render_literals({}, constants={'OTHER': '4'})
+    with pytest.raises(ValueError):
+        compiled.render_literals({}, constants={'MISSING': '4'})